@@ -2,16 +2,31 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
+from core.ezqcid_remap import EzqcidRemapper, RemapReport, load_ezqcid_mapping
+from core.integrity_manifest import IntegrityReport
 from core.project_service import ProjectService
+from core.rating_service import RatingService
+from core.rating_sync import SyncReport
+from core.schema_migration import MigrationReport, SchemaMigrator
+from core.sqlite_export import SQLiteExportReport
+from core.table_service import TABLE_ALL, TableService
 from models.project import Project
+from models.storage import RATING_LAYOUTS
+
+
+SYNC_DIRECTIONS = ("pull", "push", "both")
 
 
 class QCPageLaunchError(ValueError):
     """Raised when a CLI QC page request cannot be resolved."""
 
 
+class ProjectMaintenanceError(ValueError):
+    """Raised when a CLI maintenance command cannot run."""
+
+
 @dataclass(frozen=True)
 class QCPageLaunchContext:
     project: Project
@@ -59,4 +74,162 @@ def resolve_qcpage_launch(
     )
 
 
-__all__ = ["QCPageLaunchContext", "QCPageLaunchError", "resolve_qcpage_launch"]
+def _load_project_service(project_name: str, registry_path: Path) -> ProjectService:
+    project_service = ProjectService(registry_path)
+    if project_name not in project_service.list_all():
+        raise ProjectMaintenanceError(f"项目不存在: {project_name}; 可用项目: {project_service.list_all()}")
+    project_service.load(project_name)
+    return project_service
+
+
+def migrate_rating_layout(project_name: str, layout: str, registry_path: Path) -> int:
+    """Move a project's rating files into ``layout`` and make it the layout
+    new saves use. Returns the number of files moved."""
+    if layout not in RATING_LAYOUTS:
+        raise ProjectMaintenanceError(f"未知的评分目录布局: {layout}; 可用布局: {list(RATING_LAYOUTS)}")
+    project_service = _load_project_service(project_name, registry_path)
+    project = project_service.current_project
+    # Switch new saves first: a save racing the migration then lands in the
+    # target layout, and readers accept both layouts throughout.
+    project_service.set_storage_option("rating_layout", layout)
+    project_service.save()
+    return RatingService(project).migrate_rating_layout(layout)
+
+
+def convert_rating_filenames(project_name: str, stable: bool, registry_path: Path) -> int:
+    """Switch a project to stable (or back to legacy) rating filenames and
+    rename its existing files. Returns the number of files renamed."""
+    project_service = _load_project_service(project_name, registry_path)
+    project = project_service.current_project
+    project_service.set_storage_option("stable_filenames", stable)
+    project_service.save()
+    return RatingService(project).convert_rating_filenames(stable)
+
+
+def archive_module(project_name: str, module_name: str, registry_path: Path) -> int:
+    """Pack a finished module's rating files into its rating archive.
+    Returns the number of archived ratings."""
+    project_service = _load_project_service(project_name, registry_path)
+    try:
+        return RatingService(project_service).archive_module(module_name)
+    except ValueError as exc:
+        raise ProjectMaintenanceError(str(exc)) from exc
+
+
+def restore_module(project_name: str, module_name: str, registry_path: Path) -> int:
+    """Extract a module's rating archive back into rating files.
+    Returns the number of restored files."""
+    project_service = _load_project_service(project_name, registry_path)
+    try:
+        return RatingService(project_service).restore_module(module_name)
+    except ValueError as exc:
+        raise ProjectMaintenanceError(str(exc)) from exc
+
+
+def verify_integrity(
+    project_name: str,
+    registry_path: Path,
+    full: bool = False,
+    accept: bool = False,
+) -> dict[str, IntegrityReport]:
+    """Verify (or with ``accept`` re-baseline) the integrity manifests of the
+    project's ``RatingFiles/`` and ``Table/``."""
+    project_service = _load_project_service(project_name, registry_path)
+    project = project_service.current_project
+    return {
+        "RatingFiles": RatingService(project).verify_rating_files(full=full, accept=accept),
+        "Table": TableService().verify_tables(project, full=full, accept=accept),
+    }
+
+
+def sync_ratings(
+    project_name: str,
+    other_path: str | Path,
+    direction: str,
+    registry_path: Path,
+    dry_run: bool = False,
+) -> dict[str, SyncReport]:
+    """Sync ratings between a registered project and another copy of it at
+    ``other_path`` (a removable drive or mounted directory).
+
+    ``direction`` is ``pull`` (other -> project), ``push`` (project -> other)
+    or ``both`` (pull, then push).
+    """
+    if direction not in SYNC_DIRECTIONS:
+        raise ProjectMaintenanceError(f"未知的同步方向: {direction}; 可用方向: {list(SYNC_DIRECTIONS)}")
+    project_service = _load_project_service(project_name, registry_path)
+    project = project_service.current_project
+    other = Project(project.name, Path(other_path))
+    if not other.rating_dir.is_dir():
+        raise ProjectMaintenanceError(f"同步目标不是项目副本（缺少 RatingFiles）: {other.path}")
+    if other.path.resolve() == project.path.resolve():
+        raise ProjectMaintenanceError(f"同步目标与项目目录相同: {other.path}")
+
+    reports: dict[str, SyncReport] = {}
+    if direction in ("pull", "both"):
+        reports["pull"] = RatingService(project).sync_ratings_from(other, dry_run=dry_run)
+    if direction in ("push", "both"):
+        reports["push"] = RatingService(other).sync_ratings_from(project, dry_run=dry_run)
+    return reports
+
+
+def migrate_schema(
+    project_name: str,
+    registry_path: Path,
+    dry_run: bool = False,
+    progress: Callable[[int, int], None] | None = None,
+) -> MigrationReport:
+    """Upgrade every rating and settings file of a project to the current
+    schema version; resumes an interrupted run from its checkpoint."""
+    project_service = _load_project_service(project_name, registry_path)
+    return SchemaMigrator(project_service.current_project, progress=progress).run(dry_run=dry_run)
+
+
+def remap_ezqcids(
+    project_name: str,
+    mapping_path: str | Path,
+    registry_path: Path,
+    dry_run: bool = False,
+) -> RemapReport:
+    """Rename subjects across ``Table/ezqc_*.csv`` and every rating file from
+    an old -> new ezqcid mapping CSV; all-or-nothing via a rollback journal."""
+    project_service = _load_project_service(project_name, registry_path)
+    try:
+        mapping = load_ezqcid_mapping(mapping_path)
+        return EzqcidRemapper(project_service.current_project).run(mapping, dry_run=dry_run)
+    except (OSError, ValueError) as exc:
+        raise ProjectMaintenanceError(str(exc)) from exc
+
+
+def rollback_ezqcid_remap(project_name: str, registry_path: Path) -> bool:
+    """Undo an interrupted ezqcid remap; False when none is pending."""
+    project_service = _load_project_service(project_name, registry_path)
+    return EzqcidRemapper(project_service.current_project).rollback()
+
+
+def export_sqlite(project_name: str, registry_path: Path, full: bool = False) -> SQLiteExportReport:
+    """Aggregate a project's ratings and refresh ``Table/ezqc_results.sqlite``
+    (incrementally unless ``full``)."""
+    project_service = _load_project_service(project_name, registry_path)
+    subjects = TableService().load_table(project_service.current_project, TABLE_ALL)
+    if subjects is None:
+        raise ProjectMaintenanceError(f"项目没有受试者表 {TABLE_ALL}.csv，无法导出")
+    return RatingService(project_service).export_sqlite(subjects, full=full)
+
+
+__all__ = [
+    "ProjectMaintenanceError",
+    "QCPageLaunchContext",
+    "QCPageLaunchError",
+    "archive_module",
+    "convert_rating_filenames",
+    "export_sqlite",
+    "migrate_rating_layout",
+    "migrate_schema",
+    "remap_ezqcids",
+    "resolve_qcpage_launch",
+    "restore_module",
+    "rollback_ezqcid_remap",
+    "sync_ratings",
+    "verify_integrity",
+]
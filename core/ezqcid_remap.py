@@ -0,0 +1,298 @@
+"""Bulk ezqcid remapping across subject tables and rating files.
+
+When a site renames subject IDs (e.g. BIDS relabeling) every ``Table/ezqc_*.csv``
+``ezqcid`` column and every rating file (its name, shard and ``ezqcid``
+payload field) has to change together. ``EzqcidRemapper`` does it from an
+old -> new mapping:
+
+1. validate everything up front: a consistent mapping, no table row and no
+   ``(ezqcid, module, rater)`` rating identity that would collide after the
+   remap, no remapped subject inside an immutable module archive;
+2. back up the tables and write the rollback journal
+   (``Cache/ezqcid_remap/journal.json``);
+3. write every remapped rating under a hidden temp name (worker pool, one
+   batched durability window) and rewrite the tables atomically;
+4. commit: move the old rating files into the backup, then rename the temp
+   files to their final names (moving all old files first makes swaps such as
+   ``A -> B, B -> A`` safe);
+5. drop the journal and the backup.
+
+A failure in steps 3-4 rolls back automatically; after a crash
+``rollback()`` (CLI ``--rollback-remap``) restores the pre-remap state from
+the journal. Tables are rewritten as text (``dtype=str``), so every other cell
+keeps its exact spelling. Derived ``*.filepath``/``*.filename`` columns of
+``ezqc_qctable*`` refresh on the next extraction.
+
+Layer: core. Stdlib + pandas + core rating helpers.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Mapping
+
+import pandas as pd
+
+from core.rater_dir_cache import RaterDirListing, rating_identity_from_filename
+from core.rating_archive import RatingArchive, find_rating_archives
+from core.rating_layout import rater_dir_of, shard_name
+from core.rating_service import RatingService
+from models.project import Project
+from utils.file_utils import DURABILITY_BATCHED, DurabilityWindow, FileUtils
+
+
+REMAP_DIRNAME = "ezqcid_remap"
+REMAP_JOURNAL_FILENAME = "journal.json"
+DEFAULT_REMAP_WORKERS = 8
+
+STATE_PREPARED = "prepared"
+STATE_COMMITTING = "committing"
+
+
+class EzqcidRemapError(ValueError):
+    """The remap was rejected by validation or a previous remap is unfinished."""
+
+
+def load_ezqcid_mapping(path: str | os.PathLike[str]) -> dict[str, str]:
+    """``{old: new}`` from a CSV with ``old_ezqcid``/``new_ezqcid`` columns
+    (otherwise the first two columns are used)."""
+    table = pd.read_csv(path, dtype=str, keep_default_na=False)
+    if {"old_ezqcid", "new_ezqcid"} <= set(table.columns):
+        old, new = table["old_ezqcid"], table["new_ezqcid"]
+    elif len(table.columns) >= 2:
+        old, new = table.iloc[:, 0], table.iloc[:, 1]
+    else:
+        raise EzqcidRemapError(f"映射表至少需要两列（old_ezqcid, new_ezqcid）: {path}")
+    pairs = list(zip(old.str.strip(), new.str.strip()))
+    problems = [f"映射表含空 ezqcid: {o!r} -> {n!r}" for o, n in pairs if not o or not n]
+    targets: dict[str, set[str]] = {}
+    for o, n in pairs:
+        targets.setdefault(o, set()).add(n)
+    problems.extend(f"旧 ezqcid {o} 映射到多个新 ezqcid" for o in sorted(targets) if len(targets[o]) > 1)
+    if problems:
+        raise EzqcidRemapError("\n".join(problems))
+    return {o: n for o, n in pairs if o != n}
+
+
+@dataclass(frozen=True)
+class RatingRename:
+    old: Path
+    temp: Path
+    new: Path
+    new_ezqcid: str
+
+
+@dataclass
+class RemapReport:
+    tables: dict[str, int] = field(default_factory=dict)  # table -> rows remapped
+    ratings: int = 0
+    dry_run: bool = False
+
+
+class EzqcidRemapper:
+    def __init__(self, project: Project, workers: int | None = None) -> None:
+        self.project = project
+        self.workers = DEFAULT_REMAP_WORKERS if workers is None else workers
+        self.work_dir = project.cache_dir / REMAP_DIRNAME
+        self.journal_path = self.work_dir / REMAP_JOURNAL_FILENAME
+        self.backup_dir = self.work_dir / "backup"
+
+    # ---- planning / validation ----
+
+    def _tables(self) -> dict[str, Path]:
+        if not self.project.table_dir.exists():
+            return {}
+        return {path.stem: path for path in sorted(self.project.table_dir.glob("ezqc_*.csv"))}
+
+    @staticmethod
+    def _read_table(path: Path) -> pd.DataFrame:
+        return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+    def _plan_ratings(self, mapping: Mapping[str, str]) -> list[RatingRename]:
+        renames: list[RatingRename] = []
+        for path in RatingService.scan_rating_tree(self.project.rating_dir):
+            identity = rating_identity_from_filename(path.name)
+            if identity is None or identity[1] not in mapping:
+                continue
+            module_name, ezqcid, rater = identity
+            new_ezqcid = mapping[ezqcid]
+            rater_dir = rater_dir_of(path)
+            new_dir = rater_dir / shard_name(new_ezqcid) if path.parent != rater_dir else rater_dir
+            new_name = path.name.replace(f"{module_name}._.{ezqcid}._.{rater}", f"{module_name}._.{new_ezqcid}._.{rater}", 1)
+            renames.append(RatingRename(path, new_dir / f".{new_name}.remap", new_dir / new_name, new_ezqcid))
+        return renames
+
+    def validate(self, mapping: Mapping[str, str]) -> list[str]:
+        """Everything that would make the remap unsafe; empty when it is fine."""
+        problems: list[str] = []
+        if self.journal_path.exists():
+            problems.append(f"上一次 ezqcid 重映射未完成，请先回滚: {self.journal_path}")
+
+        for table_type, path in self._tables().items():
+            table = self._read_table(path)
+            if "ezqcid" not in table.columns:
+                continue
+            before = Counter(table["ezqcid"])
+            after = Counter(table["ezqcid"].map(lambda value: mapping.get(value, value)))
+            for ezqcid, count in sorted(after.items()):
+                if count > 1 and count > before.get(ezqcid, 0):
+                    problems.append(f"{table_type}.csv 重映射后 ezqcid 重复: {ezqcid}")
+
+        identities: Counter = Counter()
+        originals: Counter = Counter()
+        for path in RatingService.scan_rating_tree(self.project.rating_dir):
+            identity = rating_identity_from_filename(path.name)
+            if identity is None:
+                continue
+            module_name, ezqcid, rater = identity
+            originals[identity] += 1
+            identities[(module_name, mapping.get(ezqcid, ezqcid), rater)] += 1
+        for (module_name, ezqcid, rater), count in sorted(identities.items()):
+            if count > 1 and count > originals.get((module_name, ezqcid, rater), 0):
+                problems.append(f"重映射后评分身份重复: ({ezqcid}, {module_name}, {rater})")
+
+        for archive in find_rating_archives(self.project.rating_dir):
+            archived = sorted({entry.ezqcid for entry in RatingArchive.for_path(archive).entries()} & set(mapping))
+            if archived:
+                problems.append(f"归档 {archive.name} 含待重映射的 ezqcid（请先恢复模块）: {', '.join(archived[:5])}")
+        return problems
+
+    # ---- run ----
+
+    def run(self, mapping: Mapping[str, str], dry_run: bool = False) -> RemapReport:
+        mapping = dict(mapping)
+        if not dry_run:
+            # Pending journal saves must exist as files to be remapped.
+            RatingService(self.project).compact_rating_journals()
+        problems = self.validate(mapping)
+        if problems:
+            raise EzqcidRemapError("\n".join(problems))
+
+        report = RemapReport(dry_run=dry_run)
+        tables: dict[str, pd.DataFrame] = {}
+        for table_type, path in self._tables().items():
+            table = self._read_table(path)
+            if "ezqcid" not in table.columns:
+                continue
+            mask = table["ezqcid"].isin(mapping)
+            if mask.any():
+                table.loc[mask, "ezqcid"] = table.loc[mask, "ezqcid"].map(mapping)
+                tables[table_type] = table
+                report.tables[table_type] = int(mask.sum())
+        renames = self._plan_ratings(mapping)
+        report.ratings = len(renames)
+        if dry_run or (not tables and not renames):
+            return report
+
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        for table_type in tables:
+            shutil.copy2(self.project.table_dir / f"{table_type}.csv", self.backup_dir / f"{table_type}.csv")
+        self._write_journal(STATE_PREPARED, list(tables), renames)
+        try:
+            self._write_remapped_ratings(renames)
+            with FileUtils.durability(DURABILITY_BATCHED):
+                for table_type, table in tables.items():
+                    FileUtils.atomic_write(self.project.table_dir / f"{table_type}.csv", table.to_csv(index=False))
+            self._write_journal(STATE_COMMITTING, list(tables), renames)
+            self._commit(renames)
+        except Exception:
+            self.rollback()
+            raise
+        shutil.rmtree(self.work_dir)
+        return report
+
+    def _write_journal(self, state: str, tables: list[str], renames: list[RatingRename]) -> None:
+        root = self.project.path
+        FileUtils.safe_json_save(
+            self.journal_path,
+            {
+                "state": state,
+                "tables": tables,
+                "ratings": [
+                    [str(r.old.relative_to(root)), str(r.temp.relative_to(root)), str(r.new.relative_to(root))]
+                    for r in renames
+                ],
+            },
+        )
+
+    def _write_remapped_ratings(self, renames: list[RatingRename]) -> None:
+        window = DurabilityWindow(DURABILITY_BATCHED)
+
+        def write(rename: RatingRename) -> None:
+            text = rename.old.read_text(encoding="utf-8")
+            payload = FileUtils.json_codec.loads(text)
+            payload["ezqcid"] = rename.new_ezqcid
+            rename.temp.parent.mkdir(parents=True, exist_ok=True)
+            with FileUtils.durability(window):
+                FileUtils.safe_json_save(rename.temp, payload, indent=4 if "\n" in text.strip() else None)
+
+        if self.workers <= 1 or len(renames) <= 1:
+            for rename in renames:
+                write(rename)
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(renames))) as pool:
+                list(pool.map(write, renames))
+        window.commit()
+
+    def _backup_path(self, path: Path) -> Path:
+        return self.backup_dir / path.relative_to(self.project.path)
+
+    def _commit(self, renames: list[RatingRename]) -> None:
+        for rename in renames:
+            backup = self._backup_path(rename.old)
+            backup.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(rename.old, backup)
+            RaterDirListing.for_directory(rename.old.parent).record_unlink(rename.old.name)
+        for rename in renames:
+            os.replace(rename.temp, rename.new)
+            RaterDirListing.for_directory(rename.new.parent).record_write(rename.new.name)
+        shards = {rename.old.parent for rename in renames if rename.old.parent != rater_dir_of(rename.old)}
+        for shard in shards:
+            if shard.exists() and not any(shard.iterdir()):
+                shard.rmdir()
+
+    # ---- rollback ----
+
+    def rollback(self) -> bool:
+        """Undo an interrupted or failed remap from its journal; False when
+        there is nothing to roll back."""
+        try:
+            journal = FileUtils.safe_json_load(self.journal_path)
+        except (OSError, ValueError):
+            return False
+        root = self.project.path
+        ops = [tuple(root / part for part in op) for op in journal.get("ratings", [])]
+        committing = journal.get("state") == STATE_COMMITTING
+        # A temp file that is gone during commit was renamed to its new name.
+        renamed = [new for _old, temp, new in ops if committing and not temp.exists()]
+        for _old, temp, _new in ops:
+            temp.unlink(missing_ok=True)
+        for new in renamed:
+            new.unlink(missing_ok=True)
+            RaterDirListing.for_directory(new.parent).record_unlink(new.name)
+        for old, _temp, _new in ops:
+            backup = self._backup_path(old)
+            if backup.exists():
+                old.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(backup, old)
+                RaterDirListing.for_directory(old.parent).record_write(old.name)
+        for table_type in journal.get("tables", []):
+            backup = self.backup_dir / f"{table_type}.csv"
+            if backup.exists():
+                # Fresh mtime: columnar copies written by the remap go stale.
+                FileUtils.atomic_write(self.project.table_dir / f"{table_type}.csv", backup.read_text(encoding="utf-8"))
+        shutil.rmtree(self.work_dir)
+        return True
+
+
+__all__ = [
+    "EzqcidRemapError",
+    "EzqcidRemapper",
+    "RemapReport",
+    "load_ezqcid_mapping",
+]
@@ -0,0 +1,197 @@
+"""Integrity manifest of a project data directory (``RatingFiles/``, ``Table/``).
+
+The manifest records, per file, the size, ``mtime_ns`` and SHA-256 the file
+had when the manifest was last accepted::
+
+    {"version": 1, "root": "RatingFiles", "entries": {"<posix relpath>": [size, mtime_ns, sha256]}}
+
+``verify`` compares the directory against it. Files whose stat signature is
+unchanged are trusted (a quick check is one ``stat`` per file); only files
+whose stat changed are re-hashed, on a thread pool (hashlib releases the GIL).
+A re-hashed file with the recorded content is only "touched" and its new stat
+is folded back into the manifest. ``full=True`` re-hashes everything and also
+catches in-place corruption that kept the stat (bit rot, restores that reset
+mtimes). Re-hashed ``*.json`` files that no longer parse are reported as
+corrupt (truncated/torn writes).
+
+In ``RatingFiles/`` the per-rater summary indexes and rating journals
+(``.journal.jsonl``) are left out of the manifest: the journal grows with
+every save, so hashing it would report each save as a modification. Journal
+saves are covered once compaction writes them to their rating files, which
+then show up as added or modified like any other save.
+
+``verify(accept=True)`` makes the current state the new baseline.
+Manifests live under ``<project>/Cache/`` (ADR-004: derived data only).
+
+Layer: core. Stdlib + utils only.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from utils.file_utils import FileUtils
+
+
+MANIFEST_VERSION = 1
+DEFAULT_HASH_WORKERS = 8
+RATING_MANIFEST_FILENAME = "integrity_ratings.json"
+TABLE_MANIFEST_FILENAME = "integrity_tables.json"
+
+# FileUtils.atomic_write / write_rating_archive temp files: never part of the data.
+_TEMP_FILE = re.compile(r"^\..+\.tmp\.\d+$")
+
+
+@dataclass
+class IntegrityReport:
+    """Differences between a directory and its manifest (posix relpaths)."""
+
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+    corrupt: list[str] = field(default_factory=list)
+    touched: list[str] = field(default_factory=list)  # stat changed, content did not
+    unchanged: int = 0
+    hashed: int = 0
+
+    @property
+    def ok(self) -> bool:
+        """No recorded file went missing, changed or became unreadable."""
+        return not (self.removed or self.modified or self.corrupt)
+
+
+class IntegrityManifest:
+    def __init__(
+        self,
+        root: str | os.PathLike[str],
+        manifest_path: str | os.PathLike[str],
+        exclude_names: Iterable[str] = (),
+        workers: int | None = None,
+    ) -> None:
+        self.root = Path(root)
+        self.path = Path(manifest_path)
+        # Regenerable sidecars that change on every save (e.g. summary index).
+        self.exclude_names = frozenset(exclude_names)
+        self.workers = DEFAULT_HASH_WORKERS if workers is None else workers
+
+    # ---- files ----
+
+    def scan(self) -> dict[str, os.stat_result]:
+        files: dict[str, os.stat_result] = {}
+        if not self.root.exists():
+            return files
+        for root, _dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                if name in self.exclude_names or _TEMP_FILE.match(name):
+                    continue
+                path = Path(root) / name
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files[path.relative_to(self.root).as_posix()] = stat
+        return files
+
+    @staticmethod
+    def hash_file(path: Path) -> tuple[str, bool]:
+        """``(sha256 hex, readable)``; ``*.json`` files must also parse."""
+        content = path.read_bytes()
+        readable = True
+        if path.suffix == ".json":
+            try:
+                FileUtils.json_codec.loads(content)
+            except ValueError:
+                readable = False
+        return hashlib.sha256(content).hexdigest(), readable
+
+    def _hash_many(self, relpaths: list[str]) -> list[tuple[str, bool] | None]:
+        def hash_one(relpath: str) -> tuple[str, bool] | None:
+            try:
+                return self.hash_file(self.root / relpath)
+            except FileNotFoundError:
+                return None
+
+        if self.workers <= 1 or len(relpaths) <= 1:
+            return [hash_one(relpath) for relpath in relpaths]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(relpaths))) as pool:
+            return list(pool.map(hash_one, relpaths))
+
+    # ---- manifest ----
+
+    def load(self) -> dict[str, list]:
+        try:
+            data = FileUtils.safe_json_load(self.path)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return {}
+        return dict(data.get("entries") or {})
+
+    def save(self, entries: dict[str, list]) -> None:
+        data = {"version": MANIFEST_VERSION, "root": self.root.name, "entries": dict(sorted(entries.items()))}
+        FileUtils.safe_json_save(self.path, data, indent=None)
+
+    def verify(self, full: bool = False, accept: bool = False) -> IntegrityReport:
+        """Compare the directory with the manifest.
+
+        Re-hashes only stat-changed files (every file with ``full=True``).
+        ``accept=True`` records the current state as the new baseline;
+        otherwise only "touched" entries are refreshed in the manifest.
+        """
+        recorded = self.load()
+        current = self.scan()
+        report = IntegrityReport(removed=sorted(set(recorded) - set(current)))
+
+        to_hash: list[str] = []
+        for relpath, stat in sorted(current.items()):
+            entry = recorded.get(relpath)
+            if not full and entry is not None and tuple(entry[:2]) == (stat.st_size, stat.st_mtime_ns):
+                report.unchanged += 1
+            else:
+                to_hash.append(relpath)
+
+        entries = dict(recorded)
+        refreshed = False
+        for relpath, hashed in zip(to_hash, self._hash_many(to_hash)):
+            if hashed is None:  # deleted while verifying
+                continue
+            report.hashed += 1
+            digest, readable = hashed
+            stat = current[relpath]
+            entry = recorded.get(relpath)
+            if not readable:
+                report.corrupt.append(relpath)
+            if entry is None:
+                report.added.append(relpath)
+            elif entry[2] != digest:
+                report.modified.append(relpath)
+            elif tuple(entry[:2]) != (stat.st_size, stat.st_mtime_ns):
+                report.touched.append(relpath)
+                entries[relpath] = [stat.st_size, stat.st_mtime_ns, digest]
+                refreshed = True
+            else:
+                report.unchanged += 1
+            if accept:
+                entries[relpath] = [stat.st_size, stat.st_mtime_ns, digest]
+
+        if accept:
+            for relpath in report.removed:
+                entries.pop(relpath, None)
+        if accept or refreshed:
+            self.save(entries)
+        return report
+
+
+__all__ = [
+    "IntegrityManifest",
+    "IntegrityReport",
+    "MANIFEST_VERSION",
+    "RATING_MANIFEST_FILENAME",
+    "TABLE_MANIFEST_FILENAME",
+]
@@ -10,6 +10,8 @@ from typing import Any, Callable
 from core.event_bus import EventBus, Event, EventType
 from models.project import Project, ProjectRegistry
 from models.qcmodule import QCModule, Score, Tag
+from models.schema import CURRENT_SCHEMA_VERSION, stamp_schema_version
+from models.storage import STORAGE_SETTINGS_KEY, StorageConfig
 from utils.file_utils import FileUtils
 from utils.validators import validate_project_name
 
@@ -236,6 +238,17 @@ class ProjectService:
                 return
         raise KeyError(name)
 
+    def storage_config(self) -> StorageConfig:
+        self._require_current_project()
+        return StorageConfig.from_settings(self._settings)
+
+    def set_storage_option(self, key: str, value: Any) -> None:
+        """Set one ``settings["storage"]`` option (see models.storage)."""
+        self._require_current_project()
+        if key not in StorageConfig().to_legacy_dict():
+            raise ValueError(f"未知的存储选项: {key}")
+        self._settings.setdefault(STORAGE_SETTINGS_KEY, {})[key] = value
+
     # ---- P2-A gap: project lifecycle + module CRUD helpers (for dialogs migration) ----
 
     def current_project_name(self) -> str | None:
@@ -336,22 +349,14 @@ class ProjectService:
     def save(self) -> None:
         self._save_registry()
         if self.current is not None:
-            self._ensure_schema_version(self._settings)
+            # Legacy v0 settings get versioned on their first explicit save.
+            stamp_schema_version(self._settings)
             FileUtils.safe_json_save(self.current.settings_path, self._settings)
             # SETTINGS_SAVED is a typed-only event (new in P1-C). It is emitted
             # directly rather than via _notify so it does not fire the legacy
             # string observers, which only expect project/modules events.
             self.event_bus.emit(Event(type=EventType.SETTINGS_SAVED, source="ProjectService"))
 
-    @staticmethod
-    def _ensure_schema_version(payload: dict[str, Any]) -> None:
-        """Stamp the current schema version onto an outbound payload, but never
-        downgrade an existing higher version (forward-compat). Legacy v0 files
-        lack the key entirely; they get versioned on first explicit save."""
-        current = payload.get("schema_version")
-        if not isinstance(current, int) or current < 1:
-            payload["schema_version"] = 1
-
     def add_observer(self, callback: Callable[[str], None]) -> None:
         """[DEPRECATED] Legacy string observer. Bridged to the typed EventBus
         for transition. Prefer ``service.event_bus.subscribe(EventType.X, ...)``
@@ -374,7 +379,7 @@ class ProjectService:
         (read-only normalization on load, write only on explicit save — P0-E).
         """
         return {
-            "schema_version": 1,
+            "schema_version": CURRENT_SCHEMA_VERSION,
             "constants": {},
             "variables": {},
             "var_select_filter": None,
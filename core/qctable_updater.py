@@ -0,0 +1,268 @@
+"""Keep the in-memory ``ezqc_qctable`` current one saved rating at a time.
+
+``extract_qc_results`` rebuilds the whole long table, pivot and subject merge.
+Between extractions ``QCTableUpdater`` listens for ``RATING_SAVED`` (emitted by
+``core.rating_watcher``) and patches only the affected cells of the qctable
+held by ``SessionState``: the row of that ``ezqcid`` and its
+``<module>.<rater>.*`` columns, plus the matching ``rating_dict`` entry.
+
+- The identity is re-resolved on every event (pending journal entry, then
+  rating file, then module archive), so a re-score that renames the file, a
+  deleted file and a journal append all land on the current rating; an
+  identity with no rating left has its columns cleared.
+- Rows are found through an ``{ezqcid: row labels}`` map built once per
+  qctable object (held by weak reference, so a replaced table is never
+  mistaken for the old one), so a patch costs O(columns of one module/rater).
+- A subject missing from the qctable but present in ``ezqc_all`` gets its row
+  appended; ratings of unknown subjects are ignored, like the full merge does.
+- Columns new to the table are placed at the end of their score/tag/notes/
+  other group, so the column order can differ from a full extraction until
+  the next one. ``ezqc_qctable_filter`` is not patched (re-run the filter).
+- With ``persist_delay`` the patched table is saved as ``ezqc_qctable`` once
+  saves have been quiet for that many seconds (debounced; ``flush()`` saves
+  immediately, ``detach()`` flushes). The GUI passes its Tk root as
+  ``scheduler`` so the delayed save runs on the tk loop, the thread that owns
+  ``SessionState``; without one a ``threading.Timer`` is used (headless).
+
+Layer: core. pandas + core services; no tkinter.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import weakref
+from collections.abc import Hashable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from core.event_bus import Event, EventBus, EventType
+from core.rating_projection import RatingProjection
+from core.rating_service import RatingService
+from core.session_state import SessionState
+from core.table_service import TABLE_ALL, TABLE_QCTABLE, TableService
+from models.rating import Rating
+from utils.logger import log_exception, log_warning
+
+
+# Seconds of quiet after the last patch before the qctable is saved (GUI default).
+DEFAULT_PERSIST_DELAY = 5.0
+
+_IDENTITY_FIELDS = ("ezqcid", "module_name", "rater")
+_GROUP_PATTERNS = (re.compile(r"\.score\d+$"), re.compile(r"\.tag\d+$"), re.compile(r"\.notes\d+$"))
+
+
+def _column_group(column: str) -> int:
+    """Position of ``column``'s group in the qctable layout: score, tag,
+    notes, then everything else (see ``merge_subjects_with_rating_wide``)."""
+    for group, pattern in enumerate(_GROUP_PATTERNS):
+        if pattern.search(column):
+            return group
+    return len(_GROUP_PATTERNS)
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def wide_row_values(
+    service: RatingService,
+    rating: Rating,
+    path: Path | None,
+    projection: RatingProjection | None = None,
+) -> dict[str, Any]:
+    """The ``<module>.<rater>.<field>`` cells a full extraction (with
+    ``projection``) gives this rating."""
+    prefix = f"{rating.module_name}.{rating.rater}."
+    values: dict[str, Any] = {}
+    for key, value in service.rating_to_flat_record(rating, path).items():
+        column = prefix + key
+        if key in _IDENTITY_FIELDS or ".code" in column or _is_missing(value):
+            continue
+        if projection is not None and not projection.accepts(key):
+            continue
+        values[column] = value
+    return values
+
+
+def _set_cell(qctable: pd.DataFrame, label: Hashable, column: str, value: Any) -> None:
+    try:
+        qctable.at[label, column] = value
+    except (TypeError, ValueError):
+        # e.g. a string into a float column: widen the column like a fresh pivot would.
+        qctable[column] = qctable[column].astype(object)
+        qctable.at[label, column] = value
+
+
+def _insert_column(qctable: pd.DataFrame, column: str) -> None:
+    group = _column_group(column)
+    columns = list(qctable.columns)
+    same = [i for i, name in enumerate(columns) if name != "ezqcid" and _column_group(name) == group]
+    if same:
+        loc = same[-1] + 1
+    else:
+        loc = 1 + sum(1 for name in columns if name != "ezqcid" and _column_group(name) < group)
+    qctable.insert(min(loc, len(columns)), column, pd.Series(np.nan, index=qctable.index, dtype=object))
+
+
+def patch_qctable_rows(
+    qctable: pd.DataFrame,
+    labels: list[Hashable],
+    prefix: str,
+    values: dict[str, Any],
+) -> None:
+    """Set the ``prefix`` columns of the rows at ``labels`` to ``values``
+    (missing ones become NaN), adding columns the table does not have yet."""
+    for column in values:
+        if column not in qctable.columns:
+            _insert_column(qctable, column)
+    for column in [name for name in qctable.columns if name.startswith(prefix)]:
+        value = values.get(column, np.nan)
+        for label in labels:
+            _set_cell(qctable, label, column, value)
+
+
+class QCTableUpdater:
+    def __init__(
+        self,
+        rating_service: RatingService,
+        session_state: SessionState,
+        table_service: TableService | None = None,
+        persist_delay: float | None = None,
+        scheduler: Any = None,
+    ) -> None:
+        self.rating_service = rating_service
+        self.session_state = session_state
+        self.table_service = table_service
+        self.persist_delay = persist_delay
+        # Anything with tkinter's after()/after_cancel() (the Tk root).
+        self.scheduler = scheduler
+        # Same fields as the extraction that built the qctable.
+        self.projection = rating_service.qctable_projection()
+        # Set when the watcher lost changes: only a full extraction is exact again.
+        self.stale = False
+        self._lock = threading.RLock()
+        self._timer: threading.Timer | None = None
+        self._job: Any = None
+        self._dirty = False
+        self._rows_table: weakref.ref[pd.DataFrame] | None = None
+        self._rows_len = 0
+        self._rows: dict[str, list[Hashable]] = {}
+        self._bus: EventBus | None = None
+
+    # ---- event wiring ----
+
+    def attach(self, event_bus: EventBus) -> None:
+        self._bus = event_bus
+        event_bus.subscribe(EventType.RATING_SAVED, self.on_rating_saved)
+
+    def detach(self) -> None:
+        if self._bus is not None:
+            self._bus.unsubscribe(EventType.RATING_SAVED, self.on_rating_saved)
+            self._bus = None
+        self.flush()
+
+    def on_rating_saved(self, event: Event) -> None:
+        data = event.data or {}
+        if data.get("resync"):
+            self.stale = True
+            log_warning("评分变化可能有遗漏，请重新提取 QC 结果", "QCTableUpdater")
+            return
+        self.apply(data["module_name"], data["ezqcid"], data["rater"])
+
+    # ---- patching ----
+
+    def _row_labels(self, qctable: pd.DataFrame, ezqcid: str) -> list[Hashable]:
+        cached = self._rows_table() if self._rows_table is not None else None
+        if cached is not qctable or self._rows_len != len(qctable):
+            rows: dict[str, list[Hashable]] = {}
+            for label, value in zip(qctable.index, qctable["ezqcid"].astype(str)):
+                rows.setdefault(value, []).append(label)
+            self._rows, self._rows_table, self._rows_len = rows, weakref.ref(qctable), len(qctable)
+        return self._rows.get(ezqcid, [])
+
+    def _append_subject_row(self, qctable: pd.DataFrame, ezqcid: str) -> list[Hashable]:
+        subjects = self.session_state.var_table(TABLE_ALL)
+        if subjects is None or "ezqcid" not in subjects.columns:
+            return []
+        matches = subjects[subjects["ezqcid"].astype(str) == ezqcid]
+        if matches.empty:
+            return []
+        row = matches.iloc[0].reindex(qctable.columns)
+        row["ezqcid"] = ezqcid
+        integer_index = len(qctable) and pd.api.types.is_integer_dtype(qctable.index)
+        label = qctable.index.max() + 1 if integer_index else len(qctable)
+        qctable.loc[label] = row
+        self._rows.setdefault(ezqcid, []).append(label)
+        self._rows_len = len(qctable)
+        return [label]
+
+    def apply(self, module_name: str, ezqcid: str, rater: str) -> bool:
+        """Patch the qctable and ``rating_dict`` for one identity; False when
+        there is no qctable yet or the subject is unknown."""
+        ezqcid = str(ezqcid)
+        record = self.rating_service.resolve_current_rating(module_name, ezqcid, rater)
+        key = f"{module_name}-{rater}"
+        with self._lock:
+            if record is None:
+                self.session_state.rating_dict.get(ezqcid, {}).pop(key, None)
+            else:
+                self.session_state.rating_dict.setdefault(ezqcid, {})[key] = record[0].to_legacy_dict()
+            qctable = self.session_state.result_table(TABLE_QCTABLE)
+            if qctable is None or "ezqcid" not in qctable.columns:
+                return False
+            labels = self._row_labels(qctable, ezqcid)
+            if not labels and record is not None:
+                labels = self._append_subject_row(qctable, ezqcid)
+            if not labels:
+                return False
+            values = {} if record is None else wide_row_values(self.rating_service, *record, self.projection)
+            patch_qctable_rows(qctable, labels, f"{module_name}.{rater}.", values)
+            self._dirty = True
+        self._schedule_persist()
+        return True
+
+    # ---- debounced persist ----
+
+    def _schedule_persist(self) -> None:
+        if self.persist_delay is None or self.table_service is None:
+            return
+        with self._lock:
+            self._cancel_persist()
+            if self.scheduler is not None:
+                self._job = self.scheduler.after(int(self.persist_delay * 1000), self.flush)
+                return
+            self._timer = threading.Timer(self.persist_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _cancel_persist(self) -> None:
+        if self._job is not None:
+            self.scheduler.after_cancel(self._job)
+            self._job = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def flush(self) -> None:
+        """Save the patched qctable now if there are unsaved patches."""
+        with self._lock:
+            self._cancel_persist()
+            if not self._dirty or self.table_service is None:
+                return
+            qctable = self.session_state.result_table(TABLE_QCTABLE)
+            snapshot = None if qctable is None else qctable.copy()
+            self._dirty = False
+        if snapshot is None:
+            return
+        try:
+            self.table_service.save_table(self.rating_service.project, TABLE_QCTABLE, snapshot)
+        except Exception:
+            log_exception("保存增量更新的 QC 结果表失败", "QCTableUpdater", show_popup=False)
+
+
+__all__ = ["DEFAULT_PERSIST_DELAY", "QCTableUpdater", "patch_qctable_rows", "wide_row_values"]
@@ -0,0 +1,179 @@
+"""Shared, mtime-revalidated listing cache for ``RatingFiles/<module>/<rater>/``.
+
+Every QC-page navigation, score click and save used to ``glob`` the rater
+directory for the ``<module>._.<ezqcid>._.<rater>`` prefix — a full directory
+scan each time. ``RaterDirListing`` keeps one ``os.scandir`` snapshot per rater
+directory, indexed by rating identity, so a prefix lookup is a dict hit.
+
+Revalidation: every lookup ``stat``s the directory; a changed ``st_mtime_ns``
+(another process or tool added/removed a file) triggers a rescan. Our own
+writes update the snapshot in place and re-record the directory mtime, so they
+do not force a rescan. On filesystems with whole-second directory timestamps
+(some NFS exports) a change within the same second as the snapshot is
+indistinguishable by mtime, so such "racy" snapshots are rescanned until the
+clock has moved past them (the same trick git uses for its index).
+
+Layer: core. Stdlib only; thread-safe (rating ingestion uses a thread pool).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+
+# Identity of a rating file: (module_name, ezqcid, rater).
+RatingIdentity = tuple[str, str, str]
+
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+def rating_identity_from_filename(name: str) -> RatingIdentity | None:
+    """``(module, ezqcid, rater)`` of a rating filename, or None."""
+    if not name.endswith(".json") or name.startswith("."):
+        return None
+    parts = name[: -len(".json")].split("._.")
+    if len(parts) >= 5:
+        return parts[0], "._.".join(parts[1:-3]), parts[-3]
+    if len(parts) == 3:
+        return parts[0], parts[1], parts[2]
+    return None
+
+
+class RaterDirListing:
+    """Cached listing of one rater directory."""
+
+    _registry: dict[str, "RaterDirListing"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._mtime_ns: int | None = None
+        self._scanned_at_ns = 0
+        self._names: set[str] = set()
+        self._subdirectories: set[str] = set()
+        self._by_identity: dict[RatingIdentity, set[str]] = {}
+
+    @classmethod
+    def for_directory(cls, directory: str | os.PathLike[str]) -> "RaterDirListing":
+        """The process-wide shared listing for ``directory``."""
+        key = os.path.abspath(directory)
+        with cls._registry_lock:
+            listing = cls._registry.get(key)
+            if listing is None:
+                listing = cls._registry[key] = cls(key)
+            return listing
+
+    @classmethod
+    def clear_registry(cls) -> None:
+        with cls._registry_lock:
+            cls._registry.clear()
+
+    # ---- snapshot maintenance ----
+
+    def _directory_mtime_ns(self) -> int | None:
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    def _is_racy(self, mtime_ns: int) -> bool:
+        coarse = mtime_ns % 1_000_000_000 == 0
+        return coarse and self._scanned_at_ns - mtime_ns < _RACY_WINDOW_NS
+
+    def _revalidate(self) -> bool:
+        """Rescan if the directory changed behind our back. Returns False when
+        the directory does not exist (the snapshot is then empty)."""
+        mtime_ns = self._directory_mtime_ns()
+        if mtime_ns is None:
+            self._mtime_ns = None
+            self._names.clear()
+            self._subdirectories.clear()
+            self._by_identity.clear()
+            return False
+        if mtime_ns != self._mtime_ns or self._is_racy(mtime_ns):
+            self._rescan(mtime_ns)
+        return True
+
+    def _rescan(self, mtime_ns: int) -> None:
+        self._scanned_at_ns = time.time_ns()
+        names: set[str] = set()
+        subdirectories: set[str] = set()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    names.add(entry.name)
+                elif entry.is_dir():
+                    subdirectories.add(entry.name)
+        self._subdirectories = subdirectories
+        self._names = set()
+        self._by_identity = {}
+        for name in names:
+            self._add(name)
+        self._mtime_ns = mtime_ns
+
+    def _add(self, name: str) -> None:
+        self._names.add(name)
+        identity = rating_identity_from_filename(name)
+        if identity is not None:
+            self._by_identity.setdefault(identity, set()).add(name)
+
+    def _discard(self, name: str) -> None:
+        self._names.discard(name)
+        identity = rating_identity_from_filename(name)
+        names = self._by_identity.get(identity) if identity is not None else None
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self._by_identity[identity]
+
+    # ---- lookups ----
+
+    def names(self) -> list[str]:
+        """Sorted names of every file in the directory."""
+        with self._lock:
+            self._revalidate()
+            return sorted(self._names)
+
+    def subdirectories(self) -> list[str]:
+        """Sorted names of the directory's subdirectories (layout shards)."""
+        with self._lock:
+            self._revalidate()
+            return sorted(self._subdirectories)
+
+    def files_for(self, module_name: str, ezqcid: str, rater: str) -> list[Path]:
+        """Sorted rating files of one identity (any score1/tag1 suffix)."""
+        with self._lock:
+            if not self._revalidate():
+                return []
+            names = self._by_identity.get((module_name, ezqcid, rater), ())
+            return [self.directory / name for name in sorted(names)]
+
+    # ---- our own writes ----
+
+    def record_write(self, name: str) -> None:
+        self._record(name, present=True)
+
+    def record_unlink(self, name: str) -> None:
+        self._record(name, present=False)
+
+    def _record(self, name: str, present: bool) -> None:
+        with self._lock:
+            if self._mtime_ns is None:
+                return  # never scanned; the next lookup scans anyway
+            if present:
+                self._add(name)
+            else:
+                self._discard(name)
+            # Adopt the post-write mtime so our own change does not force a
+            # rescan. Callers look the identity up (revalidating) right before
+            # writing, which keeps the window for missing a foreign change
+            # between that lookup and this write small.
+            mtime_ns = self._directory_mtime_ns()
+            if mtime_ns is not None:
+                self._mtime_ns = mtime_ns
+
+
+__all__ = ["RaterDirListing", "RatingIdentity", "rating_identity_from_filename"]
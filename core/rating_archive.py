@@ -0,0 +1,186 @@
+"""Cold-storage archives of finished modules' rating files.
+
+``RatingService.archive_module`` packs ``RatingFiles/<module>/`` into ONE zip,
+``RatingFiles/<module>.ratings.zip``, and removes the loose files. The zip's
+first member, ``index.json``, is the central index: one entry per rating
+member with its identity and the filename score1/tag1, so listing an archived
+rater directory needs no decompression at all. Rating members keep their
+``RatingFiles``-relative paths and hold fully expanded legacy payloads (no
+dependency on the module snapshot store), so reading any one rating is a
+single random-access member read.
+
+Archives are treated as immutable: a ``RatingArchive`` keeps the zip open and
+its index parsed for as long as the file's stat signature is unchanged.
+Files saved into an archived module later live on disk again and win over
+the archived copy of the same identity.
+
+Layer: core. Stdlib + utils only; thread-safe.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from utils.file_utils import FileUtils
+
+
+ARCHIVE_SUFFIX = ".ratings.zip"
+INDEX_MEMBER = "index.json"
+ARCHIVE_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    member: str  # RatingFiles-relative posix path of the original file
+    module_name: str
+    ezqcid: str
+    rater: str
+    score1: str
+    tag1: str
+
+
+def archive_path(rating_dir: Path, module_name: str) -> Path:
+    return Path(rating_dir) / f"{module_name}{ARCHIVE_SUFFIX}"
+
+
+def find_rating_archives(rating_dir: Path) -> list[Path]:
+    if not rating_dir.exists():
+        return []
+    return sorted(rating_dir.glob(f"*{ARCHIVE_SUFFIX}"))
+
+
+def write_rating_archive(path: Path, module_name: str, members: Iterable[tuple[ArchiveEntry, str]]) -> int:
+    """Atomically write an archive from ``(entry, payload JSON text)`` pairs.
+
+    The archive is written next to ``path`` and renamed into place only once
+    it has been re-opened and checked, so a crash never leaves a partial
+    archive under the final name. Returns the number of rating members.
+    """
+    members = list(members)
+    index = {
+        "version": ARCHIVE_FORMAT_VERSION,
+        "module": module_name,
+        "entries": [asdict(entry) for entry, _ in members],
+    }
+    temp_path = path.with_name(f".{path.name}.tmp.{os.getpid()}")
+    try:
+        with zipfile.ZipFile(temp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(INDEX_MEMBER, FileUtils.json_codec.dumps(index, indent=None))
+            for entry, text in members:
+                archive.writestr(entry.member, text)
+        with zipfile.ZipFile(temp_path) as archive:
+            bad_member = archive.testzip()
+            if bad_member is not None or len(archive.infolist()) != len(members) + 1:
+                raise OSError(f"评分归档校验失败: {bad_member or temp_path}")
+        with open(temp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+    return len(members)
+
+
+class RatingArchive:
+    """Random-access reader over one module archive."""
+
+    _registry: dict[str, "RatingArchive"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._signature: tuple[int, int] | None = None
+        self._zip: zipfile.ZipFile | None = None
+        self._entries: list[ArchiveEntry] = []
+        self._by_identity: dict[tuple[str, str, str], ArchiveEntry] = {}
+
+    @classmethod
+    def for_path(cls, path: str | os.PathLike[str]) -> "RatingArchive":
+        key = os.path.abspath(path)
+        with cls._registry_lock:
+            archive = cls._registry.get(key)
+            if archive is None:
+                archive = cls._registry[key] = cls(key)
+            return archive
+
+    @classmethod
+    def clear_registry(cls) -> None:
+        with cls._registry_lock:
+            archives = list(cls._registry.values())
+            cls._registry.clear()
+        for archive in archives:
+            archive.close()
+
+    @classmethod
+    def release(cls, path: str | os.PathLike[str]) -> None:
+        """Close the cached handle (before replacing or deleting ``path``)."""
+        with cls._registry_lock:
+            archive = cls._registry.pop(os.path.abspath(path), None)
+        if archive is not None:
+            archive.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._zip is not None:
+                self._zip.close()
+            self._zip, self._signature = None, None
+
+    def _open(self) -> zipfile.ZipFile | None:
+        """The open zip, reopened if the archive file changed; None if gone."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._zip is not None:
+                self._zip.close()
+            self._zip, self._signature, self._entries, self._by_identity = None, None, [], {}
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._signature:
+            if self._zip is not None:
+                self._zip.close()
+            self._zip = zipfile.ZipFile(self.path)
+            index = FileUtils.json_codec.loads(self._zip.read(INDEX_MEMBER))
+            self._entries = [ArchiveEntry(**entry) for entry in index["entries"]]
+            self._by_identity = {}
+            for entry in self._entries:
+                self._by_identity.setdefault((entry.module_name, entry.ezqcid, entry.rater), entry)
+            self._signature = signature
+        return self._zip
+
+    def entries(self) -> list[ArchiveEntry]:
+        with self._lock:
+            return list(self._entries) if self._open() is not None else []
+
+    def entry_for(self, module_name: str, ezqcid: str, rater: str) -> ArchiveEntry | None:
+        with self._lock:
+            if self._open() is None:
+                return None
+            return self._by_identity.get((module_name, ezqcid, rater))
+
+    def read(self, member: str) -> bytes:
+        """Raw bytes of one member (a single random-access read)."""
+        with self._lock:
+            archive = self._open()
+            if archive is None:
+                raise FileNotFoundError(self.path)
+            return archive.read(member)
+
+    def read_payload(self, member: str) -> Any:
+        return FileUtils.json_codec.loads(self.read(member))
+
+
+__all__ = [
+    "ARCHIVE_SUFFIX",
+    "ArchiveEntry",
+    "INDEX_MEMBER",
+    "RatingArchive",
+    "archive_path",
+    "find_rating_archives",
+    "write_rating_archive",
+]
@@ -0,0 +1,197 @@
+"""Lazy ``rating_dict``: identities in memory, legacy dicts on demand.
+
+The legacy GUI state is ``{ezqcid: {"<module>-<rater>": legacy dict}}``. Built
+eagerly, every entry is a full ``to_legacy_dict()`` copy (module ``code``
+template and score config included) and ``SessionState`` used to deep-copy
+all of it. ``LazyRatingDict`` keeps the same mapping shape but stores only a
+``RatingRef`` (identity + rating file) per rating:
+
+- ``rating_dict[ezqcid]`` is a live ``SubjectRatings`` view; indexing it
+  materialises that rating's legacy dict through the ``loader`` (the project's
+  ``RatingService.load_rating_ref``) and keeps the most recently used
+  ``cache_size`` of them in an LRU;
+- ``identities(ezqcid)`` answers name/rater questions (the GUI's rating menu)
+  without reading any file;
+- assigning a dict (``rating_dict.setdefault(ezqcid, {})[key] = legacy``) stores
+  it as-is, like the plain dict did, so patches from ``QCTableUpdater`` keep
+  working; ``pop``/``del`` drop the entry without reading it;
+- ``copy()`` copies the references only, so handing the state to the session
+  needs no deep copy.
+
+Materialised dicts are shared while cached: mutating one changes what the next
+lookup returns until it is evicted, then the file wins again.
+
+Layer: core. Standard library only.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator, MutableMapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+
+# Legacy dicts kept materialised per LazyRatingDict.
+DEFAULT_RATING_DICT_CACHE_SIZE = 256
+
+_NO_DEFAULT = object()
+
+
+@dataclass(frozen=True, slots=True)
+class RatingRef:
+    module_name: str
+    ezqcid: str
+    rater: str
+    path: Path | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.module_name}-{self.rater}"
+
+
+RatingRefLoader = Callable[[RatingRef], "dict[str, Any] | None"]
+
+
+class SubjectRatings(MutableMapping):
+    """``rating_dict[ezqcid]``: ``{"<module>-<rater>": legacy dict}``."""
+
+    def __init__(self, owner: LazyRatingDict, ezqcid: str) -> None:
+        self._owner = owner
+        self._ezqcid = ezqcid
+
+    def __getitem__(self, key: str) -> dict[str, Any]:
+        return self._owner._materialise(self._ezqcid, key, self._owner._subjects.get(self._ezqcid, {})[key])
+
+    def __setitem__(self, key: str, value: dict[str, Any]) -> None:
+        self._owner._subjects.setdefault(self._ezqcid, {})[key] = value
+        self._owner._evict(self._ezqcid, key)
+
+    def __delitem__(self, key: str) -> None:
+        del self._owner._subjects.get(self._ezqcid, {})[key]
+        self._owner._evict(self._ezqcid, key)
+
+    def pop(self, key: str, default: Any = _NO_DEFAULT) -> Any:
+        """Remove ``key``; a not yet materialised rating is returned as its
+        ``RatingRef`` instead of being read just to be dropped."""
+        entries = self._owner._subjects.get(self._ezqcid, {})
+        if key not in entries:
+            if default is _NO_DEFAULT:
+                raise KeyError(key)
+            return default
+        entry = entries.pop(key)
+        cached = self._owner._evict(self._ezqcid, key)
+        return cached if cached is not None else entry
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._owner._subjects.get(self._ezqcid, {})))
+
+    def __len__(self) -> int:
+        return len(self._owner._subjects.get(self._ezqcid, {}))
+
+    def __repr__(self) -> str:
+        return f"SubjectRatings({self._ezqcid!r}, keys={list(self)!r})"
+
+
+class LazyRatingDict(MutableMapping):
+    def __init__(
+        self,
+        loader: RatingRefLoader,
+        refs: list[RatingRef] | None = None,
+        cache_size: int = DEFAULT_RATING_DICT_CACHE_SIZE,
+    ) -> None:
+        self.loader = loader
+        self.cache_size = cache_size
+        self._subjects: dict[str, dict[str, RatingRef | dict[str, Any]]] = {}
+        self._cache: OrderedDict[tuple[str, str], dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        for ref in refs or []:
+            self._subjects.setdefault(ref.ezqcid, {})[ref.key] = ref
+
+    # ---- mapping protocol ----
+
+    def __getitem__(self, ezqcid: str) -> SubjectRatings:
+        if ezqcid not in self._subjects:
+            raise KeyError(ezqcid)
+        return SubjectRatings(self, ezqcid)
+
+    def __setitem__(self, ezqcid: str, ratings: Any) -> None:
+        self._drop_cached(ezqcid)
+        self._subjects[ezqcid] = dict(ratings)
+
+    def __delitem__(self, ezqcid: str) -> None:
+        del self._subjects[ezqcid]
+        self._drop_cached(ezqcid)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._subjects))
+
+    def __len__(self) -> int:
+        return len(self._subjects)
+
+    def __contains__(self, ezqcid: object) -> bool:
+        return ezqcid in self._subjects
+
+    def setdefault(self, ezqcid: str, default: Any = None) -> SubjectRatings:
+        """Like ``dict.setdefault`` but always returns the live view, so
+        ``setdefault(ezqcid, {})[key] = value`` lands in this mapping."""
+        if ezqcid not in self._subjects:
+            self[ezqcid] = default or {}
+        return SubjectRatings(self, ezqcid)
+
+    def copy(self) -> LazyRatingDict:
+        """Independent copy of the references; nothing is materialised."""
+        duplicate = LazyRatingDict(self.loader, cache_size=self.cache_size)
+        duplicate._subjects = {
+            ezqcid: {key: dict(entry) if isinstance(entry, dict) else entry for key, entry in entries.items()}
+            for ezqcid, entries in self._subjects.items()
+        }
+        return duplicate
+
+    def __repr__(self) -> str:
+        return f"LazyRatingDict(subjects={len(self._subjects)}, cached={len(self._cache)})"
+
+    # ---- identities without I/O ----
+
+    def identities(self, ezqcid: str) -> list[tuple[str, str, str]]:
+        """``(key, module name, rater)`` of every rating of ``ezqcid``."""
+        identities = []
+        for key, entry in self._subjects.get(ezqcid, {}).items():
+            if isinstance(entry, RatingRef):
+                identities.append((key, entry.module_name, entry.rater))
+            elif isinstance(entry, dict):
+                identities.append((key, entry.get("name"), entry.get("rater")))
+        return identities
+
+    # ---- LRU ----
+
+    def _materialise(self, ezqcid: str, key: str, entry: RatingRef | dict[str, Any]) -> dict[str, Any]:
+        if not isinstance(entry, RatingRef):
+            return entry
+        with self._lock:
+            cached = self._cache.get((ezqcid, key))
+            if cached is not None:
+                self._cache.move_to_end((ezqcid, key))
+                return cached
+        legacy = self.loader(entry)
+        if legacy is None:
+            raise KeyError(f"评分已不存在: {ezqcid}/{key}")
+        with self._lock:
+            self._cache[(ezqcid, key)] = legacy
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return legacy
+
+    def _evict(self, ezqcid: str, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            return self._cache.pop((ezqcid, key), None)
+
+    def _drop_cached(self, ezqcid: str) -> None:
+        with self._lock:
+            for cache_key in [cache_key for cache_key in self._cache if cache_key[0] == ezqcid]:
+                del self._cache[cache_key]
+
+
+__all__ = ["DEFAULT_RATING_DICT_CACHE_SIZE", "LazyRatingDict", "RatingRef", "SubjectRatings"]
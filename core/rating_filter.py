@@ -0,0 +1,102 @@
+"""Selective rating loading: which modules, raters, subjects and how recent.
+
+A ``RatingFilter`` narrows ``RatingService.scan_rating_files`` /
+``load_legacy_state`` / ``aggregate_to_wide`` to a subset of the project.
+It prunes while walking ``RatingFiles/``: excluded ``<module>`` and
+``<rater>`` directories are never entered, and with an ezqcid subset only
+the matching ``<hh>`` shard directories of a sharded layout are. Filenames
+are matched by identity before anything is parsed, and ``modified_since``
+compares file mtimes (one ``stat`` per remaining file), so a reviewer looking
+at one module pays for that module only.
+
+``None`` for a dimension means "no restriction"; ``RatingFilter()`` keeps
+everything.
+
+Layer: core. Stdlib + core rating helpers.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+from core.rater_dir_cache import rating_identity_from_filename
+from core.rating_layout import is_shard_name, shard_name
+from models.rating import Rating
+
+
+def _frozen(values: Iterable[str] | str | None) -> frozenset[str] | None:
+    if values is None:
+        return None
+    if isinstance(values, str):
+        return frozenset([values])
+    return frozenset(str(value) for value in values)
+
+
+@dataclass(frozen=True)
+class RatingFilter:
+    modules: frozenset[str] | None = None
+    raters: frozenset[str] | None = None
+    ezqcids: frozenset[str] | None = None
+    # Epoch seconds (a datetime is converted); files with an older mtime are skipped.
+    modified_since: float | None = None
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "modules", _frozen(self.modules))
+        object.__setattr__(self, "raters", _frozen(self.raters))
+        object.__setattr__(self, "ezqcids", _frozen(self.ezqcids))
+        if isinstance(self.modified_since, datetime):
+            object.__setattr__(self, "modified_since", self.modified_since.timestamp())
+        shards = None if self.ezqcids is None else frozenset(shard_name(ezqcid) for ezqcid in self.ezqcids)
+        object.__setattr__(self, "_shards", shards)
+
+    @property
+    def restricts_identity(self) -> bool:
+        return self.modules is not None or self.raters is not None or self.ezqcids is not None
+
+    def accepts_identity(self, module_name: str, ezqcid: str, rater: str) -> bool:
+        return (
+            (self.modules is None or module_name in self.modules)
+            and (self.raters is None or rater in self.raters)
+            and (self.ezqcids is None or ezqcid in self.ezqcids)
+        )
+
+    def accepts_rating(self, rating: Rating) -> bool:
+        return self.accepts_identity(rating.module_name, rating.ezqcid, rating.rater)
+
+    def accepts_mtime(self, mtime: float) -> bool:
+        return self.modified_since is None or mtime >= self.modified_since
+
+    # ---- directory walk ----
+
+    def accepts_directory(self, depth: int, name: str) -> bool:
+        """Whether to descend into ``name`` found ``depth`` levels below
+        ``RatingFiles/`` (0 = module, 1 = rater, 2 = shard)."""
+        if depth == 0:
+            return self.modules is None or name in self.modules
+        if depth == 1:
+            return self.raters is None or name in self.raters
+        if depth == 2 and self._shards is not None and is_shard_name(name):
+            return name in self._shards
+        return True
+
+    def accepts_filename(self, name: str) -> bool:
+        identity = rating_identity_from_filename(name)
+        if identity is None:
+            # Unparseable names cannot be matched; keep them (to be
+            # quarantined) only when no identity restriction applies.
+            return not self.restricts_identity
+        return self.accepts_identity(*identity)
+
+    def in_scope(self, path: Path, rating_dir: Path) -> bool:
+        """Whether ``path`` lies in the part of the tree this filter walks
+        (``modified_since`` aside)."""
+        parts = path.relative_to(rating_dir).parts
+        return all(self.accepts_directory(depth, name) for depth, name in enumerate(parts[:-1])) and (
+            self.accepts_filename(parts[-1])
+        )
+
+
+__all__ = ["RatingFilter"]
@@ -0,0 +1,290 @@
+"""Persistent incremental rating index (SQLite, stdlib only).
+
+Aggregation used to re-read and re-parse every ``RatingFiles/**/*.json`` on
+every "extract QC results". The index remembers, per rating file, the stat
+signature (``mtime_ns`` + ``size``) it was parsed at and the parsed legacy
+payload. A refresh re-parses only files that were added or changed and drops
+rows for deleted files; everything else is served straight from the index.
+
+The index is a regenerable cache, NOT a storage backend (ADR-004 still holds:
+rating JSON files are the source of truth). It lives under
+``<project>/Cache/`` and a corrupt or schema-mismatched index file is simply
+rebuilt from scratch.
+
+A ``RatingFilter`` is pushed into SQL: modules/raters narrow ``path`` to their
+directory ranges (the primary key) and, for parsed ratings, the indexed
+``module_name``/``rater``/``ezqcid`` columns, so a selective load only reads
+and decodes the rows it asked for.
+
+Layer: core. Depends only on stdlib + models (+ core.rating_ingest records).
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from core.rating_filter import RatingFilter
+from core.rating_ingest import QuarantinedFile
+from models.project import Project
+from models.rating import Rating
+from utils.file_utils import FileUtils
+
+
+INDEX_FILENAME = "rating_index.sqlite3"
+INDEX_SCHEMA_VERSION = 2
+
+# (mtime_ns, size) — the cheap stat signature a row is keyed on besides path.
+StatSignature = tuple[int, int]
+
+
+@dataclass
+class RatingIndexDelta:
+    """What a refresh had to do. Paths are relative to ``RatingFiles/``."""
+
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def parsed(self) -> int:
+        return len(self.added) + len(self.changed)
+
+
+class RatingIndex:
+    """SQLite-backed ``path -> (stat signature, parsed rating)`` index."""
+
+    def __init__(self, project: Project, path: Path | None = None) -> None:
+        self.project = project
+        self.path = Path(path) if path is not None else project.cache_dir / INDEX_FILENAME
+
+    # ---- connection / schema ----
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            self._ensure_schema(conn)
+        except sqlite3.DatabaseError:
+            conn.close()
+            # Regenerable cache: a corrupt file is dropped and rebuilt.
+            self.path.unlink(missing_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._ensure_schema(conn)
+        return conn
+
+    @staticmethod
+    def _ensure_schema(conn: sqlite3.Connection) -> None:
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if row is not None and row[0] != str(INDEX_SCHEMA_VERSION):
+            conn.execute("DROP TABLE IF EXISTS ratings")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ratings (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                valid INTEGER NOT NULL,
+                module_name TEXT,
+                rater TEXT,
+                ezqcid TEXT,
+                payload TEXT,
+                reason TEXT,
+                detail TEXT
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_ratings_identity ON ratings (module_name, rater, ezqcid)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_ratings_ezqcid ON ratings (ezqcid)")
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+            (str(INDEX_SCHEMA_VERSION),),
+        )
+        conn.commit()
+
+    # ---- filter pushdown ----
+
+    @staticmethod
+    def _in(column: str, values: frozenset[str]) -> tuple[str, list[Any]]:
+        return f"{column} IN ({', '.join('?' for _ in values)})", sorted(values)
+
+    @staticmethod
+    def _path_clause(rating_filter: RatingFilter | None) -> tuple[str, list[Any]]:
+        """``path`` ranges of the selected ``<module>/`` or ``<module>/<rater>/``
+        directories (``'/'`` + 1 is ``'0'``), answered from the primary key."""
+        if rating_filter is None or rating_filter.modules is None:
+            return "1", []
+        prefixes = [
+            f"{module}/{rater}/" if rater is not None else f"{module}/"
+            for module in sorted(rating_filter.modules)
+            for rater in (sorted(rating_filter.raters) if rating_filter.raters is not None else [None])
+        ]
+        if not prefixes:
+            return "0", []
+        clause = " OR ".join("(path >= ? AND path < ?)" for _ in prefixes)
+        return f"({clause})", [bound for prefix in prefixes for bound in (prefix, prefix[:-1] + "0")]
+
+    @classmethod
+    def _identity_clause(cls, rating_filter: RatingFilter | None) -> tuple[str, list[Any]]:
+        """The filter on the identity columns of parsed (valid) rows."""
+        clauses, params = [], []
+        if rating_filter is not None:
+            for column, values in (
+                ("module_name", rating_filter.modules),
+                ("rater", rating_filter.raters),
+                ("ezqcid", rating_filter.ezqcids),
+            ):
+                if values is not None:
+                    clause, values_params = cls._in(column, values)
+                    clauses.append(clause)
+                    params.extend(values_params)
+        return (" AND ".join(clauses) or "1"), params
+
+    # ---- refresh ----
+
+    def _relative(self, path: Path) -> str:
+        return path.relative_to(self.project.rating_dir).as_posix()
+
+    @staticmethod
+    def stat_signature(path: Path) -> StatSignature | None:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(
+        self,
+        paths: Iterable[Path],
+        load_valid_ratings: Callable[[list[Path]], list[Rating | QuarantinedFile | None]],
+        rating_filter: RatingFilter | None = None,
+    ) -> RatingIndexDelta:
+        """Bring the index in line with ``paths`` (the current scan result).
+
+        ``load_valid_ratings`` parses + validates a batch of files (in order)
+        and yields a ``QuarantinedFile`` (or ``None``) for files that must not
+        be aggregated; invalid files are remembered as such, with the reason,
+        so they are not re-parsed until they change either.
+
+        ``rating_filter`` marks ``paths`` as a partial scan (a selective load):
+        only indexed rows inside the filter are compared, and only those whose
+        file no longer exists are dropped.
+        """
+        current: dict[str, tuple[Path, StatSignature]] = {}
+        for path in paths:
+            signature = self.stat_signature(path)
+            if signature is not None:
+                current[self._relative(path)] = (path, signature)
+
+        delta = RatingIndexDelta()
+        conn = self._connect()
+        try:
+            path_clause, path_params = self._path_clause(rating_filter)
+            identity_clause, identity_params = self._identity_clause(rating_filter)
+            known = {
+                rel: (mtime_ns, size)
+                for rel, mtime_ns, size in conn.execute(
+                    f"SELECT path, mtime_ns, size FROM ratings WHERE {path_clause} AND (valid = 0 OR {identity_clause})",
+                    path_params + identity_params,
+                )
+            }
+            stale: list[tuple[str, Path, StatSignature]] = []
+            for rel, (path, signature) in current.items():
+                previous = known.get(rel)
+                if previous is None:
+                    delta.added.append(rel)
+                elif previous != signature:
+                    delta.changed.append(rel)
+                else:
+                    delta.unchanged += 1
+                    continue
+                stale.append((rel, path, signature))
+            missing = set(known) - set(current)
+            if rating_filter is not None:
+                rating_dir = self.project.rating_dir
+                missing = {
+                    rel
+                    for rel in missing
+                    if rating_filter.in_scope(rating_dir / rel, rating_dir) and not (rating_dir / rel).exists()
+                }
+            delta.removed = sorted(missing)
+
+            parsed = load_valid_ratings([path for _, path, _ in stale])
+            rows = [
+                self._row(rel, path, signature, rating)
+                for (rel, path, signature), rating in zip(stale, parsed)
+            ]
+            with conn:
+                conn.executemany("DELETE FROM ratings WHERE path = ?", [(rel,) for rel in delta.removed])
+                conn.executemany("INSERT OR REPLACE INTO ratings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        finally:
+            conn.close()
+        return delta
+
+    @staticmethod
+    def _row(rel: str, path: Path, signature: StatSignature, rating: Rating | QuarantinedFile | None) -> tuple:
+        if not isinstance(rating, Rating):
+            reason, detail = (rating.reason, rating.detail) if rating is not None else (None, None)
+            return (rel, signature[0], signature[1], 0, None, None, None, None, reason, detail)
+        payload = FileUtils.json_codec.dumps(rating.legacy_payload, indent=None)
+        return (rel, signature[0], signature[1], 1, rating.module_name, rating.rater, rating.ezqcid, payload, None, None)
+
+    # ---- read ----
+
+    def records(
+        self,
+        selected: set[Path] | None = None,
+        rating_filter: RatingFilter | None = None,
+    ) -> list[tuple[Rating, Path]]:
+        """Valid indexed ratings in scan (sorted path) order; only those at
+        ``selected`` paths and matching ``rating_filter`` when given."""
+        path_clause, path_params = self._path_clause(rating_filter)
+        identity_clause, identity_params = self._identity_clause(rating_filter)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT path, payload FROM ratings WHERE valid = 1 AND {path_clause} AND {identity_clause}",
+                path_params + identity_params,
+            ).fetchall()
+        finally:
+            conn.close()
+        rating_dir = self.project.rating_dir
+        records = [(rating_dir / rel, payload) for rel, payload in rows]
+        if selected is not None:
+            records = [(path, payload) for path, payload in records if path in selected]
+        records.sort(key=lambda item: item[0])
+        loads = FileUtils.json_codec.loads
+        return [(Rating.from_legacy_dict(loads(payload)), path) for path, payload in records]
+
+    def quarantined(
+        self,
+        selected: set[Path] | None = None,
+        rating_filter: RatingFilter | None = None,
+    ) -> list[QuarantinedFile]:
+        """Indexed files that are not aggregated, with the recorded reason."""
+        path_clause, path_params = self._path_clause(rating_filter)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT path, reason, detail FROM ratings WHERE valid = 0 AND {path_clause} ORDER BY path",
+                path_params,
+            ).fetchall()
+        finally:
+            conn.close()
+        rating_dir = self.project.rating_dir
+        return [
+            QuarantinedFile(rating_dir / rel, reason or "", detail or "")
+            for rel, reason, detail in rows
+            if selected is None or rating_dir / rel in selected
+        ]
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+__all__ = ["INDEX_FILENAME", "RatingIndex", "RatingIndexDelta"]
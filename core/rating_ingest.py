@@ -0,0 +1,75 @@
+"""Quarantine records and the ingest report of a rating load.
+
+``RatingService.ingest_rating_file`` parses every rating file exactly once and
+either returns the ``Rating`` or a ``QuarantinedFile`` saying why the file is
+left out of aggregation. Quarantine is a list, not a directory: the files stay
+where they are (ADR-004, rating JSON files are the source of truth), the list
+only explains why ratings "disappear" from the QC table.
+
+``IngestReport`` is what one ``load_all_rating_records`` pass did (counts,
+per-stage wall-clock timings, offenders); ``load_legacy_state`` hands it on as
+``LoadedRatingsState.ingest_report``.
+
+Layer: core. Stdlib only.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+
+# Quarantine reasons, in the order the checks run.
+REASON_BAD_FILENAME = "bad_filename"  # not <module>._.<ezqcid>._.<rater>[...].json
+REASON_LOCATION_MISMATCH = "location_mismatch"  # filename module/rater vs. its directory
+REASON_UNREADABLE = "unreadable"  # I/O error or not JSON
+REASON_INVALID_PAYLOAD = "invalid_payload"  # JSON, but not a rating payload
+REASON_IDENTITY_MISMATCH = "identity_mismatch"  # payload module/ezqcid/rater vs. filename
+
+
+@dataclass(frozen=True)
+class QuarantinedFile:
+    path: Path
+    reason: str
+    detail: str = ""
+
+
+@dataclass
+class IngestReport:
+    scanned: int = 0  # rating files found on disk
+    parsed: int = 0  # files parsed by this load (index mode: added/changed only)
+    archived: int = 0  # ratings served from module archives
+    loaded: int = 0  # ratings handed to aggregation
+    quarantined: list[QuarantinedFile] = field(default_factory=list)
+    timings: dict[str, float] = field(default_factory=dict)  # stage -> seconds
+
+    @property
+    def reason_counts(self) -> dict[str, int]:
+        return dict(Counter(item.reason for item in self.quarantined))
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serialisable form (for logs and diagnostics exports)."""
+        return {
+            "scanned": self.scanned,
+            "parsed": self.parsed,
+            "archived": self.archived,
+            "loaded": self.loaded,
+            "quarantined": [
+                {"path": str(item.path), "reason": item.reason, "detail": item.detail} for item in self.quarantined
+            ],
+            "reason_counts": self.reason_counts,
+            "timings": dict(self.timings),
+        }
+
+
+__all__ = [
+    "IngestReport",
+    "QuarantinedFile",
+    "REASON_BAD_FILENAME",
+    "REASON_IDENTITY_MISMATCH",
+    "REASON_INVALID_PAYLOAD",
+    "REASON_LOCATION_MISMATCH",
+    "REASON_UNREADABLE",
+]
@@ -0,0 +1,269 @@
+"""Append-only per-rater rating journal (alternative save backend).
+
+A legacy save rewrites ``<module>._.<ezqcid>._.<rater>._.<score1>._.<tag1>.json``
+through a temp file + fsync + rename and then unlinks the previous name
+(score1/tag1 live in the filename) — several metadata round trips per click,
+which is slow on network filesystems. With the journal backend a save is ONE
+fsync'd append of the rating payload to ``RatingFiles/<module>/<rater>/.journal.jsonl``.
+
+Readers overlay the journal onto the per-subject files, last writer wins per
+ezqcid. ``RatingService.compact_rater_journal`` periodically materialises the
+pending entries as ordinary rating files and drops them from the journal, so
+tools that only understand the legacy layout keep working after compaction.
+
+The journal is a dotfile and not ``*.json``, so directory scans, the rater
+directory listing cache and filename parsers never mistake it for a rating.
+A torn last line (crash mid-append) is ignored by readers and cut off by the
+next append.
+
+Several processes may write one rater directory (the GUI and a right-click
+review subprocess), so appends and the compaction rewrite are serialised
+across processes by ``flock`` on ``.journal.lock`` (``locked()``), and at most
+one compaction runs per journal (``compaction()``, on ``.journal.compacting``).
+Without ``fcntl`` (Windows) both are process-local.
+
+Layer: core. Stdlib + models only; thread- and process-safe.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+from models.module_snapshot import expand_rating_payload
+from utils.file_utils import FileUtils
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+JOURNAL_FILENAME = ".journal.jsonl"
+JOURNAL_LOCK_FILENAME = ".journal.lock"
+JOURNAL_COMPACTION_LOCK_FILENAME = ".journal.compacting"
+
+# Pending entries after which a save schedules a background compaction.
+DEFAULT_COMPACT_AFTER = 200
+
+
+@dataclass(frozen=True)
+class JournalSnapshot:
+    """Latest pending payload per ezqcid plus how far the journal was read."""
+
+    entries: dict[str, dict[str, Any]]
+    offset: int
+    inode: int | None
+
+
+class RatingJournal:
+    """The journal of one ``RatingFiles/<module>/<rater>/`` directory."""
+
+    _registry: dict[str, "RatingJournal"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        self.directory = Path(directory)
+        self.path = self.directory / JOURNAL_FILENAME
+        self._lock = threading.RLock()
+        self._inode: int | None = None
+        self._offset = 0
+        self._lines = 0
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._lock_depth = 0
+        self._lock_file: Any = None
+        self._compaction_lock = threading.Lock()
+
+    @classmethod
+    def for_directory(cls, directory: str | os.PathLike[str]) -> "RatingJournal":
+        """The process-wide shared journal for ``directory``."""
+        key = os.path.abspath(directory)
+        with cls._registry_lock:
+            journal = cls._registry.get(key)
+            if journal is None:
+                journal = cls._registry[key] = cls(key)
+            return journal
+
+    @classmethod
+    def clear_registry(cls) -> None:
+        with cls._registry_lock:
+            cls._registry.clear()
+
+    # ---- locking ----
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Exclusive access to the journal file for this thread and, through
+        ``flock``, against other processes. Re-entrant within a thread."""
+        with self._lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._lock_file = open(self.directory / JOURNAL_LOCK_FILENAME, "a")
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    @property
+    def compacting(self) -> bool:
+        """Whether this process is compacting the journal right now."""
+        return self._compaction_lock.locked()
+
+    @contextmanager
+    def compaction(self, wait: bool = True) -> Iterator[bool]:
+        """Hold the journal's compaction slot; yields False (without waiting)
+        when ``wait`` is off and another thread or process holds it."""
+        if not self._compaction_lock.acquire(blocking=wait):
+            yield False
+            return
+        lock_file = None
+        try:
+            if fcntl is not None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                lock_file = open(self.directory / JOURNAL_COMPACTION_LOCK_FILENAME, "a")
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    yield False
+                    return
+            yield True
+        finally:
+            if lock_file is not None:
+                lock_file.close()  # closing releases the flock
+            self._compaction_lock.release()
+
+    # ---- write ----
+
+    def append(self, payload: dict[str, Any]) -> None:
+        """Durably append one rating payload (single write + fsync).
+
+        A torn last line left by a crash mid-append is cut off first, so the
+        new line does not get glued onto it and skipped by readers.
+        """
+        line = (FileUtils.json_codec.dumps(payload, indent=None) + "\n").encode("utf-8")
+        with self.locked():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a+b") as f:
+                end = f.seek(0, os.SEEK_END)
+                complete = self._complete_length(f, end)
+                if complete < end:
+                    f.truncate(complete)
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    @staticmethod
+    def _complete_length(f: Any, end: int, block: int = 4096) -> int:
+        """Length of ``f`` up to and including its last newline."""
+        position = end
+        while position > 0:
+            start = max(0, position - block)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+        return 0
+
+    # ---- read ----
+
+    def _refresh(self) -> None:
+        """Fold newly appended lines into the view; reread after compaction
+        replaced the file (new inode) or it shrank."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._inode, self._offset, self._lines, self._entries = None, 0, 0, {}
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._inode, self._offset, self._lines, self._entries = stat.st_ino, 0, 0, {}
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        for raw in complete.splitlines():
+            if not raw.strip():
+                continue
+            try:
+                payload = FileUtils.json_codec.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(payload, dict) and "ezqcid" in payload:
+                self._entries[str(payload["ezqcid"])] = payload
+                self._lines += 1
+        self._offset += len(complete)
+
+    def snapshot(self) -> JournalSnapshot:
+        with self._lock:
+            self._refresh()
+            return JournalSnapshot(dict(self._entries), self._offset, self._inode)
+
+    def pending(self) -> dict[str, dict[str, Any]]:
+        """``{ezqcid: legacy payload}`` of every pending (uncompacted) entry."""
+        entries = self.snapshot().entries
+        return {ezqcid: expand_rating_payload(payload, self.path) for ezqcid, payload in entries.items()}
+
+    def latest(self, ezqcid: str) -> dict[str, Any] | None:
+        """Legacy payload of the newest pending entry for ``ezqcid``."""
+        payload = self.snapshot().entries.get(str(ezqcid))
+        return None if payload is None else expand_rating_payload(payload, self.path)
+
+    @property
+    def entry_count(self) -> int:
+        """Appended lines since the last compaction (not distinct subjects)."""
+        with self._lock:
+            self._refresh()
+            return self._lines
+
+    # ---- compaction ----
+
+    def discard_through(self, snapshot: JournalSnapshot) -> None:
+        """Drop everything ``snapshot`` covered, keeping later appends.
+
+        The journal is always replaced (new inode) rather than truncated so
+        other readers notice and reread from scratch. The tail is read and
+        written back under ``locked()``, so no append from any process can
+        land in between and be lost.
+        """
+        with self.locked():
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return
+            if stat.st_ino != snapshot.inode:
+                return
+            with open(self.path, "rb") as f:
+                f.seek(snapshot.offset)
+                tail = f.read().decode("utf-8")
+            FileUtils.atomic_write(self.path, tail)
+            self._inode, self._offset, self._lines, self._entries = None, 0, 0, {}
+
+
+def find_rating_journals(rating_dir: Path) -> list[Path]:
+    """Every ``<module>/<rater>/.journal.jsonl`` under ``rating_dir``."""
+    if not rating_dir.exists():
+        return []
+    return sorted(rating_dir.glob(f"*/*/{JOURNAL_FILENAME}"))
+
+
+__all__ = [
+    "DEFAULT_COMPACT_AFTER",
+    "JOURNAL_COMPACTION_LOCK_FILENAME",
+    "JOURNAL_FILENAME",
+    "JOURNAL_LOCK_FILENAME",
+    "JournalSnapshot",
+    "RatingJournal",
+    "find_rating_journals",
+]
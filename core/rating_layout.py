@@ -0,0 +1,54 @@
+"""Rating file layouts under ``RatingFiles/<module>/<rater>/``.
+
+``flat`` (legacy): every rating file sits directly in the rater directory.
+``sharded``: files live in ``<rater>/<hh>/`` where ``hh`` is the first two hex
+digits of the md5 of the ezqcid, so a rater directory holds at most 256
+subdirectories and one identity lookup lists only its own small shard.
+
+Both layouts may coexist in one rater directory (e.g. mid-migration); readers
+always look in the flat directory AND the identity's shard.
+
+Layer: core. Stdlib + models only.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import string
+from pathlib import Path
+
+from core.rater_dir_cache import rating_identity_from_filename
+from models.storage import RATING_LAYOUT_SHARDED, RATING_LAYOUTS
+
+
+SHARD_WIDTH = 2
+
+
+def shard_name(ezqcid: str) -> str:
+    """The shard directory name of ``ezqcid`` (stable across platforms)."""
+    return hashlib.md5(str(ezqcid).encode("utf-8")).hexdigest()[:SHARD_WIDTH]
+
+
+def is_shard_name(name: str) -> bool:
+    return len(name) == SHARD_WIDTH and all(char in string.hexdigits[:16] for char in name)
+
+
+def rating_write_dir(rater_dir: Path, ezqcid: str, layout: str) -> Path:
+    """Directory a rating of ``ezqcid`` is written to under ``layout``."""
+    if layout not in RATING_LAYOUTS:
+        raise ValueError(f"未知的评分目录布局: {layout}")
+    if layout == RATING_LAYOUT_SHARDED:
+        return Path(rater_dir) / shard_name(ezqcid)
+    return Path(rater_dir)
+
+
+def rater_dir_of(path: Path) -> Path:
+    """The ``<module>/<rater>`` directory of a rating file in either layout."""
+    parent = path.parent
+    identity = rating_identity_from_filename(path.name)
+    if identity is not None and parent.name != identity[2] and parent.name == shard_name(identity[1]):
+        return parent.parent
+    return parent
+
+
+__all__ = ["SHARD_WIDTH", "is_shard_name", "rater_dir_of", "rating_write_dir", "shard_name"]
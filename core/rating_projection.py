@@ -0,0 +1,71 @@
+"""Column projection: which rating fields reach the QC wide table.
+
+Without a projection every flattened legacy field of every rating (label,
+interper, watch_mode, showing, button, filepath, ...) becomes a
+``<module>.<rater>.<field>`` column of ``ezqc_qctable``. A ``RatingProjection``
+lists the fields to keep; it is applied while the long table is built
+(``RatingService.flat_record_columns``), so the other fields are never
+materialised as columns at all.
+
+A spec is a list of entries, each one of:
+
+- a group name: ``scores`` (``score1``, ``score2``...), ``tags`` (``tag1``...),
+  ``notes`` (``notes``, ``notes1``...);
+- a field name, e.g. ``time`` or ``score1label``;
+- an ``fnmatch`` pattern, e.g. ``score*label``; ``*`` keeps every field.
+
+``ezqcid``, ``module_name`` and ``rater`` are always kept (they are the pivot
+keys). Per project the spec is ``settings["storage"]["qctable_fields"]``
+(``StorageConfig.qctable_fields``); the aggregation entry points also take a
+per-call ``projection=`` that overrides it.
+
+Layer: core. Stdlib only.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import re
+from dataclasses import dataclass
+from typing import Iterable
+
+
+FIELD_GROUPS = {
+    "scores": r"score\d+",
+    "tags": r"tag\d+",
+    "notes": r"notes\d*",
+}
+
+_PIVOT_KEYS = frozenset({"ezqcid", "module_name", "rater"})
+
+
+@dataclass(frozen=True)
+class RatingProjection:
+    fields: tuple[str, ...]
+
+    def __post_init__(self) -> None:
+        if isinstance(self.fields, str):
+            object.__setattr__(self, "fields", (self.fields,))
+        fields = tuple(str(entry).strip() for entry in self.fields)
+        if not fields or not all(fields):
+            raise ValueError("列投影不能为空，至少列出一个评分字段")
+        object.__setattr__(self, "fields", fields)
+        patterns = [FIELD_GROUPS.get(entry) or fnmatch.translate(entry) for entry in fields]
+        object.__setattr__(self, "_pattern", re.compile("|".join(f"(?:{pattern})" for pattern in patterns)))
+        object.__setattr__(self, "_decisions", {})
+
+    @classmethod
+    def from_spec(cls, spec: RatingProjection | Iterable[str] | str | None) -> RatingProjection | None:
+        if spec is None or isinstance(spec, RatingProjection):
+            return spec
+        return cls(tuple([spec] if isinstance(spec, str) else spec))
+
+    def accepts(self, field: str) -> bool:
+        """Whether ``field`` (a flattened rating key) is pivoted."""
+        decision = self._decisions.get(field)
+        if decision is None:
+            decision = self._decisions[field] = field in _PIVOT_KEYS or self._pattern.fullmatch(field) is not None
+        return decision
+
+
+__all__ = ["FIELD_GROUPS", "RatingProjection"]
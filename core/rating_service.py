@@ -1,30 +1,146 @@
 from __future__ import annotations
 
+import os
 import re
-from dataclasses import dataclass
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
+from core.integrity_manifest import RATING_MANIFEST_FILENAME, IntegrityManifest, IntegrityReport
+from core.rater_dir_cache import RaterDirListing, rating_identity_from_filename
+from core.rating_archive import (
+    ARCHIVE_SUFFIX,
+    ArchiveEntry,
+    RatingArchive,
+    archive_path,
+    find_rating_archives,
+    write_rating_archive,
+)
+from core.rating_dict_view import LazyRatingDict, RatingRef
+from core.rating_filter import RatingFilter
+from core.rating_index import RatingIndex, RatingIndexDelta
+from core.rating_ingest import (
+    REASON_BAD_FILENAME,
+    REASON_IDENTITY_MISMATCH,
+    REASON_INVALID_PAYLOAD,
+    REASON_LOCATION_MISMATCH,
+    REASON_UNREADABLE,
+    IngestReport,
+    QuarantinedFile,
+)
+from core.rating_journal import (
+    JOURNAL_COMPACTION_LOCK_FILENAME,
+    JOURNAL_FILENAME,
+    JOURNAL_LOCK_FILENAME,
+    RatingJournal,
+    find_rating_journals,
+)
+from core.rating_layout import is_shard_name, rater_dir_of, rating_write_dir, shard_name
+from core.rating_projection import RatingProjection
+from core.rating_sync import SyncReport, build_rating_manifest, plan_rating_sync
+from core.rating_summary_index import SUMMARY_INDEX_FILENAME, RaterSummaryIndex, RatingSummary
+from core.sqlite_export import SQLiteExportReport
+from core.table_service import TableService
+from models.module_snapshot import SNAPSHOT_DIRNAME, ModuleSnapshotStore, expand_rating_payload, is_compact_payload
 from models.project import Project
 from models.qcmodule import QCModule
 from models.rating import Rating
-from utils.file_utils import FileUtils
+from models.schema import stamp_schema_version
+from models.storage import RATING_BACKEND_FILES, StorageConfig
+from utils.file_utils import DURABILITY_BATCHED, FileUtils
+from utils.logger import log_exception, log_warning
+
+
+# Default pool size for the GUI aggregation path. Rating ingestion is
+# open/read latency bound (NFS project dirs), so a small thread pool hides the
+# round trips; JSON parsing itself stays GIL-bound.
+DEFAULT_INGEST_WORKERS = 8
+
+# Regenerable per-rater dotfiles that never hold a rating of their own.
+_SIDECAR_FILENAMES = frozenset(
+    {JOURNAL_FILENAME, JOURNAL_LOCK_FILENAME, JOURNAL_COMPACTION_LOCK_FILENAME, SUMMARY_INDEX_FILENAME}
+)
 
 
 @dataclass
 class LoadedRatingsState:
     ratings: list[Rating]
-    rating_dict: dict[str, dict[str, dict[str, Any]]]
+    rating_dict: dict[str, dict[str, dict[str, Any]]] | LazyRatingDict
     qctable: pd.DataFrame
     original_table: pd.DataFrame
     original_wide_table: pd.DataFrame
+    # What the load did: counts, stage timings, quarantined files + reasons.
+    ingest_report: IngestReport | None = None
+
+
+# Placeholder for "this rating has no such field" in the columnar long-table
+# builder; becomes NaN, exactly like the reindexing pd.concat used to do.
+MISSING = object()
+_LONG_COLUMN_DTYPES: dict[tuple[frozenset[type], bool], Any] = {}
+
+
+def _long_column(values: list[Any]) -> pd.Series:
+    """Materialise one long-table column with the dtype ``pd.concat`` of
+    one-row DataFrames would have given it.
+
+    That dtype depends only on which Python value types occur and on whether
+    any row lacks the field (e.g. ints + an explicit None stay object, ints +
+    a missing row become float64). It is resolved once per type signature by
+    concatenating one representative row per type, which keeps the CSV output
+    byte-identical to the old per-rating concat.
+    """
+    samples: dict[type, Any] = {}
+    missing = False
+    for value in values:
+        if value is MISSING:
+            missing = True
+        elif type(value) not in samples:
+            samples[type(value)] = value
+    dtype = long_column_dtype(samples, missing)
+    column = pd.Series([np.nan if value is MISSING else value for value in values], dtype=object)
+    return column if dtype == object else column.astype(dtype)
+
+
+def long_column_dtype(samples: dict[type, Any], missing: bool) -> Any:
+    """dtype of a long-table column holding one sample value per Python type
+    in ``samples`` (plus rows without the field when ``missing``)."""
+    key = (frozenset(samples), missing)
+    dtype = _LONG_COLUMN_DTYPES.get(key)
+    if dtype is None:
+        frames = [pd.DataFrame([{"value": sample}]) for sample in samples.values()]
+        if missing:
+            frames.append(pd.DataFrame([{"other": None}]))
+        dtype = _LONG_COLUMN_DTYPES[key] = pd.concat(frames, ignore_index=True)["value"].dtype
+    return dtype
 
 
 class RatingService:
-    def __init__(self, project_or_service: Project | Any) -> None:
+    def __init__(
+        self,
+        project_or_service: Project | Any,
+        use_index: bool = False,
+        workers: int | None = None,
+    ) -> None:
         self.project_or_service = project_or_service
+        # Opt-in persistent rating index (core.rating_index). When enabled,
+        # load_all_rating_records re-parses only added/changed files.
+        self.use_index = use_index
+        # Default ingestion pool size; None / 1 means sequential. Every
+        # aggregation entry point also accepts a per-call ``workers=``.
+        self.workers = workers
+        self.last_index_delta: RatingIndexDelta | None = None
+        self.last_ingest_report: IngestReport | None = None
+
+    def for_project(self, project: Project) -> "RatingService":
+        """A service bound to ``project`` with the same loading options."""
+        return self.__class__(project, use_index=self.use_index, workers=self.workers)
 
     @property
     def project(self) -> Project:
@@ -35,36 +151,93 @@ class RatingService:
             raise ValueError("当前项目未加载")
         return current
 
-    def scan_rating_files(self) -> list[Path]:
-        rating_dir = self.project.rating_dir
+    @property
+    def storage_config(self) -> StorageConfig:
+        """Storage options of the current project (``settings["storage"]``)."""
+        settings = getattr(self.project_or_service, "settings", None)
+        if settings is not None and not isinstance(self.project_or_service, Project):
+            return StorageConfig.from_settings(settings)
+        return StorageConfig.for_project(self.project)
+
+    def scan_rating_files(self, rating_filter: RatingFilter | None = None) -> list[Path]:
+        return self.scan_rating_tree(self.project.rating_dir, rating_filter)
+
+    @staticmethod
+    def scan_rating_tree(rating_dir: Path, rating_filter: RatingFilter | None = None) -> list[Path]:
+        """Sorted rating ``*.json`` files under ``rating_dir`` (any depth).
+
+        With ``rating_filter`` only the matching ``<module>/<rater>`` (and
+        shard) directories are walked.
+        """
         if not rating_dir.exists():
             return []
-        return sorted(rating_dir.rglob("*.json"))
+        paths: list[Path] = []
+        for root, dirnames, filenames in os.walk(rating_dir):
+            # Dot-entries (snapshot store, journals, summary index) hold no ratings.
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            names = [name for name in filenames if name.endswith(".json") and not name.startswith(".")]
+            if rating_filter is not None:
+                depth = len(Path(root).relative_to(rating_dir).parts)
+                dirnames[:] = [name for name in dirnames if rating_filter.accepts_directory(depth, name)]
+                names = [name for name in names if rating_filter.accepts_filename(name)]
+                if rating_filter.modified_since is not None:
+                    names = [
+                        name for name in names if rating_filter.accepts_mtime(os.stat(os.path.join(root, name)).st_mtime)
+                    ]
+            paths.extend(Path(root) / name for name in names)
+        return sorted(paths)
 
     def validate_rating_file(self, path: Path) -> bool:
+        return isinstance(self.ingest_rating_file(path), Rating)
+
+    def ingest_rating_file(self, path: Path) -> Rating | QuarantinedFile:
+        """Parse ``path`` exactly once and check it is a rating of the
+        module/rater directory it sits in; otherwise say why not."""
+        if len(path.name.replace(".json", "").split("._.")) < 3:
+            return QuarantinedFile(path, REASON_BAD_FILENAME, "文件名不是 <module>._.<ezqcid>._.<rater> 格式")
+        identity = self.path_rating_identity(path)
+        if identity is None:
+            rater_dir = rater_dir_of(path)
+            return QuarantinedFile(
+                path, REASON_LOCATION_MISMATCH, f"文件名与目录 {rater_dir.parent.name}/{rater_dir.name} 不一致"
+            )
+        try:
+            data = FileUtils.safe_json_load(path)
+        except (OSError, ValueError) as exc:
+            return QuarantinedFile(path, REASON_UNREADABLE, str(exc))
+        try:
+            rating = Rating.from_legacy_dict(expand_rating_payload(data, path))
+        except Exception as exc:
+            return QuarantinedFile(path, REASON_INVALID_PAYLOAD, f"{type(exc).__name__}: {exc}")
+        payload_identity = (rating.module_name, rating.ezqcid, rating.rater)
+        if payload_identity != identity:
+            return QuarantinedFile(
+                path, REASON_IDENTITY_MISMATCH, f"内容为 {'/'.join(payload_identity)}，文件名为 {'/'.join(identity)}"
+            )
+        return rating
+
+    @staticmethod
+    def path_rating_identity(path: Path) -> tuple[str, str, str] | None:
+        """``(module, ezqcid, rater)`` of ``path`` when its filename agrees
+        with the rater directory it sits in, else None."""
         parts = path.name.replace(".json", "").split("._.")
         if len(parts) < 3:
-            return False
+            return None
 
         file_module = parts[0]
         file_ezqcid = parts[1]
         file_rater = parts[2]
-        dir_rater = path.parent.name
-        dir_module = path.parent.parent.name
-
-        if file_module != dir_module or file_rater != dir_rater:
-            return False
-
-        try:
-            rating = Rating.from_json_file(path)
-        except Exception:
-            return False
+        # Flat or sharded (<rater>/<hh>/) layout.
+        rater_dir = rater_dir_of(path)
+        if file_module != rater_dir.parent.name or file_rater != rater_dir.name:
+            return None
+        return file_module, file_ezqcid, file_rater
 
-        return (
-            rating.module_name == dir_module
-            and rating.rater == dir_rater
-            and rating.ezqcid == file_ezqcid
-        )
+    @staticmethod
+    def rating_matches_path(rating: Rating, path: Path) -> bool:
+        """The identity checks of ``validate_rating_file`` for an already
+        parsed rating (e.g. an archive member at its original path)."""
+        return RatingService.path_rating_identity(path) == (rating.module_name, rating.ezqcid, rating.rater)
 
     def load_rating(self, path: Path) -> Rating:
         return Rating.from_json_file(path)
@@ -76,8 +249,170 @@ class RatingService:
         ezqcid: str,
         rater: str,
     ) -> list[Path]:
-        prefix = f"{module_name}._.{ezqcid}._.{rater}"
-        return sorted(target_dir.glob(f"{prefix}*"))
+        """Rating files of one identity in the flat directory and in the
+        identity's shard (both layouts may coexist), sorted by name."""
+        target_dir = Path(target_dir)
+        files = [
+            directory / path.name
+            for directory in (target_dir, target_dir / shard_name(ezqcid))
+            for path in RaterDirListing.for_directory(directory).files_for(module_name, ezqcid, rater)
+        ]
+        return sorted(files, key=lambda path: path.name)
+
+    @staticmethod
+    def parse_rating_filename(name: str) -> tuple[str, str, str, str, str] | None:
+        """Split ``<module>._.<ezqcid>._.<rater>._.<score1>._.<tag1>.json``.
+
+        Returns ``(module, ezqcid, rater, score1, tag1)`` as the raw filename
+        strings (``str()`` of the values at save time), or None when the name
+        does not carry score1/tag1.
+        """
+        if not name.endswith(".json"):
+            return None
+        parts = name[: -len(".json")].split("._.")
+        if len(parts) < 5:
+            return None
+        return parts[0], "._.".join(parts[1:-3]), parts[-3], parts[-2], parts[-1]
+
+    @staticmethod
+    def list_rater_dir_ratings(
+        target_dir: Path,
+        module_name: str,
+        rater: str,
+    ) -> dict[str, tuple[str, str, Path]]:
+        """``{ezqcid: (score1, tag1, path)}`` from ONE listing of a rater dir.
+
+        Filename-only: no JSON is parsed. When an identity has several files
+        the first in sorted order wins, matching
+        ``find_rating_files_in_rater_dir(...)[0]``.
+        """
+        target_dir = Path(target_dir)
+        listing = RaterDirListing.for_directory(target_dir)
+        entries = [(name, target_dir) for name in listing.names()]
+        for shard in listing.subdirectories():
+            if is_shard_name(shard):
+                entries.extend((name, target_dir / shard) for name in RaterDirListing.for_directory(target_dir / shard).names())
+        entries.sort()
+
+        # Stable (identity-only) names carry no score1/tag1: serve those from
+        # the rater dir's summary index, parsing only new or changed files.
+        stable = {
+            (directory / name).relative_to(target_dir).as_posix(): identity
+            for name, directory in entries
+            if RatingService.parse_rating_filename(name) is None
+            and (identity := rating_identity_from_filename(name)) is not None
+        }
+        stable_summaries = (
+            RaterSummaryIndex.for_directory(target_dir).summaries(stable, RatingService.read_rating_summary)
+            if stable
+            else {}
+        )
+
+        summaries: dict[str, tuple[str, str, Path]] = {}
+        for name, directory in entries:
+            parsed = RatingService.parse_rating_filename(name)
+            if parsed is None:
+                relative_name = (directory / name).relative_to(target_dir).as_posix()
+                if relative_name not in stable_summaries:
+                    continue
+                file_module, ezqcid, file_rater = stable[relative_name]
+                score1, tag1 = stable_summaries[relative_name]
+            else:
+                file_module, ezqcid, file_rater, score1, tag1 = parsed
+            if file_module == module_name and file_rater == rater and ezqcid not in summaries:
+                summaries[ezqcid] = (score1, tag1, directory / name)
+
+        # Identities of an archived module not re-saved since come from the
+        # archive's central index; no member is read.
+        rating_dir = target_dir.parent.parent
+        for entry in RatingArchive.for_path(archive_path(rating_dir, module_name)).entries():
+            if entry.module_name == module_name and entry.rater == rater and entry.ezqcid not in summaries:
+                summaries[entry.ezqcid] = (entry.score1, entry.tag1, rating_dir / entry.member)
+
+        journal = RatingJournal.for_directory(target_dir)
+        for ezqcid, payload in journal.pending().items():
+            rating = RatingService.pending_journal_rating(Path(target_dir), payload)
+            if rating is not None and rating.module_name == module_name and rating.rater == rater:
+                score1, tag1 = rating.filename_summary
+                summaries[ezqcid] = (score1, tag1, journal.path)
+        return summaries
+
+    @staticmethod
+    def read_rating_summary(path: Path) -> RatingSummary | None:
+        """(score1, tag1) of a rating file by parsing it; None if unreadable."""
+        try:
+            return Rating.from_json_file(path).filename_summary
+        except Exception:
+            return None
+
+    @staticmethod
+    def pending_journal_rating(target_dir: Path, payload: dict[str, Any]) -> Rating | None:
+        """Rating of a journal entry, or None when it does not belong to
+        ``target_dir`` (the same identity checks ``validate_rating_file``
+        applies to files)."""
+        try:
+            rating = Rating.from_legacy_dict(payload)
+        except Exception:
+            return None
+        if rating.module_name != target_dir.parent.name or rating.rater != target_dir.name:
+            return None
+        return rating
+
+    @staticmethod
+    def load_pending_rater_dir_rating(
+        target_dir: Path,
+        module_name: str,
+        ezqcid: str,
+        rater: str,
+    ) -> tuple[Path, dict[str, Any]] | None:
+        """``(journal path, legacy payload)`` when the journal holds a newer,
+        not yet compacted save of this identity."""
+        journal = RatingJournal.for_directory(target_dir)
+        payload = journal.latest(ezqcid)
+        if payload is None:
+            return None
+        rating = RatingService.pending_journal_rating(Path(target_dir), payload)
+        if rating is None or rating.module_name != module_name or rating.rater != rater:
+            return None
+        return journal.path, rating.to_legacy_dict()
+
+    @staticmethod
+    def load_archived_rater_dir_rating(
+        target_dir: Path,
+        module_name: str,
+        ezqcid: str,
+        rater: str,
+    ) -> tuple[Path, dict[str, Any]] | None:
+        """``(original path, legacy payload)`` of this identity in the
+        module's archive: one random-access member read, no extraction."""
+        rating_dir = Path(target_dir).parent.parent
+        archive = RatingArchive.for_path(archive_path(rating_dir, module_name))
+        entry = archive.entry_for(module_name, ezqcid, rater)
+        if entry is None:
+            return None
+        return rating_dir / entry.member, archive.read_payload(entry.member)
+
+    def resolve_current_rating(self, module_name: str, ezqcid: str, rater: str) -> tuple[Rating, Path] | None:
+        """The rating a full load would aggregate for one identity, with the
+        path it would report: pending journal entry, else rating file, else
+        module archive; None when the identity has no rating."""
+        target_dir = self.project.rating_dir / module_name / rater
+        pending = self.load_pending_rater_dir_rating(target_dir, module_name, ezqcid, rater)
+        if pending is not None:
+            storage = self.storage_config
+            rating = Rating.from_legacy_dict(pending[1])
+            return rating, rating_write_dir(target_dir, ezqcid, storage.rating_layout) / storage.rating_filename(rating)
+        for path in self.find_rating_files_in_rater_dir(target_dir, module_name, ezqcid, rater):
+            rating = self.load_valid_rating(path)
+            if rating is not None:
+                return rating, path
+        archived = self.load_archived_rater_dir_rating(target_dir, module_name, ezqcid, rater)
+        if archived is not None:
+            path, payload = archived
+            rating = Rating.from_legacy_dict(payload)
+            if self.rating_matches_path(rating, path):
+                return rating, path
+        return None
 
     @staticmethod
     def load_legacy_rating_file(path: Path) -> dict[str, Any]:
@@ -85,60 +420,611 @@ class RatingService:
 
     def save_rating(self, rating: Rating, legacy_module: QCModule | dict[str, Any] | None = None) -> Path:
         target_dir = self.project.rating_dir / rating.module_name / rating.rater
-        return self.save_rating_to_rater_dir(target_dir, rating, legacy_module)
+        return self.save_rating_to_rater_dir(target_dir, rating, legacy_module, storage=self.storage_config)
 
     @staticmethod
     def save_rating_to_rater_dir(
         target_dir: Path,
         rating: Rating,
         legacy_module: QCModule | dict[str, Any] | None = None,
+        storage: StorageConfig | None = None,
     ) -> Path:
+        """Persist ``rating`` under ``target_dir`` per the project ``storage``
+        options (legacy per-subject JSON by default).
+
+        Returns the written rating file, or the journal for the journal backend.
+        """
+        storage = storage or StorageConfig()
         if legacy_module is None and rating.legacy_payload is None:
             raise ValueError("保存评分 JSON 需要完整 legacy qcmodule payload")
 
         target_dir.mkdir(parents=True, exist_ok=True)
-        target_path = target_dir / rating.filename
-        prefix = f"{rating.module_name}._.{rating.ezqcid}._.{rating.rater}"
-        old_files = list(target_dir.glob(f"{prefix}*"))
 
         # P0-E: stamp the current schema version onto the outbound rating
         # payload (metadata layered on the 16-key module snapshot; NOT a module
         # field). Inject at the service layer to keep models/rating.py pure.
         # Never downgrade an existing higher version (forward-compat).
         payload = rating.to_legacy_dict(legacy_module)
-        current = payload.get("schema_version")
-        if not isinstance(current, int) or current < 1:
-            payload["schema_version"] = 1
-        FileUtils.safe_json_save(target_path, payload)
+        stamp_schema_version(payload)
+        if storage.compact_ratings:
+            # Module config goes to RatingFiles/<module>/.snapshots/ once per
+            # distinct content; the rating file keeps its hash + own values.
+            payload = ModuleSnapshotStore(target_dir.parent).compact(payload)
+
+        if storage.uses_journal:
+            # One fsync'd append; the per-subject file (and the removal of
+            # its predecessor) is deferred to compaction.
+            journal = RatingJournal.for_directory(target_dir)
+            journal.append(payload)
+            if journal.entry_count >= storage.journal_compact_after:
+                RatingService.schedule_journal_compaction(target_dir, storage)
+            return journal.path
+
+        write_dir = rating_write_dir(target_dir, rating.ezqcid, storage.rating_layout)
+        write_dir.mkdir(exist_ok=True)
+        target_path = write_dir / storage.rating_filename(rating)
+        old_files = RatingService.find_rating_files_in_rater_dir(
+            target_dir, rating.module_name, rating.ezqcid, rating.rater
+        )
+        FileUtils.safe_json_save(target_path, payload, indent=None if storage.compact_json else 4)
+        RaterDirListing.for_directory(write_dir).record_write(target_path.name)
+        if storage.stable_filenames:
+            RaterSummaryIndex.for_directory(target_dir).record(
+                target_path.relative_to(target_dir).as_posix(), rating.filename_summary
+            )
 
+        # Old files may sit in the other layout (e.g. flat before sharding).
         for old_file in old_files:
             if old_file.resolve() != target_path.resolve():
                 old_file.unlink()
+                RaterDirListing.for_directory(old_file.parent).record_unlink(old_file.name)
 
         return target_path
 
-    def load_all_ratings(self) -> list[Rating]:
-        return [rating for rating, _ in self.load_all_rating_records()]
+    @staticmethod
+    def compact_rater_journal(target_dir: Path, storage: StorageConfig | None = None, wait: bool = True) -> int:
+        """Materialise the pending journal entries of ``target_dir`` as legacy
+        rating files, then drop them from the journal.
+
+        Saves appended while files are being written (by any process) stay in
+        the journal (and keep winning over the files) until the next
+        compaction. One compaction runs per journal at a time; without
+        ``wait`` a busy journal is skipped. Returns the number of ratings
+        materialised.
+        """
+        journal = RatingJournal.for_directory(target_dir)
+        with journal.compaction(wait=wait) as acquired:
+            return RatingService._compact_journal(journal, Path(target_dir), storage) if acquired else 0
+
+    @staticmethod
+    def _compact_journal(journal: RatingJournal, target_dir: Path, storage: StorageConfig | None) -> int:
+        snapshot = journal.snapshot()
+        if not snapshot.entries:
+            return 0
+        file_storage = replace(storage or StorageConfig(), rating_backend=RATING_BACKEND_FILES)
+        count = 0
+        # One group commit for the whole rater dir; the journal entries are
+        # only dropped once the window has made the files durable.
+        with FileUtils.durability(DURABILITY_BATCHED):
+            for payload in journal.pending().values():
+                rating = RatingService.pending_journal_rating(Path(target_dir), payload)
+                if rating is None:
+                    continue
+                RatingService.save_rating_to_rater_dir(Path(target_dir), rating, storage=file_storage)
+                count += 1
+        journal.discard_through(snapshot)
+        return count
+
+    @staticmethod
+    def schedule_journal_compaction(target_dir: Path, storage: StorageConfig | None = None) -> None:
+        """Compact ``target_dir``'s journal on a daemon thread (at most one
+        compaction per journal at a time; a busy journal is skipped)."""
+        if RatingJournal.for_directory(target_dir).compacting:
+            return
+
+        def run() -> None:
+            try:
+                RatingService.compact_rater_journal(target_dir, storage, wait=False)
+            except Exception as exc:
+                log_exception(f"评分日志压缩失败: {target_dir}: {exc}", "RatingService", show_popup=False)
+
+        threading.Thread(target=run, name=f"rating-journal-compaction:{target_dir}", daemon=True).start()
+
+    def compact_rating_journals(self) -> int:
+        """Compact every rater journal of the project (e.g. on project close)."""
+        storage = self.storage_config
+        return sum(
+            self.compact_rater_journal(journal_path.parent, storage)
+            for journal_path in find_rating_journals(self.project.rating_dir)
+        )
+
+    def migrate_rating_layout(self, layout: str) -> int:
+        """Move every rating file of the project into ``layout`` (flat or
+        sharded) with same-filesystem renames; returns the number moved.
+
+        Idempotent and safe to re-run after an interruption: files already in
+        place are skipped, and readers accept both layouts meanwhile. Shards
+        left empty by a migration to flat are removed.
+        """
+        moved = 0
+        emptied: set[Path] = set()
+        for path in self.scan_rating_files():
+            identity = rating_identity_from_filename(path.name)
+            if identity is None:
+                continue
+            destination_dir = rating_write_dir(rater_dir_of(path), identity[1], layout)
+            if destination_dir == path.parent:
+                continue
+            destination_dir.mkdir(exist_ok=True)
+            os.replace(path, destination_dir / path.name)
+            RaterDirListing.for_directory(path.parent).record_unlink(path.name)
+            RaterDirListing.for_directory(destination_dir).record_write(path.name)
+            if path.parent != rater_dir_of(path):
+                emptied.add(path.parent)
+            moved += 1
+        for shard_dir in emptied:
+            if not any(shard_dir.iterdir()):
+                shard_dir.rmdir()
+        return moved
+
+    def convert_rating_filenames(self, stable: bool) -> int:
+        """Rename every rating file to stable (identity-only) names, or back
+        to legacy score1/tag1 names; returns the number renamed.
 
-    def load_all_rating_records(self) -> list[tuple[Rating, Path]]:
-        ratings = []
+        Renames only, no rewrite: legacy -> stable takes score1/tag1 from the
+        old name straight into the summary index. A file whose target name is
+        already taken (duplicate identity) is left alone. Safe to re-run.
+        """
+        converted = 0
         for path in self.scan_rating_files():
-            if self.validate_rating_file(path):
-                ratings.append((self.load_rating(path), path))
-        return ratings
+            identity = rating_identity_from_filename(path.name)
+            if identity is None:
+                continue
+            module_name, ezqcid, rater = identity
+            parsed = self.parse_rating_filename(path.name)
+            if stable:
+                if parsed is None:
+                    continue
+                summary = (parsed[3], parsed[4])
+                target = path.with_name(f"{module_name}._.{ezqcid}._.{rater}.json")
+            else:
+                if parsed is not None:
+                    continue
+                summary = self.read_rating_summary(path)
+                if summary is None:
+                    continue
+                target = path.with_name(f"{module_name}._.{ezqcid}._.{rater}._.{summary[0]}._.{summary[1]}.json")
+            if target.exists():
+                continue
+            os.rename(path, target)
+            listing = RaterDirListing.for_directory(path.parent)
+            listing.record_unlink(path.name)
+            listing.record_write(target.name)
+            if stable:
+                rater_dir = rater_dir_of(target)
+                RaterSummaryIndex.for_directory(rater_dir).record(target.relative_to(rater_dir).as_posix(), summary)
+            converted += 1
+        return converted
+
+    def archive_module(self, module_name: str) -> int:
+        """Pack ``RatingFiles/<module>/`` into ``RatingFiles/<module>.ratings.zip``
+        and remove the archived files; returns the number of archived ratings.
+
+        Pending journal saves are compacted first and compact payloads are
+        stored expanded. Ratings of an earlier archive of the module that
+        were not re-saved since are carried over, so re-archiving after late
+        edits is incremental. Files that fail validation stay on disk (they
+        are not aggregated either way). The module directory is removed once
+        only sidecar dotfiles are left in it.
+        """
+        rating_dir = self.project.rating_dir
+        module_dir = rating_dir / module_name
+        target = archive_path(rating_dir, module_name)
+        if not module_dir.is_dir() and not target.exists():
+            raise ValueError(f"模块评分目录不存在: {module_dir}")
+
+        storage = self.storage_config
+        for journal_path in find_rating_journals(rating_dir):
+            if journal_path.parent.parent == module_dir:
+                self.compact_rater_journal(journal_path.parent, storage)
+
+        members: list[tuple[ArchiveEntry, str | bytes]] = []
+        archived_files: list[Path] = []
+        for path in self.scan_rating_tree(module_dir):
+            try:
+                content: str | bytes = path.read_bytes()
+                data = FileUtils.json_codec.loads(content)
+                if is_compact_payload(data):
+                    data = expand_rating_payload(data, path)
+                    content = FileUtils.json_codec.dumps(data)
+                rating = Rating.from_legacy_dict(data)
+            except Exception:
+                continue
+            if not self.rating_matches_path(rating, path):
+                continue
+            parsed = self.parse_rating_filename(path.name)
+            score1, tag1 = (parsed[3], parsed[4]) if parsed is not None else rating.filename_summary
+            entry = ArchiveEntry(
+                path.relative_to(rating_dir).as_posix(), rating.module_name, rating.ezqcid, rating.rater, score1, tag1
+            )
+            members.append((entry, content))
+            archived_files.append(path)
+
+        saved = {(entry.module_name, entry.ezqcid, entry.rater) for entry, _ in members}
+        archive = RatingArchive.for_path(target)
+        for entry in archive.entries():
+            if (entry.module_name, entry.ezqcid, entry.rater) not in saved:
+                members.append((entry, archive.read(entry.member)))
+        if not members:
+            raise ValueError(f"模块没有可归档的评分文件: {module_name}")
+        members.sort(key=lambda member: member[0].member)
+
+        RatingArchive.release(target)
+        count = write_rating_archive(target, module_name, members)
+
+        for path in archived_files:
+            path.unlink()
+            RaterDirListing.for_directory(path.parent).record_unlink(path.name)
+        self._remove_archived_module_dir(module_dir)
+        return count
+
+    @staticmethod
+    def _remove_archived_module_dir(module_dir: Path) -> None:
+        """Delete ``module_dir`` when all that is left are regenerable
+        sidecars (snapshot store, summary index, empty journals, locks)."""
+        if not module_dir.is_dir():
+            return
+        for root, _dirnames, filenames in os.walk(module_dir):
+            for name in filenames:
+                path = Path(root) / name
+                if not name.startswith("."):
+                    return
+                if name == JOURNAL_FILENAME and path.stat().st_size:
+                    return
+                if name not in _SIDECAR_FILENAMES and SNAPSHOT_DIRNAME not in path.parts:
+                    return
+        shutil.rmtree(module_dir)
+
+    def restore_module(self, module_name: str) -> int:
+        """Extract ``<module>.ratings.zip`` back into ``RatingFiles/<module>/``
+        and delete the archive; returns the number of files restored.
+
+        Identities re-saved on disk after archiving keep their on-disk file.
+        """
+        rating_dir = self.project.rating_dir
+        target = archive_path(rating_dir, module_name)
+        if not target.exists():
+            raise ValueError(f"模块评分归档不存在: {target}")
+        on_disk = {
+            identity
+            for path in self.scan_rating_tree(rating_dir / module_name)
+            if (identity := rating_identity_from_filename(path.name)) is not None
+        }
+        archive = RatingArchive.for_path(target)
+        restored = 0
+        with FileUtils.durability(DURABILITY_BATCHED):
+            for entry in archive.entries():
+                if (entry.module_name, entry.ezqcid, entry.rater) in on_disk:
+                    continue
+                path = rating_dir / entry.member
+                FileUtils.atomic_write(path, archive.read(entry.member).decode("utf-8"))
+                RaterDirListing.for_directory(path.parent).record_write(path.name)
+                restored += 1
+        RatingArchive.release(target)
+        target.unlink()
+        return restored
+
+    def integrity_manifest(self, workers: int | None = None) -> IntegrityManifest:
+        """Integrity manifest of ``RatingFiles/`` (kept in ``Cache/``); the
+        summary indexes and rating journals are not part of it."""
+        return IntegrityManifest(
+            self.project.rating_dir,
+            self.project.cache_dir / RATING_MANIFEST_FILENAME,
+            exclude_names=_SIDECAR_FILENAMES,
+            workers=self.workers if workers is None else workers,
+        )
+
+    def verify_rating_files(
+        self,
+        full: bool = False,
+        accept: bool = False,
+        workers: int | None = None,
+    ) -> IntegrityReport:
+        """Check ``RatingFiles/`` against its integrity manifest, re-hashing
+        only files whose stat changed (all of them with ``full=True``);
+        ``accept=True`` records the current state as the new baseline."""
+        return self.integrity_manifest(workers).verify(full=full, accept=accept)
+
+    def sync_ratings_from(self, source: "RatingService | Project", dry_run: bool = False) -> SyncReport:
+        """Bring ratings that are new or newer in another copy of the project
+        (e.g. a rater's laptop copy on a removable drive) into this one.
+
+        Both sides are compared by identity, rating ``time`` and content hash
+        (see ``core.rating_sync``); only transferred identities are written,
+        through the normal save path, so the destination's storage options
+        apply and any other file of the identity is replaced. Archived modules
+        and pending journal saves of either side take part like files do; the
+        destination's journals are compacted first so a written file is not
+        shadowed by an older pending save.
+        """
+        source_service = source if isinstance(source, RatingService) else self.for_project(source)
+        report = SyncReport(dry_run=dry_run)
+        if not dry_run:
+            self.compact_rating_journals()
+        transfers = plan_rating_sync(
+            build_rating_manifest(source_service.load_all_rating_records()),
+            build_rating_manifest(self.load_all_rating_records()),
+            report,
+        )
+        if dry_run or not transfers:
+            return report
+        storage = replace(self.storage_config, rating_backend=RATING_BACKEND_FILES)
+        rating_dir = self.project.rating_dir
+        with FileUtils.durability(DURABILITY_BATCHED):
+            for entry in transfers:
+                target_dir = rating_dir / entry.rating.module_name / entry.rating.rater
+                self.save_rating_to_rater_dir(target_dir, entry.rating, storage=storage)
+        return report
 
-    def load_legacy_state(self, subjects: pd.DataFrame) -> LoadedRatingsState:
-        """Load ratings in the shape expected by the legacy GUI state."""
-        records = self.load_all_rating_records()
+    def load_all_ratings(self, workers: int | None = None, rating_filter: RatingFilter | None = None) -> list[Rating]:
+        return [rating for rating, _ in self.load_all_rating_records(workers=workers, rating_filter=rating_filter)]
+
+    def load_valid_rating(self, path: Path) -> Rating | None:
+        rating = self.ingest_rating_file(path)
+        return rating if isinstance(rating, Rating) else None
+
+    def rating_index(self) -> RatingIndex:
+        return RatingIndex(self.project)
+
+    def load_valid_ratings(self, paths: list[Path], workers: int | None = None) -> list[Rating | None]:
+        return [
+            rating if isinstance(rating, Rating) else None
+            for rating in self.ingest_rating_files(paths, workers=workers)
+        ]
+
+    def ingest_rating_files(self, paths: list[Path], workers: int | None = None) -> list[Rating | QuarantinedFile]:
+        """``ingest_rating_file`` over ``paths``, fanned out over a thread pool.
+
+        Results keep the order of ``paths`` regardless of completion order, so
+        callers see the same deterministic (sorted scan) order as a sequential
+        load.
+        """
+        workers = self.workers if workers is None else workers
+        if not workers or workers <= 1 or len(paths) <= 1:
+            return [self.ingest_rating_file(path) for path in paths]
+        with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            return list(pool.map(self.ingest_rating_file, paths))
+
+    def load_all_rating_records(
+        self,
+        workers: int | None = None,
+        rating_filter: RatingFilter | None = None,
+    ) -> list[tuple[Rating, Path]]:
+        """Every aggregatable rating with its path, in sorted-path order.
+
+        Each file is parsed once; files that fail the identity checks are
+        listed, with the reason, in ``self.last_ingest_report``. With
+        ``rating_filter`` only the selected part of the project is read.
+        """
+        report = IngestReport()
+        if self.use_index:
+            records = self.load_indexed_rating_records(workers=workers, report=report, rating_filter=rating_filter)
+        else:
+            started = time.perf_counter()
+            paths = self.scan_rating_files(rating_filter)
+            scanned = time.perf_counter()
+            records = []
+            for path, result in zip(paths, self.ingest_rating_files(paths, workers=workers)):
+                if isinstance(result, Rating):
+                    records.append((result, path))
+                else:
+                    report.quarantined.append(result)
+            report.scanned = report.parsed = len(paths)
+            report.timings["scan"] = scanned - started
+            report.timings["parse"] = time.perf_counter() - scanned
+
+        started = time.perf_counter()
+        merged = self.merge_archived_records(records, rating_filter)
+        report.archived = len(merged) - len(records)
+        records = self.overlay_journal_records(merged, rating_filter)
+        report.timings["overlay"] = time.perf_counter() - started
+        report.loaded = len(records)
+
+        if report.quarantined:
+            log_warning(
+                f"{len(report.quarantined)} 个评分文件未参与汇总: {report.reason_counts}",
+                "RatingService",
+            )
+        self.last_ingest_report = report
+        return records
+
+    def merge_archived_records(
+        self,
+        records: list[tuple[Rating, Path]],
+        rating_filter: RatingFilter | None = None,
+    ) -> list[tuple[Rating, Path]]:
+        """Add archived ratings whose identity has no rating file on disk.
+
+        Members are read by random access straight from the archives and
+        reported at their original path, so record order (and the filepath
+        columns) match the module before it was archived.
+        """
+        rating_dir = self.project.rating_dir
+        archives = find_rating_archives(rating_dir)
+        if rating_filter is not None:
+            # An archive's members all carry the archive file's mtime.
+            archives = [
+                path
+                for path in archives
+                if rating_filter.accepts_directory(0, path.name[: -len(ARCHIVE_SUFFIX)])
+                and rating_filter.accepts_mtime(path.stat().st_mtime)
+            ]
+        if not archives:
+            return records
+        on_disk = {(rating.module_name, rating.ezqcid, rating.rater) for rating, _ in records}
+        archived: list[tuple[Rating, Path]] = []
+        for path in archives:
+            archive = RatingArchive.for_path(path)
+            for entry in archive.entries():
+                if (entry.module_name, entry.ezqcid, entry.rater) in on_disk:
+                    continue
+                if rating_filter is not None and not rating_filter.accepts_identity(
+                    entry.module_name, entry.ezqcid, entry.rater
+                ):
+                    continue
+                try:
+                    rating = Rating.from_legacy_dict(archive.read_payload(entry.member))
+                except Exception:
+                    continue
+                member_path = rating_dir / entry.member
+                if self.rating_matches_path(rating, member_path):
+                    archived.append((rating, member_path))
+        if not archived:
+            return records
+        return sorted(records + archived, key=lambda record: record[1])
+
+    def overlay_journal_records(
+        self,
+        records: list[tuple[Rating, Path]],
+        rating_filter: RatingFilter | None = None,
+    ) -> list[tuple[Rating, Path]]:
+        """Let pending journal entries replace the files of the same identity
+        (last writer wins). Journal ratings are reported at the path
+        compaction will give them, so record order stays the sorted-path order.
+        """
+        journals = find_rating_journals(self.project.rating_dir)
+        if rating_filter is not None:
+            # A journal's entries all carry the journal file's mtime.
+            journals = [
+                path
+                for path in journals
+                if rating_filter.accepts_directory(0, path.parent.parent.name)
+                and rating_filter.accepts_directory(1, path.parent.name)
+                and rating_filter.accepts_mtime(path.stat().st_mtime)
+            ]
+        if not journals:
+            return records
+        storage = self.storage_config
+        layout = storage.rating_layout
+        pending: dict[tuple[str, str, str], tuple[Rating, Path]] = {}
+        for journal_path in journals:
+            target_dir = journal_path.parent
+            for payload in RatingJournal.for_directory(target_dir).pending().values():
+                rating = self.pending_journal_rating(target_dir, payload)
+                if rating is not None and (rating_filter is None or rating_filter.accepts_rating(rating)):
+                    path = rating_write_dir(target_dir, rating.ezqcid, layout) / storage.rating_filename(rating)
+                    pending[(rating.module_name, rating.ezqcid, rating.rater)] = (rating, path)
+        if not pending:
+            return records
+        kept = [
+            (rating, path)
+            for rating, path in records
+            if (rating.module_name, rating.ezqcid, rating.rater) not in pending
+        ]
+        return sorted(kept + list(pending.values()), key=lambda record: record[1])
+
+    def load_indexed_rating_records(
+        self,
+        workers: int | None = None,
+        report: IngestReport | None = None,
+        rating_filter: RatingFilter | None = None,
+    ) -> list[tuple[Rating, Path]]:
+        """Refresh the persistent index, then serve every record from it.
+
+        Only files whose (mtime_ns, size) differ from the indexed signature are
+        re-parsed; deleted files drop out of the index. Quarantined files are
+        remembered with their reason, so ``report`` lists them all either way.
+        With ``rating_filter`` only the selected files are refreshed and served;
+        the rest of the index is left as it is.
+        """
+        report = report if report is not None else IngestReport()
+        started = time.perf_counter()
+        paths = self.scan_rating_files(rating_filter)
+        scanned = time.perf_counter()
+        index = self.rating_index()
+        self.last_index_delta = index.refresh(
+            paths,
+            lambda stale: self.ingest_rating_files(stale, workers=workers),
+            rating_filter=rating_filter,
+        )
+        selected = None if rating_filter is None else set(paths)
+        records = index.records(selected, rating_filter)
+        report.quarantined.extend(index.quarantined(selected, rating_filter))
+        report.scanned = len(paths)
+        report.parsed = self.last_index_delta.parsed
+        report.timings["scan"] = scanned - started
+        report.timings["index"] = time.perf_counter() - scanned
+        return records
+
+    def load_legacy_state(
+        self,
+        subjects: pd.DataFrame,
+        workers: int | None = None,
+        rating_filter: RatingFilter | None = None,
+        projection: RatingProjection | list[str] | None = None,
+    ) -> LoadedRatingsState:
+        """Load ratings in the shape expected by the legacy GUI state;
+        ``rating_filter`` limits it to some modules/raters/subjects and
+        ``projection`` (default: the project's ``qctable_fields``) to some
+        rating fields."""
+        records = self.load_all_rating_records(workers=workers, rating_filter=rating_filter)
+        report = self.last_ingest_report
         ratings = [rating for rating, _ in records]
-        original_table = self.rating_records_to_long_dataframe(records)
+        started = time.perf_counter()
+        original_table = self.rating_records_to_long_dataframe(records, self.qctable_projection(projection))
         original_wide_table = self.long_table_to_wide(original_table)
+        qctable = self.merge_subjects_with_rating_wide(original_wide_table, subjects)
+        report.timings["aggregate"] = time.perf_counter() - started
         return LoadedRatingsState(
             ratings=ratings,
-            rating_dict=self.build_rating_dict(ratings),
-            qctable=self.merge_subjects_with_rating_wide(original_wide_table, subjects),
+            rating_dict=self.build_lazy_rating_dict(records),
+            qctable=qctable,
             original_table=original_table,
             original_wide_table=original_wide_table,
+            ingest_report=report,
+        )
+
+    def aggregate_streaming(
+        self,
+        subjects: pd.DataFrame,
+        workers: int | None = None,
+        rating_filter: RatingFilter | None = None,
+        trace_memory: bool = False,
+        projection: RatingProjection | list[str] | None = None,
+    ):
+        """``load_legacy_state(...).qctable`` built one module/rater subtree
+        at a time; returns ``(qctable, StreamingReport)``. See
+        ``core.streaming_aggregation``."""
+        from core.streaming_aggregation import StreamingAggregator
+
+        aggregator = StreamingAggregator(
+            self,
+            workers=workers,
+            trace_memory=trace_memory,
+            projection=self.qctable_projection(projection),
+        )
+        return aggregator.aggregate(subjects, rating_filter=rating_filter)
+
+    def export_sqlite(
+        self,
+        subjects: pd.DataFrame,
+        path: str | Path | None = None,
+        workers: int | None = None,
+        projection: RatingProjection | list[str] | None = None,
+        full: bool = False,
+    ) -> SQLiteExportReport:
+        """Aggregate the project and refresh its SQLite export with the
+        subjects, long and wide tables (``TableService.export_sqlite``).
+        ``projection`` (default: ``qctable_fields``) limits the pivoted fields
+        and so the wide table's columns."""
+        state = self.load_legacy_state(subjects, workers=workers, projection=projection)
+        return TableService().export_sqlite(
+            self.project,
+            long_table=state.original_table,
+            subjects=subjects,
+            qctable=state.qctable,
+            path=path,
+            full=full,
         )
 
     def build_rating_dict(self, ratings: list[Rating]) -> dict[str, dict[str, dict[str, Any]]]:
@@ -148,18 +1034,113 @@ class RatingService:
             rating_dict[rating.ezqcid][f"{rating.module_name}-{rating.rater}"] = rating.to_legacy_dict()
         return rating_dict
 
-    def aggregate_to_wide(self, ratings: list[Rating], subjects: pd.DataFrame) -> pd.DataFrame:
-        original_table = self.rating_records_to_long_dataframe([(rating, None) for rating in ratings])
+    def build_lazy_rating_dict(self, records: list[tuple[Rating, Path | None]]) -> LazyRatingDict:
+        """``build_rating_dict`` that keeps identities and paths only; the
+        legacy dicts are read back through ``load_rating_ref`` when used."""
+        refs = [RatingRef(rating.module_name, rating.ezqcid, rating.rater, path) for rating, path in records]
+        return LazyRatingDict(self.load_rating_ref, refs)
+
+    def load_rating_ref(self, ref: RatingRef) -> dict[str, Any] | None:
+        """Legacy dict of the current rating behind ``ref``: its pending
+        journal entry, else its rating file, else whatever
+        ``resolve_current_rating`` finds (renamed by a re-score, archived)."""
+        target_dir = self.project.rating_dir / ref.module_name / ref.rater
+        pending = self.load_pending_rater_dir_rating(target_dir, ref.module_name, ref.ezqcid, ref.rater)
+        if pending is not None:
+            return pending[1]
+        if ref.path is not None and ref.path.suffix == ".json" and ref.path.is_file():
+            rating = self.load_valid_rating(ref.path)
+            if rating is not None and (rating.module_name, rating.ezqcid, rating.rater) == (
+                ref.module_name,
+                ref.ezqcid,
+                ref.rater,
+            ):
+                return rating.to_legacy_dict()
+        resolved = self.resolve_current_rating(ref.module_name, ref.ezqcid, ref.rater)
+        return None if resolved is None else resolved[0].to_legacy_dict()
+
+    def aggregate_to_wide(
+        self,
+        ratings: list[Rating] | None,
+        subjects: pd.DataFrame,
+        workers: int | None = None,
+        rating_filter: RatingFilter | None = None,
+        projection: RatingProjection | list[str] | None = None,
+    ) -> pd.DataFrame:
+        """Pivot ``ratings`` onto ``subjects``; ``ratings=None`` loads them
+        from the project first (with ``workers`` ingestion threads).
+
+        ``rating_filter`` selects what is loaded; on given ``ratings`` only its
+        module/rater/ezqcid part applies (there are no files to date).
+        ``projection`` selects the pivoted fields (see ``qctable_projection``).
+        """
+        if ratings is None:
+            ratings = self.load_all_ratings(workers=workers, rating_filter=rating_filter)
+        elif rating_filter is not None:
+            ratings = [rating for rating in ratings if rating_filter.accepts_rating(rating)]
+        original_table = self.rating_records_to_long_dataframe(
+            [(rating, None) for rating in ratings], self.qctable_projection(projection)
+        )
         original_wide_table = self.long_table_to_wide(original_table)
         return self.merge_subjects_with_rating_wide(original_wide_table, subjects)
 
-    def rating_records_to_long_dataframe(self, records: list[tuple[Rating, Path | None]]) -> pd.DataFrame:
+    def qctable_projection(
+        self,
+        projection: RatingProjection | list[str] | None = None,
+    ) -> RatingProjection | None:
+        """``projection`` as a ``RatingProjection``.
+
+        None falls back to ``StorageConfig.qctable_fields`` of the settings a
+        project service holds in memory (the GUI path); a service bound to a
+        bare ``Project`` does not read the settings file for it, so scripts
+        pass ``projection`` per call. No spec at all pivots every field.
+        """
+        if projection is None:
+            settings = getattr(self.project_or_service, "settings", None)
+            if settings is None or isinstance(self.project_or_service, Project):
+                return None
+            projection = StorageConfig.from_settings(settings).qctable_fields
+        return RatingProjection.from_spec(projection)
+
+    def rating_records_to_long_dataframe(
+        self,
+        records: list[tuple[Rating, Path | None]],
+        projection: RatingProjection | None = None,
+    ) -> pd.DataFrame:
+        """One row per rating, built column-wise in a single pass.
+
+        Flattened fields are appended to per-column lists and materialised as
+        one DataFrame at the end (one-row DataFrames + ``pd.concat`` cost a
+        pandas object per rating). Column order is first appearance, and a
+        field a rating does not carry is NaN — the same union ``pd.concat``
+        produced. With ``projection`` only the projected fields get a column.
+        """
         if not records:
             return pd.DataFrame()
-        return pd.concat(
-            [self.rating_to_flat_dataframe(rating, path) for rating, path in records],
-            ignore_index=False,
-        ).sort_index()
+        columns = self.flat_record_columns(records, projection)
+        return pd.DataFrame({key: _long_column(values) for key, values in columns.items()})
+
+    def flat_record_columns(
+        self,
+        records: list[tuple[Rating, Path | None]],
+        projection: RatingProjection | None = None,
+    ) -> dict[str, list[Any]]:
+        """Flattened fields as ``{column: values}`` in first-appearance order;
+        a rating without the field holds the ``MISSING`` placeholder. Fields
+        outside ``projection`` are skipped."""
+        columns: dict[str, list[Any]] = {}
+        for row_count, (rating, path) in enumerate(records, 1):
+            for key, value in self.rating_to_flat_record(rating, path).items():
+                if projection is not None and not projection.accepts(key):
+                    continue
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = [MISSING] * (row_count - 1)
+                column.append(value)
+            for column in columns.values():
+                if len(column) < row_count:
+                    column.append(MISSING)
+        return columns
 
     def long_table_to_wide(self, long_df: pd.DataFrame) -> pd.DataFrame:
         if long_df.empty:
@@ -182,7 +1163,20 @@ class RatingService:
                 f"重复的评分身份(ezqcid/module/rater),F-RAT-3 不变量被破坏: {offenders[:5]}"
             )
 
-        wide = long_df.pivot_table(index="ezqcid", columns=["module_name", "rater"], aggfunc="first").reset_index()
+        # Identities are unique (checked above), so the pivot is a plain
+        # set_index/unstack. This reproduces pivot_table(aggfunc="first")
+        # exactly without its groupby: rows with a null key or no values are
+        # dropped, columns are sorted, and all-NaN columns are dropped.
+        long_df = long_df.dropna(subset=dup_keys)
+        value_columns = [col for col in long_df.columns if col not in dup_keys]
+        long_df = long_df.dropna(subset=value_columns, how="all")
+        wide = (
+            long_df.set_index(dup_keys)
+            .unstack(["module_name", "rater"])
+            .sort_index(axis=1)
+            .dropna(axis=1, how="all")
+            .reset_index()
+        )
         new_columns = []
         for col in wide.columns:
             if col == "ezqcid" or (isinstance(col, tuple) and col[0] == "ezqcid"):
@@ -227,6 +1221,9 @@ class RatingService:
         return result[["ezqcid"] + score_cols + tag_cols + notes_cols + other_cols]
 
     def rating_to_flat_dataframe(self, rating: Rating, path: Path | None = None) -> pd.DataFrame:
+        return pd.DataFrame([self.rating_to_flat_record(rating, path)])
+
+    def rating_to_flat_record(self, rating: Rating, path: Path | None = None) -> dict[str, Any]:
         data = rating.to_legacy_dict()
         flattened: dict[str, Any] = {}
 
@@ -264,7 +1261,7 @@ class RatingService:
             flattened["filepath"] = str(path)
 
         flattened["module_name"] = flattened.pop("name")
-        return pd.DataFrame([flattened])
+        return flattened
 
 
-__all__ = ["LoadedRatingsState", "RatingService"]
+__all__ = ["DEFAULT_INGEST_WORKERS", "LoadedRatingsState", "MISSING", "RatingService", "long_column_dtype"]
@@ -0,0 +1,143 @@
+"""Per-rater-directory score1/tag1 index for stable rating filenames.
+
+Legacy filenames carry score1/tag1 (``<module>._.<ezqcid>._.<rater>._.<score1>._.<tag1>.json``),
+which is what lets the QC page list a rater directory without parsing JSON.
+Stable filenames (``<module>._.<ezqcid>._.<rater>.json``) drop them, so the
+listing reads them from ``<rater>/.rating_summaries.json`` instead::
+
+    {"version": 1, "entries": {"<name relative to rater dir>": [score1, tag1, mtime_ns, size]}}
+
+Entries are validated against the file's stat signature; a missing or stale
+entry is re-derived by parsing that one file. The index is regenerable (a
+corrupt or missing file is rebuilt), so it is written in place with relaxed
+durability rather than through a rename per save.
+
+Layer: core. Stdlib + utils only; thread-safe.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Iterable
+
+from utils.file_utils import FileUtils
+
+
+SUMMARY_INDEX_FILENAME = ".rating_summaries.json"
+SUMMARY_INDEX_VERSION = 1
+
+# (score1, tag1) as the raw strings a legacy filename would carry.
+RatingSummary = tuple[str, str]
+
+
+class RaterSummaryIndex:
+    """The summary index of one ``RatingFiles/<module>/<rater>/`` directory."""
+
+    _registry: dict[str, "RaterSummaryIndex"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, rater_dir: str | os.PathLike[str]) -> None:
+        self.rater_dir = Path(rater_dir)
+        self.path = self.rater_dir / SUMMARY_INDEX_FILENAME
+        self._lock = threading.Lock()
+        self._entries: dict[str, list] = {}
+        self._loaded_signature: tuple[int, int] | None = None
+
+    @classmethod
+    def for_directory(cls, rater_dir: str | os.PathLike[str]) -> "RaterSummaryIndex":
+        key = os.path.abspath(rater_dir)
+        with cls._registry_lock:
+            index = cls._registry.get(key)
+            if index is None:
+                index = cls._registry[key] = cls(key)
+            return index
+
+    # ---- persistence ----
+
+    @staticmethod
+    def _signature(path: Path) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> None:
+        signature = self._signature(self.path)
+        if signature is None or signature == self._loaded_signature:
+            if signature is None:
+                self._loaded_signature = None
+            return
+        try:
+            data = FileUtils.safe_json_load(self.path)
+            entries = data["entries"] if data.get("version") == SUMMARY_INDEX_VERSION else {}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            entries = {}  # torn/corrupt: rebuilt from the files
+        self._entries = dict(entries)
+        self._loaded_signature = signature
+
+    def _save(self) -> None:
+        content = FileUtils.json_codec.dumps({"version": SUMMARY_INDEX_VERSION, "entries": self._entries}, indent=None)
+        self.rater_dir.mkdir(parents=True, exist_ok=True)
+        # In place, no fsync: a torn index is detected and rebuilt on load.
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(content)
+        self._loaded_signature = self._signature(self.path)
+
+    # ---- API ----
+
+    def record(self, relative_name: str, summary: RatingSummary) -> None:
+        """Remember the summary of a file the caller has just written."""
+        signature = self._signature(self.rater_dir / relative_name)
+        if signature is None:
+            return
+        with self._lock:
+            self._load()
+            self._entries[relative_name] = [summary[0], summary[1], *signature]
+            self._save()
+
+    def forget(self, relative_name: str) -> None:
+        with self._lock:
+            self._load()
+            if self._entries.pop(relative_name, None) is not None:
+                self._save()
+
+    def summaries(
+        self,
+        relative_names: Iterable[str],
+        parse: Callable[[Path], RatingSummary | None],
+    ) -> dict[str, RatingSummary]:
+        """``{relative name: (score1, tag1)}`` for ``relative_names``.
+
+        Stale or missing entries are re-derived with ``parse`` (None = not a
+        usable rating; left out). Entries for files no longer listed are
+        dropped.
+        """
+        result: dict[str, RatingSummary] = {}
+        with self._lock:
+            self._load()
+            names = set(relative_names)
+            changed = bool(set(self._entries) - names)
+            entries = {name: entry for name, entry in self._entries.items() if name in names}
+            for name in sorted(names):
+                signature = self._signature(self.rater_dir / name)
+                if signature is None:
+                    continue
+                entry = entries.get(name)
+                if entry is None or tuple(entry[2:]) != signature:
+                    summary = parse(self.rater_dir / name)
+                    if summary is None:
+                        entries.pop(name, None)
+                        continue
+                    entries[name] = entry = [summary[0], summary[1], *signature]
+                    changed = True
+                result[name] = (entry[0], entry[1])
+            self._entries = entries
+            if changed:
+                self._save()
+        return result
+
+
+__all__ = ["RaterSummaryIndex", "RatingSummary", "SUMMARY_INDEX_FILENAME"]
@@ -0,0 +1,128 @@
+"""Offline rating sync between two copies of a project.
+
+Raters work on their own copy (a laptop) and bring ratings back to the lab
+copy over a removable drive or any mounted path; there is no network service.
+Both copies are summarised as a manifest keyed by rating identity
+``(module, ezqcid, rater)`` with the rating ``time`` and a content hash, and
+only identities that are new or changed on the source side are written.
+
+Conflicts are resolved by rating ``time`` (newer wins; a rating without a
+time is the oldest). Same time with different content is a genuine conflict:
+the destination keeps its rating and the identity is reported. Identities
+with several files on the source side violate the one-file-per-identity
+invariant ``long_table_to_wide`` relies on and are never transferred.
+
+The content hash covers the legacy payload minus ``schema_version``: the save
+path stamps that field, so it must not make a synced rating look changed.
+
+Layer: core. Stdlib + models only.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+from models.module_snapshot import snapshot_hash
+from models.rating import Rating
+
+
+RatingIdentity = tuple[str, str, str]
+
+
+@dataclass(frozen=True)
+class RatingManifestEntry:
+    rating: Rating
+    path: Path
+    time: datetime | None
+    content_hash: str
+
+    @property
+    def identity(self) -> RatingIdentity:
+        return self.rating.module_name, self.rating.ezqcid, self.rating.rater
+
+
+def rating_content_hash(rating: Rating) -> str:
+    payload = dict(rating.legacy_payload or rating.to_legacy_dict())
+    payload.pop("schema_version", None)
+    return snapshot_hash(payload)
+
+
+def build_rating_manifest(records: Iterable[tuple[Rating, Path]]) -> dict[RatingIdentity, list[RatingManifestEntry]]:
+    """``{identity: [entry, ...]}``; more than one entry means duplicate files."""
+    manifest: dict[RatingIdentity, list[RatingManifestEntry]] = {}
+    for rating, path in records:
+        entry = RatingManifestEntry(rating, path, rating.time, rating_content_hash(rating))
+        manifest.setdefault(entry.identity, []).append(entry)
+    return manifest
+
+
+def _time_key(entry: RatingManifestEntry) -> tuple[bool, datetime]:
+    # A rating without a time sorts before every timed rating.
+    return entry.time is not None, entry.time or datetime.min
+
+
+def identity_label(identity: RatingIdentity) -> str:
+    return "/".join(identity)
+
+
+@dataclass
+class SyncReport:
+    """What a sync did (or would do with ``dry_run``); identities as labels."""
+
+    copied: list[str] = field(default_factory=list)  # new on the destination
+    updated: list[str] = field(default_factory=list)  # source rating was newer
+    kept_newer: list[str] = field(default_factory=list)  # destination rating as new or newer
+    conflicts: list[str] = field(default_factory=list)  # same time, different content
+    duplicates: list[str] = field(default_factory=list)  # several source files; skipped
+    unchanged: int = 0
+    dry_run: bool = False
+
+    @property
+    def transferred(self) -> int:
+        return len(self.copied) + len(self.updated)
+
+
+def plan_rating_sync(
+    source: dict[RatingIdentity, list[RatingManifestEntry]],
+    destination: dict[RatingIdentity, list[RatingManifestEntry]],
+    report: SyncReport,
+) -> list[RatingManifestEntry]:
+    """Source entries to write to the destination, filling in ``report``."""
+    transfers: list[RatingManifestEntry] = []
+    for identity in sorted(source):
+        label = identity_label(identity)
+        entries = source[identity]
+        if len(entries) > 1:
+            report.duplicates.append(label)
+            continue
+        entry = entries[0]
+        existing = destination.get(identity)
+        if not existing:
+            report.copied.append(label)
+            transfers.append(entry)
+            continue
+        if len(existing) == 1 and existing[0].content_hash == entry.content_hash:
+            report.unchanged += 1
+            continue
+        newest = max(existing, key=_time_key)
+        if _time_key(entry) > _time_key(newest):
+            report.updated.append(label)
+            transfers.append(entry)
+        elif _time_key(entry) == _time_key(newest) and entry.content_hash != newest.content_hash:
+            report.conflicts.append(label)
+        else:
+            report.kept_newer.append(label)
+    return transfers
+
+
+__all__ = [
+    "RatingManifestEntry",
+    "SyncReport",
+    "build_rating_manifest",
+    "identity_label",
+    "plan_rating_sync",
+    "rating_content_hash",
+]
@@ -0,0 +1,360 @@
+"""Watch ``RatingFiles/`` for ratings saved by other processes.
+
+Right-click review runs the QC page as a separate ``easyqc.py`` process and
+other raters save into the same project, so the main window's ratings go
+stale between extractions. ``RatingWatcher`` notices those saves and emits one
+``EventType.RATING_SAVED`` per changed identity on the ``EventBus``::
+
+    Event(RATING_SAVED, "RatingWatcher",
+          {"module_name", "ezqcid", "rater", "path", "removed"})
+
+so caches and views can update that identity only. An event with
+``{"resync": True}`` means changes were lost (inotify queue overflow) and
+consumers must reload everything.
+
+Two backends:
+
+- ``inotify`` (Linux, through libc via ctypes; no dependency): one watch per
+  directory, new directories are watched as they appear. inotify only sees
+  writes made through the local kernel, so a project on a network share that
+  other machines write to needs ``polling``.
+- ``polling``: keeps the mtime of every directory and re-lists only those
+  whose mtime moved. Saves are atomic renames (``FileUtils.atomic_write``),
+  which always bump the directory mtime; the per-rater journals are appended
+  in place, so their (size, mtime) is checked on every poll.
+
+Journal appends are resolved to identities by diffing the journal's pending
+entries against the previous poll.
+
+The EventBus is single-threaded: ``poll()`` never blocks and is meant to be
+called from the GUI loop (``root.after``). The watcher has no thread of its own.
+
+Layer: core. Stdlib + core rating helpers.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from core.event_bus import Event, EventBus, EventType
+from core.rater_dir_cache import rating_identity_from_filename
+from core.rating_journal import JOURNAL_FILENAME, RatingJournal, find_rating_journals
+from models.project import Project
+from utils.logger import log_warning
+
+
+WATCH_BACKEND_AUTO = "auto"
+WATCH_BACKEND_INOTIFY = "inotify"
+WATCH_BACKEND_POLLING = "polling"
+WATCH_BACKENDS = (WATCH_BACKEND_AUTO, WATCH_BACKEND_INOTIFY, WATCH_BACKEND_POLLING)
+
+# Milliseconds between two polls of the GUI loop.
+DEFAULT_WATCH_INTERVAL_MS = 1000
+
+# Path reported by a backend when changes may have been lost.
+RESYNC = Path("")
+
+
+def _is_rating_name(name: str) -> bool:
+    return name.endswith(".json") and not name.startswith(".")
+
+
+class PollingWatchBackend:
+    """Directory-mtime diffing; works on every platform and filesystem."""
+
+    name = WATCH_BACKEND_POLLING
+
+    def __init__(self, rating_dir: Path) -> None:
+        self.rating_dir = Path(rating_dir)
+        # directory -> (mtime_ns, {rating filename: (mtime_ns, size)}, subdirectories)
+        self._dirs: dict[Path, tuple[int, dict[str, tuple[int, int]], set[str]]] = {}
+        self._journals: dict[Path, tuple[int, int] | None] = {}
+        self._scan_tree(self.rating_dir, set())
+
+    def _scan_tree(self, directory: Path, changed: set[Path]) -> None:
+        try:
+            mtime_ns = directory.stat().st_mtime_ns
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        files: dict[str, tuple[int, int]] = {}
+        subdirs: set[str] = set()
+        for entry in entries:
+            try:
+                if entry.is_dir() and not entry.name.startswith("."):
+                    subdirs.add(entry.name)
+                elif _is_rating_name(entry.name):
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+        previous = self._dirs.get(directory)
+        old_files = previous[1] if previous else {}
+        for name in set(files) | set(old_files):
+            if files.get(name) != old_files.get(name):
+                changed.add(directory / name)
+        self._dirs[directory] = (mtime_ns, files, subdirs)
+        if directory not in self._journals:
+            self._journals[directory] = self._journal_signature(directory)
+        for name in subdirs - (previous[2] if previous else set()):
+            self._scan_tree(directory / name, changed)
+
+    @staticmethod
+    def _journal_signature(directory: Path) -> tuple[int, int] | None:
+        try:
+            stat = (directory / JOURNAL_FILENAME).stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self) -> set[Path]:
+        changed: set[Path] = set()
+        if self.rating_dir not in self._dirs:
+            self._scan_tree(self.rating_dir, changed)
+        for directory in list(self._dirs):
+            try:
+                mtime_ns = directory.stat().st_mtime_ns
+            except OSError:
+                _mtime, files, _subdirs = self._dirs.pop(directory)
+                self._journals.pop(directory, None)
+                changed.update(directory / name for name in files)
+                continue
+            if mtime_ns != self._dirs[directory][0]:
+                self._scan_tree(directory, changed)
+            signature = self._journal_signature(directory)
+            if signature != self._journals.get(directory):
+                self._journals[directory] = signature
+                if signature is not None:
+                    changed.add(directory / JOURNAL_FILENAME)
+        return changed
+
+    def close(self) -> None:
+        self._dirs.clear()
+        self._journals.clear()
+
+
+class InotifyWatchBackend:
+    """Linux inotify through libc; raises OSError where it is unavailable."""
+
+    name = WATCH_BACKEND_INOTIFY
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, rating_dir: Path) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify 仅在 Linux 上可用")
+        self.rating_dir = Path(rating_dir)
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._watches: dict[int, Path] = {}
+        self._watch_tree(self.rating_dir, set())
+
+    def _watch(self, directory: Path) -> bool:
+        wd = self._add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            return False
+        self._watches[wd] = directory
+        return True
+
+    def _watch_tree(self, directory: Path, changed: set[Path]) -> None:
+        """Watch ``directory`` and below; files already there (created before
+        the watch existed) are reported as changed."""
+        if not self._watch(directory):
+            return
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.name.startswith(".") and entry.name != JOURNAL_FILENAME:
+                continue
+            if entry.is_dir():
+                self._watch_tree(Path(entry.path), changed)
+            elif _is_rating_name(entry.name) or entry.name == JOURNAL_FILENAME:
+                changed.add(Path(entry.path))
+
+    def poll(self) -> set[Path]:
+        changed: set[Path] = set()
+        if not self._watches:
+            # RatingFiles/ did not exist yet when the watcher started.
+            self._watch_tree(self.rating_dir, changed)
+            return changed
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _cookie, length = self._EVENT_HEADER.unpack_from(buffer, offset)
+                offset += self._EVENT_HEADER.size
+                name = buffer[offset : offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    changed.add(RESYNC)
+                    continue
+                if mask & self.IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None or not name:
+                    continue
+                path = directory / name
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO) and not name.startswith("."):
+                        self._watch_tree(path, changed)
+                elif _is_rating_name(name) or name == JOURNAL_FILENAME:
+                    changed.add(path)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._watches.clear()
+
+
+def create_watch_backend(rating_dir: Path, backend: str = WATCH_BACKEND_AUTO) -> PollingWatchBackend | InotifyWatchBackend:
+    if backend not in WATCH_BACKENDS:
+        raise ValueError(f"未知的评分监视方式: {backend}; 可用方式: {list(WATCH_BACKENDS)}")
+    if backend == WATCH_BACKEND_POLLING:
+        return PollingWatchBackend(rating_dir)
+    try:
+        return InotifyWatchBackend(rating_dir)
+    except (OSError, AttributeError) as exc:
+        if backend == WATCH_BACKEND_INOTIFY:
+            raise OSError(f"无法启用 inotify: {exc}") from exc
+        return PollingWatchBackend(rating_dir)
+
+
+@dataclass(frozen=True)
+class RatingChange:
+    module_name: str
+    ezqcid: str
+    rater: str
+    path: Path
+    removed: bool = False
+
+    def to_event_data(self) -> dict[str, Any]:
+        return {
+            "module_name": self.module_name,
+            "ezqcid": self.ezqcid,
+            "rater": self.rater,
+            "path": str(self.path),
+            "removed": self.removed,
+        }
+
+
+class RatingWatcher:
+    """Turns filesystem changes under ``RatingFiles/`` into ``RATING_SAVED``
+    events; call ``poll()`` periodically from the thread that owns the bus."""
+
+    def __init__(self, project: Project, event_bus: EventBus, backend: str = WATCH_BACKEND_AUTO) -> None:
+        self.project = project
+        self.event_bus = event_bus
+        self.backend_name = backend
+        self._backend: PollingWatchBackend | InotifyWatchBackend | None = None
+        self._journal_entries: dict[Path, dict[str, Any]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._backend is not None
+
+    def start(self) -> None:
+        if self._backend is not None:
+            return
+        rating_dir = self.project.rating_dir
+        self._backend = create_watch_backend(rating_dir, self.backend_name)
+        self.backend_name = self._backend.name
+        self._journal_entries = {
+            path: RatingJournal.for_directory(path.parent).snapshot().entries
+            for path in find_rating_journals(rating_dir)
+        }
+        if isinstance(self._backend, InotifyWatchBackend):
+            # Baseline: files present at start are not changes.
+            self._backend.poll()
+
+    def stop(self) -> None:
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+        self._journal_entries = {}
+
+    def poll(self) -> list[RatingChange]:
+        """Emit (and return) the changes since the previous poll; one event
+        per identity, the latest state wins."""
+        if self._backend is None:
+            return []
+        try:
+            paths = self._backend.poll()
+        except OSError as exc:
+            log_warning(f"评分目录监视失败: {exc}", "RatingWatcher")
+            return []
+        if RESYNC in paths:
+            self.event_bus.emit(Event(type=EventType.RATING_SAVED, source="RatingWatcher", data={"resync": True}))
+            paths.discard(RESYNC)
+
+        changes: dict[tuple[str, str, str], RatingChange] = {}
+        for path in sorted(paths):
+            if path.name == JOURNAL_FILENAME:
+                for change in self._journal_changes(path):
+                    changes[(change.module_name, change.ezqcid, change.rater)] = change
+                continue
+            identity = rating_identity_from_filename(path.name)
+            if identity is None:
+                continue
+            change = RatingChange(*identity, path=path, removed=not path.exists())
+            previous = changes.get(identity)
+            # A re-score renames the file: the new name is the one that counts.
+            if previous is None or previous.removed:
+                changes[identity] = change
+        for change in changes.values():
+            self.event_bus.emit(Event(type=EventType.RATING_SAVED, source="RatingWatcher", data=change.to_event_data()))
+        return list(changes.values())
+
+    def _journal_changes(self, journal_path: Path) -> list[RatingChange]:
+        directory = journal_path.parent
+        if journal_path.exists():
+            entries = RatingJournal.for_directory(directory).snapshot().entries
+        else:
+            entries = {}
+        previous = self._journal_entries.get(journal_path, {})
+        self._journal_entries[journal_path] = entries
+        return [
+            RatingChange(directory.parent.name, ezqcid, directory.name, journal_path)
+            for ezqcid, payload in sorted(entries.items())
+            if previous.get(ezqcid) != payload
+        ]
+
+
+__all__ = [
+    "DEFAULT_WATCH_INTERVAL_MS",
+    "InotifyWatchBackend",
+    "PollingWatchBackend",
+    "RatingChange",
+    "RatingWatcher",
+    "WATCH_BACKENDS",
+    "create_watch_backend",
+]
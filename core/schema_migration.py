@@ -0,0 +1,202 @@
+"""Bulk schema migration of a project's rating and settings files.
+
+P0-E stamps ``schema_version`` onto a payload only when it is saved, so
+untouched files stay at legacy v0 for ever. ``SchemaMigrator`` upgrades every
+rating JSON under ``RatingFiles/`` and the project's ``settings_<name>.json``
+to ``CURRENT_SCHEMA_VERSION`` (``models.schema``) in one pass:
+
+- each file is read, upgraded step by step through ``RATING_MIGRATIONS`` /
+  ``SETTINGS_MIGRATIONS`` (``{from_version: step}``; a schema bump adds one
+  step here instead of waiting for raters to re-save every subject) and
+  rewritten atomically, keeping its pretty/compact formatting;
+- files are handled in chunks on a worker pool; every chunk is one batched
+  durability window, and only once it is committed are its files appended to
+  the checkpoint (``Cache/schema_migration.checkpoint.json``), so an
+  interrupted run resumes after the last durable chunk;
+- files at or above the target version are never rewritten (no downgrade);
+- ``dry_run`` reports what would change without writing anything.
+
+Module archives are immutable and left alone; their members are read as-is.
+
+Layer: core. Stdlib + models/utils + the rating scan of ``RatingService``.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from core.rating_service import RatingService
+from models.project import Project
+from models.schema import CURRENT_SCHEMA_VERSION, schema_version_of
+from utils.file_utils import DURABILITY_BATCHED, DurabilityWindow, FileUtils
+
+
+CHECKPOINT_FILENAME = "schema_migration.checkpoint.json"
+DEFAULT_MIGRATION_WORKERS = 8
+MIGRATION_CHUNK_SIZE = 256
+
+MigrationStep = Callable[[dict[str, Any]], dict[str, Any]]
+
+
+def _stamp_v1(payload: dict[str, Any]) -> dict[str, Any]:
+    # v0 -> v1: same layout, the version key becomes explicit.
+    return payload
+
+
+RATING_MIGRATIONS: dict[int, MigrationStep] = {0: _stamp_v1}
+SETTINGS_MIGRATIONS: dict[int, MigrationStep] = {0: _stamp_v1}
+
+
+def upgrade_payload(
+    payload: dict[str, Any],
+    steps: dict[int, MigrationStep],
+    target: int = CURRENT_SCHEMA_VERSION,
+) -> dict[str, Any] | None:
+    """``payload`` upgraded to ``target``, or None when it already is there
+    (or newer: never downgrade)."""
+    version = schema_version_of(payload)
+    if version >= target:
+        return None
+    while version < target:
+        step = steps.get(version)
+        if step is None:
+            raise ValueError(f"缺少 schema v{version} -> v{version + 1} 的迁移步骤")
+        payload = step(payload)
+        version += 1
+        payload["schema_version"] = version
+    return payload
+
+
+@dataclass
+class MigrationReport:
+    total: int = 0
+    migrated: list[str] = field(default_factory=list)  # relative to the project dir
+    current: int = 0  # already at (or above) the target version
+    resumed: int = 0  # skipped via the checkpoint of an interrupted run
+    failed: list[tuple[str, str]] = field(default_factory=list)  # (relpath, reason)
+    dry_run: bool = False
+
+
+class SchemaMigrator:
+    def __init__(
+        self,
+        project: Project,
+        workers: int | None = None,
+        progress: Callable[[int, int], None] | None = None,
+        target: int = CURRENT_SCHEMA_VERSION,
+    ) -> None:
+        self.project = project
+        self.workers = DEFAULT_MIGRATION_WORKERS if workers is None else workers
+        # progress(done, total), called from the calling thread after each chunk
+        self.progress = progress
+        self.target = target
+        self.checkpoint_path = project.cache_dir / CHECKPOINT_FILENAME
+
+    # ---- targets ----
+
+    def targets(self) -> list[tuple[Path, dict[int, MigrationStep]]]:
+        """The settings file, then every rating file (sorted)."""
+        files: list[tuple[Path, dict[int, MigrationStep]]] = []
+        if self.project.settings_path.exists():
+            files.append((self.project.settings_path, SETTINGS_MIGRATIONS))
+        files.extend((path, RATING_MIGRATIONS) for path in RatingService.scan_rating_tree(self.project.rating_dir))
+        return files
+
+    def _relative(self, path: Path) -> str:
+        return path.relative_to(self.project.path).as_posix()
+
+    # ---- checkpoint ----
+
+    def _load_checkpoint(self) -> set[str]:
+        try:
+            data = FileUtils.safe_json_load(self.checkpoint_path)
+        except (OSError, ValueError):
+            return set()
+        if not isinstance(data, dict) or data.get("target") != self.target:
+            return set()
+        return set(data.get("done") or [])
+
+    def _save_checkpoint(self, done: set[str]) -> None:
+        FileUtils.safe_json_save(self.checkpoint_path, {"target": self.target, "done": sorted(done)}, indent=None)
+
+    # ---- run ----
+
+    def _migrate_file(
+        self,
+        path: Path,
+        steps: dict[int, MigrationStep],
+        dry_run: bool,
+        window: DurabilityWindow | None,
+    ) -> tuple[str, str | None]:
+        """``("migrated" | "current" | "failed", failure reason)``."""
+        try:
+            text = path.read_text(encoding="utf-8")
+            payload = FileUtils.json_codec.loads(text)
+            if not isinstance(payload, dict):
+                return "failed", "不是 JSON 对象"
+            upgraded = upgrade_payload(payload, steps, self.target)
+        except (OSError, ValueError) as exc:
+            return "failed", str(exc)
+        if upgraded is None:
+            return "current", None
+        if not dry_run:
+            # Keep the file's formatting: compact machine files stay compact.
+            indent = 4 if "\n" in text.strip() else None
+            with FileUtils.durability(window):
+                FileUtils.safe_json_save(path, upgraded, indent=indent)
+        return "migrated", None
+
+    def run(self, dry_run: bool = False) -> MigrationReport:
+        files = self.targets()
+        report = MigrationReport(total=len(files), dry_run=dry_run)
+        done = set() if dry_run else self._load_checkpoint()
+        pending = [(path, steps) for path, steps in files if self._relative(path) not in done]
+        report.resumed = len(files) - len(pending)
+
+        processed = report.resumed
+        for start in range(0, len(pending), MIGRATION_CHUNK_SIZE):
+            chunk = pending[start : start + MIGRATION_CHUNK_SIZE]
+            window = None if dry_run else DurabilityWindow(DURABILITY_BATCHED)
+
+            def migrate(item: tuple[Path, dict[int, MigrationStep]]) -> tuple[str, str | None]:
+                return self._migrate_file(item[0], item[1], dry_run, window)
+
+            if self.workers <= 1 or len(chunk) <= 1:
+                results = [migrate(item) for item in chunk]
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.workers, len(chunk))) as pool:
+                    results = list(pool.map(migrate, chunk))
+            if window is not None:
+                window.commit()
+
+            for (path, _), (outcome, reason) in zip(chunk, results):
+                relpath = self._relative(path)
+                if outcome == "failed":
+                    report.failed.append((relpath, reason or ""))
+                    continue
+                if outcome == "migrated":
+                    report.migrated.append(relpath)
+                else:
+                    report.current += 1
+                done.add(relpath)
+            if not dry_run:
+                self._save_checkpoint(done)
+            processed += len(chunk)
+            if self.progress is not None:
+                self.progress(processed, report.total)
+
+        if not dry_run and not report.failed:
+            self.checkpoint_path.unlink(missing_ok=True)
+        return report
+
+
+__all__ = [
+    "MigrationReport",
+    "RATING_MIGRATIONS",
+    "SETTINGS_MIGRATIONS",
+    "SchemaMigrator",
+    "upgrade_payload",
+]
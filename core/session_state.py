@@ -4,8 +4,8 @@ Replaces the dt.var/dt.tab session-state role of LegacyGUIStateAdapter /
 DataContainer WITHOUT depending on ProjectManager. Holds two DataFrame
 dictionaries (variable drafts + result tables) and a rating dict.
 
-Layer: core. Depends only on pandas + utils.logger. MUST NOT import tkinter
-or ProjectManager. Persistence (CSV writes) is NOT done here — that is the
+Layer: core. Depends only on pandas, utils.logger and core.rating_dict_view.
+MUST NOT import tkinter or ProjectManager. Persistence (CSV writes) is NOT done here — that is the
 caller's job (TableService.save_table). This class only manages the in-memory
 session buffers so the GUI can work with draft/intermediate tables.
 
@@ -19,6 +19,7 @@ from typing import Any
 
 import pandas as pd
 
+from core.rating_dict_view import LazyRatingDict
 from utils.logger import log_warning
 
 
@@ -41,7 +42,7 @@ class SessionState:
             "ezqc_qctable": None,
             "ezqc_qctable_filter": None,
         }
-        self.rating_dict: dict[str, dict[str, Any]] = {}
+        self.rating_dict: dict[str, dict[str, Any]] | LazyRatingDict = {}
 
     # ---- variable getters (return copies for isolation) ----
 
@@ -144,10 +145,16 @@ class SessionState:
             self._results[name] = df.copy() if df is not None else None
 
     def apply_loaded_ratings(self, loaded_ratings: Any) -> None:
-        """Inject ratings loaded by RatingService. Deep-copies to isolate."""
-        from copy import deepcopy
+        """Inject ratings loaded by RatingService. A lazy rating dict is copied
+        by reference (nothing to isolate but identities); a plain one is
+        deep-copied."""
+        rating_dict = loaded_ratings.rating_dict
+        if isinstance(rating_dict, LazyRatingDict):
+            self.rating_dict = rating_dict.copy()
+        else:
+            from copy import deepcopy
 
-        self.rating_dict = deepcopy(loaded_ratings.rating_dict)
+            self.rating_dict = deepcopy(rating_dict)
         qctable = getattr(loaded_ratings, "qctable", None)
         if qctable is not None:
             self._results["ezqc_qctable"] = qctable.copy()
@@ -0,0 +1,275 @@
+"""Export the aggregated results into one indexed SQLite file.
+
+``Table/ezqc_results.sqlite`` holds three tables, each keyed like its source:
+
+- ``subjects``: ``ezqc_all`` (key ``ezqcid``);
+- ``ratings_long``: one row per rating, the long table the pivot starts from
+  (key ``ezqcid, module_name, rater``);
+- ``qctable``: the ``ezqc_qctable`` wide table (key ``ezqcid``).
+
+Indexes cover ``ezqcid``, ``(module_name, rater)`` and the ``scoreN`` columns
+of the long table, so "the ratings of these subjects" or "count Bad scores per
+rater" are index lookups instead of a CSV load. The wide table is indexed on
+``ezqcid`` only: one index per ``<module>.<rater>.scoreN`` column would make
+every insert update hundreds of indexes, and the long table answers the same
+queries.
+
+The wide table has one column per module, rater and field. Past SQLite's
+column limit (``SQLITE_MAX_COLUMN``, 2000 by default) it is not exported: the
+stored one is dropped and the table's ``TableExport.skipped`` says why, while
+the subjects and the long table are still written. Limit the pivoted fields
+with ``settings["storage"]["qctable_fields"]`` (``core.rating_projection``) to
+get it back.
+
+Refresh is incremental. Every row carries ``_row_hash`` (a stable digest of its
+non-NULL values); an export diffs the new rows against the stored
+``(key, _row_hash)`` pairs and only deletes/inserts what changed. New columns
+(a new module, rater or field) are added with ``ALTER TABLE``; a table that
+lost or retyped a column, or whose key is not unique, is rebuilt instead.
+Everything is written with ``executemany`` in one transaction, so readers see
+the previous export or the new one, never a mix.
+
+Values are stored as INTEGER/REAL/TEXT by column dtype; NaN becomes NULL and
+non-scalar values (lists, dicts) are stored as JSON text.
+
+Layer: core. Stdlib sqlite3 + pandas.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+SQLITE_EXPORT_FILENAME = "ezqc_results.sqlite"
+SQLITE_EXPORT_SCHEMA_VERSION = 1
+
+SQLITE_TABLE_SUBJECTS = "subjects"
+SQLITE_TABLE_RATINGS_LONG = "ratings_long"
+SQLITE_TABLE_QCTABLE = "qctable"
+
+_META_TABLE = "_ezqc_export"
+_HASH_COLUMN = "_row_hash"
+_KEYS = {
+    SQLITE_TABLE_SUBJECTS: ("ezqcid",),
+    SQLITE_TABLE_RATINGS_LONG: ("ezqcid", "module_name", "rater"),
+    SQLITE_TABLE_QCTABLE: ("ezqcid",),
+}
+_SCORE_COLUMN = re.compile(r"^score\d+$")
+_DEFAULT_COLUMN_LIMIT = 2000  # SQLITE_MAX_COLUMN
+
+
+@dataclass
+class TableExport:
+    rows: int = 0
+    inserted: int = 0
+    deleted: int = 0
+    rebuilt: bool = False
+    # Why the table was not exported (too many columns), else None.
+    skipped: str | None = None
+
+
+@dataclass
+class SQLiteExportReport:
+    path: Path
+    tables: dict[str, TableExport] = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_type(dtype: Any) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _sql_value(value: Any) -> Any:
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if isinstance(value, (bool, int, str)):
+        return int(value) if isinstance(value, bool) else value
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str, sort_keys=True)
+    return str(value)
+
+
+def _column_limit(conn: sqlite3.Connection) -> int:
+    getlimit = getattr(conn, "getlimit", None)  # Python 3.11+
+    return getlimit(sqlite3.SQLITE_LIMIT_COLUMN) if getlimit is not None else _DEFAULT_COLUMN_LIMIT
+
+
+def _row_hash(columns: list[str], row: tuple[Any, ...]) -> int:
+    """Digest of the row's non-NULL cells, so adding a column leaves the
+    hashes of rows without a value in it unchanged."""
+    cells = sorted((column, value) for column, value in zip(columns, row) if value is not None)
+    digest = hashlib.blake2b(repr(cells).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class SQLiteExporter:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def export(
+        self,
+        subjects: pd.DataFrame | None,
+        long_table: pd.DataFrame | None = None,
+        wide_table: pd.DataFrame | None = None,
+        full: bool = False,
+    ) -> SQLiteExportReport:
+        """Write the given tables (None leaves that table as it is); ``full``
+        rebuilds them instead of diffing."""
+        started = time.perf_counter()
+        report = SQLiteExportReport(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {_META_TABLE} (name TEXT PRIMARY KEY, value TEXT)")
+                limit = _column_limit(conn)
+                for name, df in (
+                    (SQLITE_TABLE_SUBJECTS, subjects),
+                    (SQLITE_TABLE_RATINGS_LONG, long_table),
+                    (SQLITE_TABLE_QCTABLE, wide_table),
+                ):
+                    if df is None:
+                        continue
+                    if len(df.columns) + 1 > limit:  # + _row_hash
+                        conn.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+                        report.tables[name] = TableExport(
+                            rows=len(df),
+                            skipped=(
+                                f"{name} 有 {len(df.columns)} 列，超过 SQLite 单表 {limit} 列上限，未导出；"
+                                "请用 storage.qctable_fields 限定汇总的评分字段，或改查 ratings_long"
+                            ),
+                        )
+                        continue
+                    report.tables[name] = self._sync_table(conn, name, df, full)
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {_META_TABLE} (name, value) VALUES (?, ?)",
+                    [
+                        ("schema_version", str(SQLITE_EXPORT_SCHEMA_VERSION)),
+                        ("exported_at", time.strftime("%Y-%m-%d %H:%M:%S")),
+                    ],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        report.seconds = time.perf_counter() - started
+        return report
+
+    # ---- one table ----
+
+    @staticmethod
+    def _rows(df: pd.DataFrame) -> list[tuple[Any, ...]]:
+        names = [str(column) for column in df.columns]
+        columns = [[_sql_value(value) for value in df[column].tolist()] for column in df.columns]
+        rows = list(zip(*columns)) if columns else []
+        return [row + (_row_hash(names, row),) for row in rows]
+
+    @staticmethod
+    def _existing_columns(conn: sqlite3.Connection, name: str) -> dict[str, str]:
+        return {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({_quote(name)})")}
+
+    def _sync_table(self, conn: sqlite3.Connection, name: str, df: pd.DataFrame, full: bool) -> TableExport:
+        if "ezqcid" in df.columns:
+            df = df.assign(ezqcid=df["ezqcid"].astype(str))
+        keys = [key for key in _KEYS[name] if key in df.columns]
+        columns = [str(column) for column in df.columns] + [_HASH_COLUMN]
+        rows = self._rows(df)
+        result = TableExport(rows=len(rows))
+        key_positions = [columns.index(key) for key in keys]
+        unique = bool(keys) and not df.duplicated(subset=keys).any()
+        schema = {str(column): _sql_type(df[column].dtype) for column in df.columns}
+        schema[_HASH_COLUMN] = "INTEGER"
+        existing = self._existing_columns(conn, name)
+        # New columns (a new module, rater or field) are added in place; a
+        # dropped or retyped column needs a rebuild.
+        retyped = any(schema.get(column) != kind for column, kind in existing.items())
+        rebuild = full or not unique or not existing or retyped
+        insert = (
+            f"INSERT INTO {_quote(name)} ({', '.join(map(_quote, columns))}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        if rebuild:
+            self._create_table(conn, name, df, keys)
+            conn.executemany(insert, rows)
+            result.inserted, result.rebuilt = len(rows), True
+            return result
+
+        for column, kind in schema.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {_quote(name)} ADD COLUMN {_quote(column)} {kind}")
+                if name == SQLITE_TABLE_RATINGS_LONG and _SCORE_COLUMN.match(column):
+                    self._create_index(conn, name, [column])
+        key_sql = ", ".join(map(_quote, keys))
+        stored = {
+            tuple(row[:-1]): row[-1]
+            for row in conn.execute(f"SELECT {key_sql}, {_quote(_HASH_COLUMN)} FROM {_quote(name)}")
+        }
+        incoming = {tuple(row[i] for i in key_positions): row for row in rows}
+        stale = [key for key, digest in stored.items() if key not in incoming or incoming[key][-1] != digest]
+        fresh = [row for key, row in incoming.items() if stored.get(key) != row[-1]]
+        where = " AND ".join(f"{_quote(key)} = ?" for key in keys)
+        conn.executemany(f"DELETE FROM {_quote(name)} WHERE {where}", stale)
+        conn.executemany(insert, fresh)
+        result.deleted, result.inserted = len(stale), len(fresh)
+        return result
+
+    @staticmethod
+    def _create_table(conn: sqlite3.Connection, name: str, df: pd.DataFrame, keys: list[str]) -> None:
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+        definitions = [f"{_quote(column)} {_sql_type(df[column].dtype)}" for column in df.columns]
+        definitions.append(f"{_quote(_HASH_COLUMN)} INTEGER")
+        conn.execute(f"CREATE TABLE {_quote(name)} ({', '.join(definitions)})")
+        indexes: list[list[str]] = []
+        if keys:
+            indexes.append(keys)
+        if "ezqcid" in df.columns and keys != ["ezqcid"]:
+            indexes.append(["ezqcid"])
+        if {"module_name", "rater"} <= set(df.columns):
+            indexes.append(["module_name", "rater"])
+        if name == SQLITE_TABLE_RATINGS_LONG:
+            indexes.extend([str(column)] for column in df.columns if _SCORE_COLUMN.match(str(column)))
+        for index_columns in indexes:
+            SQLiteExporter._create_index(conn, name, index_columns)
+
+    @staticmethod
+    def _create_index(conn: sqlite3.Connection, name: str, columns: list[str]) -> None:
+        index_name = f"ix_{name}__{'__'.join(columns)}"
+        conn.execute(f"CREATE INDEX {_quote(index_name)} ON {_quote(name)} ({', '.join(map(_quote, columns))})")
+
+
+__all__ = [
+    "SQLITE_EXPORT_FILENAME",
+    "SQLITE_EXPORT_SCHEMA_VERSION",
+    "SQLiteExportReport",
+    "SQLiteExporter",
+    "SQLITE_TABLE_QCTABLE",
+    "SQLITE_TABLE_RATINGS_LONG",
+    "SQLITE_TABLE_SUBJECTS",
+    "TableExport",
+]
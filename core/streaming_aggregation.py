@@ -0,0 +1,269 @@
+"""Memory-bounded aggregation, one ``RatingFiles/<module>/<rater>`` at a time.
+
+``load_legacy_state`` keeps every ``Rating``, the long table, the wide table,
+``rating_dict`` and the qctable alive together, which peaks at several GB on
+a 200k-rating project. ``StreamingAggregator`` builds the same qctable from
+one (module, rater) subtree at a time:
+
+1. load that subtree's ratings (the pruned selective load; archives and
+   journals of the subtree are included);
+2. flatten them into an object-dtype long block, pivot it to a wide block
+   keyed by ``ezqcid`` and drop the ``.code`` columns;
+3. release the ratings and the long block before the next subtree.
+
+The wide blocks are joined on ``ezqcid`` once at the end and merged onto the
+subjects exactly like ``merge_subjects_with_rating_wide``. Column dtypes are
+resolved from the per-field value types seen across *all* blocks, as the
+single long table would have resolved them, so the result (and its CSV) equals
+the one-shot aggregation. Only the final table holds every cell; peak memory
+is roughly one subtree's ratings plus the wide blocks. Files lying outside any
+``<module>/<rater>`` directory are never scanned, so they are not listed as
+quarantined the way a full load lists them.
+
+``StreamingReport`` lists the blocks and reports peak memory: the
+``tracemalloc`` peak of the run (when ``trace_memory`` or when tracing is
+already on) and the process high-water mark (``ru_maxrss``, Unix only).
+
+Layer: core. pandas + core rating services.
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+
+from core.rating_archive import RatingArchive, find_rating_archives
+from core.rating_filter import RatingFilter
+from core.rating_ingest import IngestReport
+from core.rating_projection import RatingProjection
+from core.rating_service import MISSING, RatingService, long_column_dtype
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+_IDENTITY_KEYS = ["ezqcid", "module_name", "rater"]
+
+
+@dataclass(frozen=True)
+class WideBlock:
+    """The wide columns of one (module, rater) subtree, indexed by ezqcid.
+    Columns are ``(field, module, rater)`` tuples holding object values."""
+
+    module_name: str
+    rater: str
+    ratings: int
+    wide: pd.DataFrame
+
+
+@dataclass
+class StreamingReport:
+    blocks: list[tuple[str, str, int, int]] = field(default_factory=list)  # (module, rater, ratings, columns)
+    ingest: IngestReport = field(default_factory=IngestReport)
+    peak_traced_bytes: int | None = None
+    max_rss_bytes: int | None = None
+    timings: dict[str, float] = field(default_factory=dict)  # stage -> seconds
+
+    @property
+    def ratings(self) -> int:
+        return sum(count for _module, _rater, count, _columns in self.blocks)
+
+
+def _max_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024  # Linux reports KiB
+
+
+class StreamingAggregator:
+    def __init__(
+        self,
+        service: RatingService,
+        workers: int | None = None,
+        trace_memory: bool = False,
+        projection: RatingProjection | None = None,
+    ) -> None:
+        self.service = service
+        self.workers = workers
+        self.trace_memory = trace_memory
+        self.projection = projection
+        # field -> ({python type: sample value}, rows carrying the field)
+        self._field_types: dict[str, tuple[dict[type, Any], int]] = {}
+        self._rows = 0
+        self._pairs: set[tuple[str, str]] = set()  # subtrees that produced wide rows
+
+    def subtrees(self, rating_filter: RatingFilter | None = None) -> list[tuple[str, str]]:
+        """Sorted ``(module, rater)`` pairs with rating directories or
+        archived ratings."""
+        rating_dir = self.service.project.rating_dir
+        pairs: set[tuple[str, str]] = set()
+        if rating_dir.is_dir():
+            for module_dir in rating_dir.iterdir():
+                if not module_dir.is_dir() or module_dir.name.startswith("."):
+                    continue
+                pairs.update(
+                    (module_dir.name, rater_dir.name)
+                    for rater_dir in module_dir.iterdir()
+                    if rater_dir.is_dir() and not rater_dir.name.startswith(".")
+                )
+        for path in find_rating_archives(rating_dir):
+            pairs.update((entry.module_name, entry.rater) for entry in RatingArchive.for_path(path).entries())
+        if rating_filter is not None:
+            pairs = {
+                (module, rater)
+                for module, rater in pairs
+                if rating_filter.accepts_directory(0, module) and rating_filter.accepts_directory(1, rater)
+            }
+        return sorted(pairs)
+
+    def iter_blocks(
+        self,
+        rating_filter: RatingFilter | None = None,
+        report: StreamingReport | None = None,
+    ) -> Iterator[WideBlock]:
+        """Yield one wide block per (module, rater) subtree, loading only that
+        subtree each time."""
+        base = rating_filter or RatingFilter()
+        for module_name, rater in self.subtrees(rating_filter):
+            subtree = RatingFilter(
+                modules={module_name},
+                raters={rater},
+                ezqcids=base.ezqcids,
+                modified_since=base.modified_since,
+            )
+            records = self.service.load_all_rating_records(workers=self.workers, rating_filter=subtree)
+            if report is not None:
+                self._merge_ingest(report.ingest, self.service.last_ingest_report)
+            count = len(records)
+            wide = self._wide_block(records) if records else pd.DataFrame()
+            del records
+            if report is not None:
+                report.blocks.append((module_name, rater, count, len(wide.columns)))
+            if not wide.empty:
+                self._pairs.add((module_name, rater))
+                yield WideBlock(module_name, rater, count, wide)
+
+    @staticmethod
+    def _merge_ingest(total: IngestReport, part: IngestReport | None) -> None:
+        if part is None:
+            return
+        total.scanned += part.scanned
+        total.parsed += part.parsed
+        total.archived += part.archived
+        total.loaded += part.loaded
+        total.quarantined.extend(part.quarantined)
+        for stage, seconds in part.timings.items():
+            total.timings[stage] = total.timings.get(stage, 0.0) + seconds
+
+    def _wide_block(self, records: list) -> pd.DataFrame:
+        columns = self.service.flat_record_columns(records, self.projection)
+        self._rows += len(records)
+        for key, values in columns.items():
+            samples, present = self._field_types.get(key, ({}, 0))
+            for value in values:
+                if value is not MISSING:
+                    present += 1
+                    samples.setdefault(type(value), value)
+            self._field_types[key] = (samples, present)
+        long_df = pd.DataFrame(
+            {
+                key: pd.Series([np.nan if value is MISSING else value for value in values], dtype=object)
+                for key, values in columns.items()
+            }
+        )
+        del columns
+        # Same steps as RatingService.long_table_to_wide, on one subtree.
+        duplicates = long_df[long_df.duplicated(subset=_IDENTITY_KEYS, keep=False)]
+        if not duplicates.empty:
+            offenders = duplicates[_IDENTITY_KEYS].drop_duplicates().astype(str).agg("/".join, axis=1).tolist()
+            raise ValueError(f"重复的评分身份(ezqcid/module/rater),F-RAT-3 不变量被破坏: {offenders[:5]}")
+        long_df = long_df.dropna(subset=_IDENTITY_KEYS)
+        value_columns = [col for col in long_df.columns if col not in _IDENTITY_KEYS]
+        long_df = long_df.dropna(subset=value_columns, how="all")
+        long_df["ezqcid"] = long_df["ezqcid"].astype(str)
+        wide = long_df.set_index(_IDENTITY_KEYS).unstack(["module_name", "rater"]).dropna(axis=1, how="all")
+        # merge_subjects_with_rating_wide drops these anyway; never keep them.
+        return wide[[col for col in wide.columns if ".code" not in f"{col[1]}.{col[2]}.{col[0]}"]]
+
+    def _field_dtype(self, key: str, wide: pd.DataFrame) -> Any:
+        """dtype of ``key``'s wide columns after the one-shot pivot.
+
+        The long column gets ``long_column_dtype`` over all ratings; unstack
+        then upcasts an int/bool field (int -> float64, bool -> object) as a
+        whole when any (ezqcid, module, rater) cell of it has no rating. Such
+        fields cannot hold NaN values, so a gap is a NaN cell or a subtree
+        with no column for the field.
+        """
+        samples, present = self._field_types[key]
+        dtype = long_column_dtype(samples, present < self._rows)
+        if not isinstance(dtype, np.dtype) or dtype.kind not in "iub":
+            return dtype
+        columns = wide[key]
+        if len(columns.columns) < len(self._pairs) or columns.isna().any().any():
+            return np.dtype(np.float64) if dtype.kind in "iu" else object
+        return dtype
+
+    def _combine(self, blocks: list[pd.DataFrame]) -> pd.DataFrame:
+        """The ``long_table_to_wide`` result for the union of ``blocks``."""
+        if not blocks:
+            return pd.DataFrame()
+        wide = pd.concat(blocks, axis=1, join="outer", sort=True).sort_index(axis=1)
+        blocks.clear()
+        dtypes = {key: self._field_dtype(key, wide) for key in wide.columns.get_level_values(0).unique()}
+        converted: dict[str, pd.Series] = {}
+        for column in wide.columns:
+            values = wide[column]
+            dtype = dtypes[column[0]]
+            if dtype != object:
+                values = values.astype(dtype)
+            converted[f"{column[1]}.{column[2]}.{column[0]}"] = values
+        del wide
+        result = pd.DataFrame(converted)
+        result.index.name = "ezqcid"
+        result = result.reset_index()
+        result["ezqcid"] = result["ezqcid"].astype(str)
+        return result
+
+    def aggregate(
+        self,
+        subjects: pd.DataFrame,
+        rating_filter: RatingFilter | None = None,
+    ) -> tuple[pd.DataFrame, StreamingReport]:
+        """The qctable ``load_legacy_state`` would build, plus the report."""
+        report = StreamingReport()
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._field_types, self._rows, self._pairs = {}, 0, set()
+        try:
+            started = time.perf_counter()
+            blocks = [block.wide for block in self.iter_blocks(rating_filter, report)]
+            gc.collect()
+            loaded = time.perf_counter()
+            wide = self._combine(blocks)
+            qctable = self.service.merge_subjects_with_rating_wide(wide, subjects)
+            del wide
+            report.timings["blocks"] = loaded - started
+            report.timings["join"] = time.perf_counter() - loaded
+            if tracemalloc.is_tracing():
+                report.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+        report.max_rss_bytes = _max_rss_bytes()
+        return qctable, report
+
+
+__all__ = ["StreamingAggregator", "StreamingReport", "WideBlock"]
@@ -1,19 +1,79 @@
+"""Project table persistence (``Table/ezqc_*.csv``).
+
+CSV stays the source of truth and compatibility export (ADR-004). A project
+may additionally keep a columnar copy of every table (``settings["storage"]
+["table_format"]``) in Feather or Parquet. Columnar copies load without CSV type
+inference and keep dtypes exactly (e.g. numeric-looking ``ezqcid`` strings).
+Without pyarrow the project stays CSV-only: ``Table/`` is shared between
+raters, so no format that can execute code on load (pickle) is ever read.
+
+Next to each copy, ``.<table>.columnar.json`` records the format written and
+the ``(size, mtime_ns)`` of the CSV it was written with. A copy is only used
+while its CSV still has exactly that signature, so a CSV edited by hand (or by
+an older EasyQC) always wins over a stale copy, even within the filesystem's
+mtime granularity.
+"""
+
 from __future__ import annotations
 
+import importlib.util
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Final
+from typing import Callable, Final, Mapping
 
 import pandas as pd
 
+from core.integrity_manifest import TABLE_MANIFEST_FILENAME, IntegrityManifest, IntegrityReport
+from core.sqlite_export import SQLITE_EXPORT_FILENAME, SQLiteExporter, SQLiteExportReport
 from models.project import Project
+from models.storage import (
+    TABLE_FORMAT_AUTO,
+    TABLE_FORMAT_CSV,
+    TABLE_FORMAT_FEATHER,
+    TABLE_FORMAT_PARQUET,
+    StorageConfig,
+)
+from utils.file_utils import DURABILITY_BATCHED, DURABILITY_RELAXED, FileUtils
 
 
 TABLE_ALL: Final = "ezqc_all"
 TABLE_QCTABLE: Final = "ezqc_qctable"
 TABLE_QCTABLE_FILTER: Final = "ezqc_qctable_filter"
 
+COLUMNAR_SUFFIXES: Final = {
+    TABLE_FORMAT_FEATHER: ".feather",
+    TABLE_FORMAT_PARQUET: ".parquet",
+}
+COLUMNAR_SOURCE_SUFFIX: Final = ".columnar.json"
+_ARROW_FORMATS: Final = frozenset({TABLE_FORMAT_FEATHER, TABLE_FORMAT_PARQUET})
+
+
+@lru_cache(maxsize=None)
+def pyarrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def resolve_table_format(table_format: str) -> str:
+    """The format actually written for a configured ``table_format``.
+
+    Columnar formats degrade to CSV only when pyarrow is not installed.
+    """
+    if table_format == TABLE_FORMAT_AUTO:
+        return TABLE_FORMAT_FEATHER if pyarrow_available() else TABLE_FORMAT_CSV
+    if table_format in _ARROW_FORMATS and not pyarrow_available():
+        return TABLE_FORMAT_CSV
+    if table_format != TABLE_FORMAT_CSV and table_format not in COLUMNAR_SUFFIXES:
+        raise ValueError(f"未知的表格存储格式: {table_format}")
+    return table_format
+
+
+_READERS: Final[dict[str, Callable[[Path], pd.DataFrame]]] = {
+    TABLE_FORMAT_FEATHER: pd.read_feather,
+    TABLE_FORMAT_PARQUET: pd.read_parquet,
+}
+
 
 @dataclass
 class LoadedProjectTables:
@@ -22,13 +82,69 @@ class LoadedProjectTables:
 
 
 class TableService:
+    def __init__(self, table_format: str | None = None) -> None:
+        # Overrides the per-project ``storage.table_format`` when set.
+        self.table_format_override = table_format
+        # settings path -> (settings (mtime_ns, size), resolved format)
+        self._table_formats: dict[Path, tuple[tuple[int, int] | None, str]] = {}
+
+    def table_format(self, project: Project) -> str:
+        """Resolved write format for ``project`` (see ``resolve_table_format``).
+
+        The settings file is parsed once and again only after it changed.
+        """
+        if self.table_format_override:
+            return resolve_table_format(self.table_format_override)
+        try:
+            stat = project.settings_path.stat()
+            signature: tuple[int, int] | None = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        cached = self._table_formats.get(project.settings_path)
+        if cached is None or cached[0] != signature:
+            table_format = resolve_table_format(StorageConfig.for_project(project).table_format)
+            cached = self._table_formats[project.settings_path] = (signature, table_format)
+        return cached[1]
+
     def table_path(self, project: Project, table_type: str) -> Path:
         return project.table_dir / f"{table_type}.csv"
 
+    def columnar_path(self, project: Project, table_type: str, table_format: str) -> Path:
+        return project.table_dir / f"{table_type}{COLUMNAR_SUFFIXES[table_format]}"
+
+    def columnar_source_path(self, project: Project, table_type: str) -> Path:
+        return project.table_dir / f".{table_type}{COLUMNAR_SOURCE_SUFFIX}"
+
+    def fresh_columnar_path(self, project: Project, table_type: str) -> tuple[Path, str] | None:
+        """The columnar copy written from the current CSV: its metadata must
+        record the CSV's exact ``(size, mtime_ns)``."""
+        try:
+            stat = self.table_path(project, table_type).stat()
+            source = FileUtils.safe_json_load(self.columnar_source_path(project, table_type))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(source, dict) or (source.get("csv_size"), source.get("csv_mtime_ns")) != (
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            return None
+        table_format = source.get("format")
+        if table_format not in COLUMNAR_SUFFIXES or not pyarrow_available():
+            return None
+        path = self.columnar_path(project, table_type, table_format)
+        return (path, table_format) if path.exists() else None
+
     def load_table(self, project: Project, table_type: str) -> pd.DataFrame | None:
         path = self.table_path(project, table_type)
         if not path.exists():
             return None
+        columnar = self.fresh_columnar_path(project, table_type)
+        if columnar is not None:
+            columnar_path, table_format = columnar
+            try:
+                return _READERS[table_format](columnar_path)
+            except Exception:
+                pass  # unreadable copy: the CSV is authoritative anyway
         return pd.read_csv(path, encoding="utf-8")
 
     def save_table(
@@ -44,19 +160,109 @@ class TableService:
         if delete:
             if path.exists():
                 path.unlink()
+            self._remove_columnar(project, table_type)
             return
 
         if df is None:
             return
 
+        table_format = self.table_format(project)
+        self._atomic_save(path, lambda temp_path: df.to_csv(temp_path, index=False, encoding="utf-8"))
+        self._remove_columnar(project, table_type, keep=table_format)
+        if table_format != TABLE_FORMAT_CSV:
+            # Regenerable from the CSV, so never worth an fsync.
+            with FileUtils.durability(DURABILITY_RELAXED):
+                if self._save_columnar(project, table_type, df, table_format):
+                    stat = path.stat()
+                    FileUtils.safe_json_save(
+                        self.columnar_source_path(project, table_type),
+                        {"format": table_format, "csv_size": stat.st_size, "csv_mtime_ns": stat.st_mtime_ns},
+                        indent=None,
+                    )
+
+    def save_tables(self, project: Project, tables: Mapping[str, pd.DataFrame | None]) -> None:
+        """Save several tables in one batched durability window (one fsync
+        pass at the end instead of one per table)."""
+        with FileUtils.durability(DURABILITY_BATCHED):
+            for table_type, df in tables.items():
+                self.save_table(project, table_type, df)
+
+    @staticmethod
+    def _atomic_save(path: Path, write: Callable[[Path], object]) -> None:
         temp_path = path.with_name(f".{path.name}.tmp.{os.getpid()}")
         try:
-            df.to_csv(temp_path, index=False, encoding="utf-8")
-            os.replace(temp_path, path)
+            write(temp_path)
+            FileUtils.replace_written_file(temp_path, path)
         finally:
             if temp_path.exists():
                 temp_path.unlink()
 
+    def _save_columnar(self, project: Project, table_type: str, df: pd.DataFrame, table_format: str) -> bool:
+        """Write the copy; returns whether one was written."""
+        # CSV round trips drop the index, so the copy does too.
+        frame = df.reset_index(drop=True)
+        path = self.columnar_path(project, table_type, table_format)
+        writer = frame.to_feather if table_format == TABLE_FORMAT_FEATHER else frame.to_parquet
+        try:
+            self._atomic_save(path, writer)
+        except (TypeError, ValueError):
+            # Arrow cannot type mixed-value object columns: keep the CSV only.
+            path.unlink(missing_ok=True)
+            return False
+        return True
+
+    def _remove_columnar(self, project: Project, table_type: str, keep: str | None = None) -> None:
+        """Drop the copies in other formats than ``keep`` and the copy
+        metadata (a kept copy is only fresh again once it is rewritten)."""
+        self.columnar_source_path(project, table_type).unlink(missing_ok=True)
+        for table_format in COLUMNAR_SUFFIXES:
+            if table_format != keep:
+                self.columnar_path(project, table_type, table_format).unlink(missing_ok=True)
+
+    def verify_tables(
+        self,
+        project: Project,
+        full: bool = False,
+        accept: bool = False,
+        workers: int | None = None,
+    ) -> IntegrityReport:
+        """Check ``Table/`` (CSVs and columnar copies) against its integrity
+        manifest; see ``RatingService.verify_rating_files``."""
+        manifest = IntegrityManifest(
+            project.table_dir,
+            project.cache_dir / TABLE_MANIFEST_FILENAME,
+            workers=workers,
+            # A derived export, rewritten by every refresh.
+            exclude_names=(SQLITE_EXPORT_FILENAME, f"{SQLITE_EXPORT_FILENAME}-journal"),
+        )
+        return manifest.verify(full=full, accept=accept)
+
+    def sqlite_export_path(self, project: Project) -> Path:
+        return project.table_dir / SQLITE_EXPORT_FILENAME
+
+    def export_sqlite(
+        self,
+        project: Project,
+        long_table: pd.DataFrame | None = None,
+        subjects: pd.DataFrame | None = None,
+        qctable: pd.DataFrame | None = None,
+        path: str | Path | None = None,
+        full: bool = False,
+    ) -> SQLiteExportReport:
+        """Refresh the indexed SQLite export (``core.sqlite_export``).
+
+        ``subjects`` / ``qctable`` default to the saved ``ezqc_all`` /
+        ``ezqc_qctable``; the long table only exists in memory, so without
+        ``long_table`` the exported one is left as it is
+        (``RatingService.export_sqlite`` passes it).
+        """
+        if subjects is None:
+            subjects = self.load_table(project, TABLE_ALL)
+        if qctable is None:
+            qctable = self.load_table(project, TABLE_QCTABLE)
+        target = Path(path) if path is not None else self.sqlite_export_path(project)
+        return SQLiteExporter(target).export(subjects, long_table, qctable, full=full)
+
     def load_all_tables(self, project: Project) -> dict[str, pd.DataFrame]:
         tables: dict[str, pd.DataFrame] = {}
         if not project.table_dir.exists():
@@ -101,9 +307,13 @@ class TableService:
 
 
 __all__ = [
+    "COLUMNAR_SOURCE_SUFFIX",
+    "COLUMNAR_SUFFIXES",
     "TABLE_ALL",
     "TABLE_QCTABLE",
     "TABLE_QCTABLE_FILTER",
     "LoadedProjectTables",
     "TableService",
+    "pyarrow_available",
+    "resolve_table_format",
 ]
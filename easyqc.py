@@ -32,6 +32,17 @@ def parse_arguments():
 使用示例:
   python3 easyqc.py                                    # 启动GUI界面
   python3 easyqc.py project module rater ezqcid        # 直接打开QC页面
+  python3 easyqc.py --migrate-rating-layout sharded project   # 迁移评分文件目录布局
+  python3 easyqc.py --convert-rating-filenames stable project # 转换为稳定评分文件名
+  python3 easyqc.py --archive-module module project           # 归档已完成模块的评分文件
+  python3 easyqc.py --restore-module module project           # 从归档恢复模块的评分文件
+  python3 easyqc.py --verify-integrity quick project          # 校验评分文件与数据表完整性
+  python3 easyqc.py --accept-integrity project                 # 以当前文件更新完整性基线
+  python3 easyqc.py --sync-ratings both project /media/usb/copy # 与项目副本离线同步评分
+  python3 easyqc.py --migrate-schema project                   # 批量升级评分与设置文件的 schema 版本
+  python3 easyqc.py --remap-ezqcids mapping.csv project        # 按映射表批量重命名受试者ID
+  python3 easyqc.py --rollback-remap project                   # 回滚未完成的受试者ID重映射
+  python3 easyqc.py --export-sqlite incremental project        # 导出汇总结果到带索引的 SQLite 文件
   
 参数说明:
   project   - 项目名称
@@ -46,9 +57,204 @@ def parse_arguments():
         nargs='*', 
         help='可选参数：project module rater ezqcid'
     )
+    parser.add_argument(
+        '--migrate-rating-layout',
+        choices=['flat', 'sharded'],
+        help='将项目的评分文件迁移到指定目录布局（参数：project）'
+    )
+    parser.add_argument(
+        '--convert-rating-filenames',
+        choices=['stable', 'legacy'],
+        help='将项目的评分文件批量重命名为稳定/旧版文件名（参数：project）'
+    )
+    parser.add_argument(
+        '--archive-module',
+        metavar='MODULE',
+        help='将已完成模块的评分文件打包为单个归档（参数：project）'
+    )
+    parser.add_argument(
+        '--restore-module',
+        metavar='MODULE',
+        help='将模块的评分归档解包恢复为评分文件（参数：project）'
+    )
+    parser.add_argument(
+        '--verify-integrity',
+        choices=['quick', 'full'],
+        help='按完整性清单校验评分文件与数据表；quick 只重新哈希有变化的文件（参数：project）'
+    )
+    parser.add_argument(
+        '--accept-integrity',
+        action='store_true',
+        help='以当前评分文件与数据表更新完整性清单（参数：project）'
+    )
+    parser.add_argument(
+        '--sync-ratings',
+        choices=['pull', 'push', 'both'],
+        help='与另一项目副本离线同步评分，按评分时间解决冲突（参数：project path）'
+    )
+    parser.add_argument(
+        '--migrate-schema',
+        action='store_true',
+        help='将项目的全部评分与设置文件升级到当前 schema 版本，可中断续跑（参数：project）'
+    )
+    parser.add_argument(
+        '--remap-ezqcids',
+        metavar='MAPPING',
+        help='按 old_ezqcid,new_ezqcid 映射表批量重命名数据表与评分文件中的受试者ID（参数：project）'
+    )
+    parser.add_argument(
+        '--rollback-remap',
+        action='store_true',
+        help='按回滚日志撤销未完成的受试者ID重映射（参数：project）'
+    )
+    parser.add_argument(
+        '--export-sqlite',
+        choices=['incremental', 'full'],
+        help='将受试者表、评分长表与 QC 宽表导出到 Table/ezqc_results.sqlite；incremental 只写入有变化的行（参数：project）'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='与 --sync-ratings / --migrate-schema / --remap-ezqcids 一起使用：只报告将要进行的修改，不写入'
+    )
     
     return parser.parse_args()
 
+
+def run_maintenance_command(args):
+    """
+    执行命令行维护命令；未请求维护命令时返回 None
+    """
+    from core.cli_service import (
+        ProjectMaintenanceError,
+        archive_module,
+        convert_rating_filenames,
+        export_sqlite,
+        migrate_rating_layout,
+        migrate_schema,
+        remap_ezqcids,
+        restore_module,
+        rollback_ezqcid_remap,
+        sync_ratings,
+        verify_integrity,
+    )
+
+    registry_path = project_root / "projects.json"
+    arity = 1
+    if args.migrate_rating_layout is not None:
+        usage = "--migrate-rating-layout {flat,sharded} project"
+        def command(project):
+            moved = migrate_rating_layout(project, args.migrate_rating_layout, registry_path)
+            return f"已迁移 {moved} 个评分文件到 {args.migrate_rating_layout} 布局"
+    elif args.convert_rating_filenames is not None:
+        usage = "--convert-rating-filenames {stable,legacy} project"
+        def command(project):
+            renamed = convert_rating_filenames(project, args.convert_rating_filenames == "stable", registry_path)
+            return f"已重命名 {renamed} 个评分文件为 {args.convert_rating_filenames} 文件名"
+    elif args.archive_module is not None:
+        usage = "--archive-module module project"
+        def command(project):
+            archived = archive_module(project, args.archive_module, registry_path)
+            return f"已归档模块 {args.archive_module} 的 {archived} 个评分"
+    elif args.restore_module is not None:
+        usage = "--restore-module module project"
+        def command(project):
+            restored = restore_module(project, args.restore_module, registry_path)
+            return f"已从归档恢复模块 {args.restore_module} 的 {restored} 个评分文件"
+    elif args.verify_integrity is not None or args.accept_integrity:
+        accept = bool(args.accept_integrity)
+        usage = "--accept-integrity project" if accept else "--verify-integrity {quick,full} project"
+        def command(project):
+            reports = verify_integrity(project, registry_path, full=args.verify_integrity == "full", accept=accept)
+            lines = [
+                f"{root}: 新增 {len(report.added)}，删除 {len(report.removed)}，修改 {len(report.modified)}，"
+                f"损坏 {len(report.corrupt)}，未变 {report.unchanged}（重新哈希 {report.hashed}）"
+                for root, report in reports.items()
+            ]
+            if not accept:
+                problems = list(dict.fromkeys(
+                    f"{root}/{relpath}"
+                    for root, report in reports.items()
+                    for relpath in report.removed + report.modified + report.corrupt
+                ))
+                if problems:
+                    raise ProjectMaintenanceError("\n".join(lines + ["完整性校验未通过:"] + problems))
+            return "\n".join(lines)
+    elif args.sync_ratings is not None:
+        usage = "--sync-ratings {pull,push,both} [--dry-run] project path"
+        arity = 2
+        def command(project, other_path):
+            reports = sync_ratings(project, other_path, args.sync_ratings, registry_path, dry_run=args.dry_run)
+            prefix = "（试运行）" if args.dry_run else ""
+            lines = [
+                f"{prefix}{direction}: 新增 {len(report.copied)}，更新 {len(report.updated)}，"
+                f"保留较新 {len(report.kept_newer)}，冲突 {len(report.conflicts)}，"
+                f"重复跳过 {len(report.duplicates)}，未变 {report.unchanged}"
+                for direction, report in reports.items()
+            ]
+            lines.extend(
+                f"冲突（时间相同内容不同，保留目标）: {label}"
+                for report in reports.values()
+                for label in report.conflicts
+            )
+            return "\n".join(lines)
+    elif args.migrate_schema:
+        usage = "--migrate-schema [--dry-run] project"
+        def command(project):
+            def progress(done, total):
+                print(f"\r已处理 {done}/{total}", end="", flush=True)
+            report = migrate_schema(project, registry_path, dry_run=args.dry_run, progress=progress)
+            print()
+            prefix = "（试运行）" if args.dry_run else ""
+            lines = [
+                f"{prefix}共 {report.total} 个文件：升级 {len(report.migrated)}，已是最新 {report.current}，"
+                f"断点跳过 {report.resumed}，失败 {len(report.failed)}"
+            ]
+            lines.extend(f"失败: {relpath}: {reason}" for relpath, reason in report.failed)
+            if report.failed:
+                raise ProjectMaintenanceError("\n".join(lines + ["修复后重新运行即可从断点继续"]))
+            return "\n".join(lines)
+    elif args.remap_ezqcids is not None:
+        usage = "--remap-ezqcids mapping.csv [--dry-run] project"
+        def command(project):
+            report = remap_ezqcids(project, args.remap_ezqcids, registry_path, dry_run=args.dry_run)
+            prefix = "（试运行）" if args.dry_run else ""
+            lines = [f"{prefix}重映射评分文件 {report.ratings} 个"]
+            lines.extend(f"{prefix}{table_type}.csv: 重映射 {rows} 行" for table_type, rows in report.tables.items())
+            return "\n".join(lines)
+    elif args.rollback_remap:
+        usage = "--rollback-remap project"
+        def command(project):
+            if rollback_ezqcid_remap(project, registry_path):
+                return "已回滚未完成的受试者ID重映射"
+            return "没有需要回滚的受试者ID重映射"
+    elif args.export_sqlite is not None:
+        usage = "--export-sqlite {incremental,full} project"
+        def command(project):
+            report = export_sqlite(project, registry_path, full=args.export_sqlite == "full")
+            lines = [
+                export.skipped
+                or f"{name}: {export.rows} 行"
+                + ("（重建）" if export.rebuilt else f"，写入 {export.inserted}，删除 {export.deleted}")
+                for name, export in report.tables.items()
+            ]
+            return "\n".join([f"已导出到 {report.path}（{report.seconds:.2f} 秒）"] + lines)
+    else:
+        return None
+
+    if len(args.args) != arity:
+        print(f"用法：python3 easyqc.py {usage}")
+        return False
+    try:
+        message = command(*args.args)
+    except ProjectMaintenanceError as e:
+        log_error(str(e))
+        print(f"错误：{e}")
+        return False
+    log_info(message)
+    print(message)
+    return True
+
 @log_function("EasyQC")
 def open_qcpage_from_shell(project, module, rater, ezqcid):
     """
@@ -197,6 +403,12 @@ def main():
     try:
         # 解析命令行参数
         args = parse_arguments()
+
+        maintenance_result = run_maintenance_command(args)
+        if maintenance_result is not None:
+            if not maintenance_result:
+                sys.exit(1)
+            return
         
         # 检查是否有4个参数（project, module, rater, ezqcid）
         if len(args.args) == 4:
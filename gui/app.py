@@ -7,7 +7,7 @@ from pathlib import Path
 from core.code_executor import CodeExecutor
 from core.event_bus import EventBus
 from core.project_service import ProjectService
-from core.rating_service import RatingService
+from core.rating_service import DEFAULT_INGEST_WORKERS, RatingService
 from core.table_service import TableService
 from core.table_transform import TableTransformEngine
 from gui.main_window import EasyQCApp as LegacyEasyQCApp
@@ -33,7 +33,7 @@ class EasyQCApp:
             registry_path or Path(__file__).parent.parent / "projects.json",
             event_bus=event_bus,
         )
-        rating_service = RatingService(project_service)
+        rating_service = RatingService(project_service, use_index=True, workers=DEFAULT_INGEST_WORKERS)
         table_service = TableService()
         code_executor = CodeExecutor()
         table_transform = TableTransformEngine(max_rows=5000, max_columns=200)
@@ -42,6 +42,7 @@ import os
 
 from utils.logger import log_info, log_error, log_warning, log_exception, log_debug
 from core.code_executor import CodeExecutor, CodeExecutorError
+from models.storage import StorageConfig
 
 from gui.qc_page import QCPageController, QCPageRuntimeContext
 from gui.state_bridge import GUIStateBridge
@@ -606,23 +607,19 @@ class gui_qcpage:
             if self._runtime_tables():
                 data = self._ensure_controller().module_subject_rows(self._runtime_tables(), module['name'])
                 log_debug(f"找到数据表，行数: {len(data)}")
-                
+
+                # 一次目录列举，从文件名解析 score1/tag1，不逐个 glob + 解析 JSON
+                if rater is None or dir_module_rater is None:
+                    summaries = {}
+                else:
+                    summaries = controller.rater_dir_rating_summaries(module, dir_module_rater, rater)
+
                 for row_num, (index, row) in enumerate(data.iterrows(), 1):
 
                     ezqcid = row.get('ezqcid', '')
-                    if rater is None:
-                        rating_files = []
-                        rating = None
-                    else:
-                        rating_files, rating = controller.load_first_legacy_module_rating(
-                            module,
-                            dir_module_rater,
-                            ezqcid,
-                            rater,
-                        )
-                    if rating_files and rating is not None:
-                        score1 = rating['scores']['1'].get('value','')
-                        tag1 = rating['tags']['1'].get('value','')
+                    summary = summaries.get(str(ezqcid))
+                    if summary is not None:
+                        score1, tag1, _rating_file = summary
                     else:
                         score1 = ''
                         tag1 = ''
@@ -700,7 +697,10 @@ class gui_qcpage:
                 module_rater_dir = self._set_module_rater_dir(module['name'], rater)
             if not os.path.exists(module_rater_dir):
                 os.makedirs(module_rater_dir)
-            file_path = self._ensure_controller().save_legacy_module_rating(module, module_rater_dir)
+            storage = StorageConfig.from_settings(self._runtime_settings())
+            file_path = self._ensure_controller().save_legacy_module_rating(
+                module, module_rater_dir, storage=storage
+            )
 
             log_info(f"评分保存完成，文件: {file_path}")
         except Exception as e:
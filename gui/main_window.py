@@ -71,6 +71,8 @@ from utils.logger import log_info, log_error, log_warning, log_exception, log_de
 
 from core.table_service import TABLE_QCTABLE
 from core.event_bus import EventBus, EventType
+from core.qctable_updater import DEFAULT_PERSIST_DELAY, QCTableUpdater
+from core.rating_watcher import DEFAULT_WATCH_INTERVAL_MS, RatingWatcher
 from utils.file_utils import FileUtils
 from utils.data_manager import DataManager
 
@@ -783,6 +785,9 @@ class EasyQCApp:
         if active_project is not None and active_project.name == project.name and active_project.path == project.path:
             return self.rating_service
 
+        for_project = getattr(self.rating_service, "for_project", None)
+        if callable(for_project):
+            return for_project(project)
         return self.rating_service.__class__(project)
 
     def _sync_legacy_tables_from_service(self):
@@ -828,9 +833,21 @@ class EasyQCApp:
         self.teardown_event_bus()
         self.gui_state.save_project_state()
         # self.ProjM.save_ratings()
+        self._compact_rating_journals()
         self.root.destroy()
         log_info("应用退出", "EasyQCApp")
 
+    def _compact_rating_journals(self) -> None:
+        """Materialise pending journal saves (journal storage backend) so the
+        project is left as plain rating files. Best effort: never blocks quit."""
+        compact = getattr(getattr(self, "rating_service", None), "compact_rating_journals", None)
+        if compact is None:
+            return
+        try:
+            compact()
+        except Exception as e:
+            log_warning(f"评分日志压缩失败: {e}", "EasyQCApp")
+
     # ---- P1-D: EventBus subscription (AC-10, ADR-002) ----
 
     def _subscribe_event_bus(self) -> None:
@@ -851,10 +868,12 @@ class EasyQCApp:
         bus.subscribe(EventType.PROJECT_CHANGED, self._project_changed_handler)
         bus.subscribe(EventType.MODULES_CHANGED, self._modules_changed_handler)
         log_debug("已订阅 PROJECT_CHANGED / MODULES_CHANGED 事件", "EasyQCApp")
+        self._start_rating_watcher()
 
     def teardown_event_bus(self) -> None:
         """Unsubscribe handlers. Idempotent — safe to call multiple times
         (tkinter destroy may re-enter)."""
+        self._stop_rating_watcher()
         bus = getattr(self, "event_bus", None)
         if bus is None:
             return
@@ -887,11 +906,69 @@ class EasyQCApp:
                     if loaded is not None:
                         self.gui_state.apply_loaded_tables(loaded)
             self.load_project_to_gui()
+            self._start_rating_watcher()
         except Exception as e:
             log_error(f"PROJECT_CHANGED 刷新失败: {e}", "EasyQCApp")
         finally:
             self._refreshing = False
 
+    # ---- RatingFiles watcher: saves by QC subprocesses / other raters ----
+
+    def _start_rating_watcher(self) -> None:
+        """(Re)start watching the current project's RatingFiles/; changes reach
+        the EventBus as RATING_SAVED from the tk loop. No-op when the watched
+        project is already the current one."""
+        bus = getattr(self, "event_bus", None)
+        project_service = getattr(self, "project_service", None)
+        project = getattr(project_service, "current_project", None)
+        watcher = getattr(self, "rating_watcher", None)
+        if watcher is not None and project is not None and watcher.project.path == project.path:
+            return
+        self._stop_rating_watcher()
+        if bus is None or project is None or getattr(self, "root", None) is None:
+            return
+        watcher = RatingWatcher(project, bus)
+        try:
+            watcher.start()
+        except (OSError, ValueError) as e:
+            log_warning(f"评分目录监视启动失败: {e}", "EasyQCApp")
+            return
+        self.rating_watcher = watcher
+        rating_service = self._rating_service_for_project(project)
+        if rating_service is not None:
+            # Patch the in-memory qctable per saved rating instead of re-extracting.
+            self.qctable_updater = QCTableUpdater(
+                rating_service,
+                self.session_state,
+                self.table_service,
+                persist_delay=DEFAULT_PERSIST_DELAY,
+                scheduler=self.root,
+            )
+            self.qctable_updater.attach(bus)
+        log_debug(f"评分目录监视已启动（{watcher.backend_name}）", "EasyQCApp")
+        self._rating_watch_job = self.root.after(DEFAULT_WATCH_INTERVAL_MS, self._poll_rating_watcher)
+
+    def _poll_rating_watcher(self) -> None:
+        watcher = getattr(self, "rating_watcher", None)
+        if watcher is None:
+            return
+        watcher.poll()
+        self._rating_watch_job = self.root.after(DEFAULT_WATCH_INTERVAL_MS, self._poll_rating_watcher)
+
+    def _stop_rating_watcher(self) -> None:
+        job = getattr(self, "_rating_watch_job", None)
+        if job is not None:
+            self.root.after_cancel(job)
+            self._rating_watch_job = None
+        watcher = getattr(self, "rating_watcher", None)
+        if watcher is not None:
+            watcher.stop()
+            self.rating_watcher = None
+        updater = getattr(self, "qctable_updater", None)
+        if updater is not None:
+            updater.detach()
+            self.qctable_updater = None
+
     def _on_modules_changed(self, _event=None) -> None:
         """Handle MODULES_CHANGED. Lightweight: log staleness."""
         log_debug("收到 MODULES_CHANGED 事件,标记模块视图为待刷新", "EasyQCApp")
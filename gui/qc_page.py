@@ -10,6 +10,7 @@ import pandas as pd
 from core.code_executor import CodeExecutor
 from core.rating_service import RatingService
 from models.rating import Rating
+from models.storage import StorageConfig
 
 
 @dataclass
@@ -186,10 +187,15 @@ class QCPageController:
 
         return issues
 
-    def save_legacy_module_rating(self, module: dict, module_rater_dir: str | Path) -> Path:
+    def save_legacy_module_rating(
+        self,
+        module: dict,
+        module_rater_dir: str | Path,
+        storage: StorageConfig | None = None,
+    ) -> Path:
         module["time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         rating = Rating.from_legacy_dict(module)
-        return RatingService.save_rating_to_rater_dir(Path(module_rater_dir), rating, module)
+        return RatingService.save_rating_to_rater_dir(Path(module_rater_dir), rating, module, storage=storage)
 
     def load_legacy_module_rating(
         self,
@@ -198,12 +204,19 @@ class QCPageController:
         ezqcid: str,
         rater: str,
     ) -> tuple[list[Path], dict | None]:
+        pending = RatingService.load_pending_rater_dir_rating(Path(module_rater_dir), module["name"], ezqcid, rater)
+        if pending is not None:
+            # An uncompacted journal save is newer than any rating file.
+            journal_path, payload = pending
+            return [journal_path], payload
         rating_files = RatingService.find_rating_files_in_rater_dir(
             Path(module_rater_dir),
             module["name"],
             ezqcid,
             rater,
         )
+        if not rating_files:
+            return self._load_archived_module_rating(module, module_rater_dir, ezqcid, rater)
         if len(rating_files) != 1:
             return rating_files, None
         return rating_files, RatingService.load_legacy_rating_file(rating_files[0])
@@ -215,6 +228,11 @@ class QCPageController:
         ezqcid: str,
         rater: str,
     ) -> tuple[list[Path], dict | None]:
+        pending = RatingService.load_pending_rater_dir_rating(Path(module_rater_dir), module["name"], ezqcid, rater)
+        if pending is not None:
+            # An uncompacted journal save is newer than any rating file.
+            journal_path, payload = pending
+            return [journal_path], payload
         rating_files = RatingService.find_rating_files_in_rater_dir(
             Path(module_rater_dir),
             module["name"],
@@ -222,9 +240,33 @@ class QCPageController:
             rater,
         )
         if not rating_files:
-            return rating_files, None
+            return self._load_archived_module_rating(module, module_rater_dir, ezqcid, rater)
         return rating_files, RatingService.load_legacy_rating_file(rating_files[0])
 
+    def _load_archived_module_rating(
+        self,
+        module: dict,
+        module_rater_dir: str | Path,
+        ezqcid: str,
+        rater: str,
+    ) -> tuple[list[Path], dict | None]:
+        # Finished modules may only exist as a rating archive; read the one
+        # member in place rather than extracting the module.
+        archived = RatingService.load_archived_rater_dir_rating(Path(module_rater_dir), module["name"], ezqcid, rater)
+        if archived is None:
+            return [], None
+        archived_path, payload = archived
+        return [archived_path], payload
+
+    def rater_dir_rating_summaries(
+        self,
+        module: dict,
+        module_rater_dir: str | Path,
+        rater: str,
+    ) -> dict[str, tuple[str, str, Path]]:
+        """score1/tag1 per ezqcid for the subject list, from filenames only."""
+        return RatingService.list_rater_dir_ratings(Path(module_rater_dir), module["name"], rater)
+
     def generate_code(
         self,
         ezqcid: str,
@@ -22,6 +22,7 @@ from typing import Any
 
 import pandas as pd
 
+from core.rating_dict_view import LazyRatingDict
 from core.session_state import SessionState
 from core.table_service import TABLE_QCTABLE
 from models.project import Project
@@ -160,12 +161,12 @@ class GUIStateBridge:
         if self.table_service is not None:
             cp = self.project_service.current_project
             if cp is not None:
-                for name, df in self.session_state._variables.items():
-                    if df is not None:
-                        self.table_service.save_table(cp, name, df)
-                for name, df in self.session_state._results.items():
-                    if df is not None:
-                        self.table_service.save_table(cp, name, df)
+                tables = {
+                    name: df
+                    for name, df in [*self.session_state._variables.items(), *self.session_state._results.items()]
+                    if df is not None
+                }
+                self.table_service.save_tables(cp, tables)
 
     def load_ratings(self) -> None:
         # delegate to RatingService via the main_window sync path; bridge itself
@@ -286,12 +287,16 @@ class GUIStateBridge:
         rd = self.session_state.rating_dict
         if not rd or ezqcid not in rd:
             return []
+        if isinstance(rd, LazyRatingDict):
+            identities = rd.identities(ezqcid)  # no rating file is read
+        else:
+            identities = [
+                (key, rating_data.get("name"), rating_data.get("rater"))
+                for key, rating_data in rd[ezqcid].items()
+                if isinstance(rating_data, dict)
+            ]
         items = []
-        for key, rating_data in rd[ezqcid].items():
-            if not isinstance(rating_data, dict):
-                continue
-            name = rating_data.get("name")
-            rater = rating_data.get("rater")
+        for key, name, rater in identities:
             if name and rater:
                 items.append({"label": f"打开评分结果: {key}", "name": name, "rater": rater})
         return items
@@ -0,0 +1,167 @@
+"""Content-addressed module snapshot store for compact rating files.
+
+A legacy rating JSON embeds the full module snapshot (code template, score
+labels, ``num_`` lists, button config ...) next to the handful of values that
+are actually per rating. In the compact format the snapshot is stored once per
+distinct content under ``RatingFiles/<module>/.snapshots/<sha256>.json`` and
+the rating file carries only ``module_snapshot`` (the hash) plus its values.
+
+``expand`` turns a compact payload back into a dict equal to the legacy one
+(same keys, same values), so readers (``Rating.from_json_file`` and everything
+above it) never see the difference. Key order is not part of that promise:
+snapshots are addressed by their ``sort_keys`` hash, so equal snapshots with a
+different key order share the first one stored, and ``schema_version`` moves
+to the end. A split/merge round trip is therefore equal, not byte-identical.
+Snapshots are immutable once written, which makes the in-process read cache
+safe without revalidation.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+from utils.file_utils import FileUtils
+
+
+SNAPSHOT_DIRNAME = ".snapshots"
+COMPACT_FORMAT = "compact"
+
+# Top-level keys that belong to one rating rather than to the module config.
+# Score/tag ``value``s are per rating too and are handled separately.
+PER_RATING_KEYS = ("name", "rater", "ezqcid", "notes", "time", "code_exe", "schema_version")
+
+
+def is_compact_payload(data: Any) -> bool:
+    return isinstance(data, dict) and data.get("format") == COMPACT_FORMAT and "module_snapshot" in data
+
+
+def split_payload(payload: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Split a legacy rating dict into ``(snapshot, compact_values)``.
+
+    The snapshot keeps every module key with per-rating slots blanked. Only
+    per-rating keys present in ``payload`` go into ``compact_values``, so
+    ``merge_payload`` never adds a key (e.g. a score ``value``) that was not
+    there.
+    """
+    snapshot = copy.deepcopy(payload)
+    values: dict[str, Any] = {"format": COMPACT_FORMAT}
+    for key in PER_RATING_KEYS:
+        if key in snapshot:
+            values[key] = snapshot[key]
+            snapshot[key] = None
+    snapshot.pop("schema_version", None)
+
+    for section in ("scores", "tags"):
+        if not isinstance(snapshot.get(section), dict):
+            continue
+        values[section] = {}
+        for key, item in snapshot[section].items():
+            if isinstance(item, dict):
+                if "value" in item:
+                    values[section][key] = item["value"]
+                    item["value"] = None
+            else:
+                values[section][key] = item
+                snapshot[section][key] = None
+    return snapshot, values
+
+
+def merge_payload(snapshot: dict[str, Any], values: dict[str, Any]) -> dict[str, Any]:
+    """Inverse of ``split_payload``: rebuild a dict equal to the legacy
+    rating dict, re-adding only the per-rating keys it was split with."""
+    payload = copy.deepcopy(snapshot)
+    for key in PER_RATING_KEYS:
+        if key in values:
+            payload[key] = values[key]
+    for section in ("scores", "tags"):
+        if not values.get(section):
+            continue
+        items = payload.setdefault(section, {})
+        for key, value in values[section].items():
+            if isinstance(items.get(key), dict):
+                items[key]["value"] = value
+            else:
+                items[key] = value
+    return payload
+
+
+def snapshot_hash(snapshot: dict[str, Any]) -> str:
+    canonical = json.dumps(snapshot, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ModuleSnapshotStore:
+    """The ``.snapshots`` store of one ``RatingFiles/<module>/`` directory."""
+
+    # (resolved snapshot path, hash) -> snapshot; content-addressed entries
+    # never change, so no revalidation is needed.
+    _cache: dict[tuple[str, str], dict[str, Any]] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, module_dir: str | Path) -> None:
+        self.module_dir = Path(module_dir)
+        self.directory = self.module_dir / SNAPSHOT_DIRNAME
+
+    @classmethod
+    def for_rating_file(cls, path: str | Path, module_name: str) -> "ModuleSnapshotStore":
+        """The store of the module directory that contains rating ``path``."""
+        for parent in Path(path).parents:
+            if parent.name == module_name:
+                return cls(parent)
+        raise ValueError(f"找不到评分文件所属模块目录: {path}")
+
+    def snapshot_path(self, digest: str) -> Path:
+        return self.directory / f"{digest}.json"
+
+    def put(self, snapshot: dict[str, Any]) -> str:
+        """Store ``snapshot`` once; return its content hash."""
+        digest = snapshot_hash(snapshot)
+        path = self.snapshot_path(digest)
+        if not path.exists():
+            FileUtils.safe_json_save(path, snapshot, indent=None)
+        with self._cache_lock:
+            self._cache.setdefault((str(path.resolve()), digest), copy.deepcopy(snapshot))
+        return digest
+
+    def get(self, digest: str) -> dict[str, Any]:
+        key = (str(self.snapshot_path(digest).resolve()), digest)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is None:
+            cached = FileUtils.safe_json_load(self.snapshot_path(digest))
+            with self._cache_lock:
+                self._cache[key] = cached
+        return cached
+
+    def compact(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Compact rating payload for legacy ``payload`` (stores its snapshot)."""
+        snapshot, values = split_payload(payload)
+        values["module_snapshot"] = self.put(snapshot)
+        return values
+
+    def expand(self, values: dict[str, Any]) -> dict[str, Any]:
+        return merge_payload(self.get(values["module_snapshot"]), values)
+
+
+def expand_rating_payload(data: Any, path: str | Path) -> Any:
+    """Legacy dict for whatever a rating file held (legacy passes through)."""
+    if not is_compact_payload(data):
+        return data
+    return ModuleSnapshotStore.for_rating_file(path, data["name"]).expand(data)
+
+
+__all__ = [
+    "COMPACT_FORMAT",
+    "ModuleSnapshotStore",
+    "SNAPSHOT_DIRNAME",
+    "expand_rating_payload",
+    "is_compact_payload",
+    "merge_payload",
+    "snapshot_hash",
+    "split_payload",
+]
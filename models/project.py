@@ -24,6 +24,11 @@ class Project:
     def rating_dir(self) -> Path:
         return self.path / "RatingFiles"
 
+    @property
+    def cache_dir(self) -> Path:
+        """Regenerable caches (indexes etc.); safe to delete at any time."""
+        return self.path / "Cache"
+
     @classmethod
     def from_legacy_dict(cls, name: str, path: str | Path) -> "Project":
         return cls(name=name, path=Path(path))
@@ -5,6 +5,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from models.module_snapshot import expand_rating_payload
 from models.qcmodule import QCModule, _format_datetime, _parse_datetime
 from utils.file_utils import FileUtils
 
@@ -23,10 +24,19 @@ class Rating:
 
     @property
     def filename(self) -> str:
-        score1 = self.scores.get("1", "None")
-        tag1 = self.tags.get("1", False)
+        score1, tag1 = self.filename_summary
         return f"{self.module_name}._.{self.ezqcid}._.{self.rater}._.{score1}._.{tag1}.json"
 
+    @property
+    def stable_filename(self) -> str:
+        """Identity-only filename; unchanged when score1/tag1 change."""
+        return f"{self.module_name}._.{self.ezqcid}._.{self.rater}.json"
+
+    @property
+    def filename_summary(self) -> tuple[str, str]:
+        """(score1, tag1) exactly as the legacy filename spells them."""
+        return str(self.scores.get("1", "None")), str(self.tags.get("1", False))
+
     @classmethod
     def from_module(cls, module: QCModule) -> "Rating":
         return cls(
@@ -112,7 +122,9 @@ class Rating:
 
     @classmethod
     def from_json_file(cls, path: Path) -> "Rating":
-        return cls.from_legacy_dict(FileUtils.safe_json_load(path))
+        # Compact rating files are expanded against their module snapshot
+        # store, so callers always see the legacy payload.
+        return cls.from_legacy_dict(expand_rating_payload(FileUtils.safe_json_load(path), path))
 
     def to_json_file(self, path: Path, legacy_module: QCModule | dict[str, Any] | None = None) -> None:
         FileUtils.safe_json_save(path, self.to_legacy_dict(legacy_module))
@@ -0,0 +1,30 @@
+"""Schema version of rating and settings payloads.
+
+``schema_version`` is metadata on the saved JSON, not a model field: legacy
+v0 files lack the key, the services stamp it on save and
+``core.schema_migration`` upgrades files in bulk.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+
+CURRENT_SCHEMA_VERSION = 1
+
+
+def schema_version_of(payload: dict[str, Any]) -> int:
+    """Legacy v0 files lack the key (or hold junk)."""
+    version = payload.get("schema_version")
+    return version if isinstance(version, int) and version >= 0 else 0
+
+
+def stamp_schema_version(payload: dict[str, Any]) -> None:
+    """Stamp the current schema version onto an outbound payload, but never
+    downgrade an existing higher version (forward-compat)."""
+    current = payload.get("schema_version")
+    if not isinstance(current, int) or current < CURRENT_SCHEMA_VERSION:
+        payload["schema_version"] = CURRENT_SCHEMA_VERSION
+
+
+__all__ = ["CURRENT_SCHEMA_VERSION", "schema_version_of", "stamp_schema_version"]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from typing import Any
+
+from models.project import Project
+from utils.file_utils import FileUtils
+
+
+STORAGE_SETTINGS_KEY = "storage"
+
+RATING_BACKEND_FILES = "files"
+RATING_BACKEND_JOURNAL = "journal"
+
+RATING_LAYOUT_FLAT = "flat"
+RATING_LAYOUT_SHARDED = "sharded"
+RATING_LAYOUTS = (RATING_LAYOUT_FLAT, RATING_LAYOUT_SHARDED)
+
+TABLE_FORMAT_CSV = "csv"
+TABLE_FORMAT_FEATHER = "feather"
+TABLE_FORMAT_PARQUET = "parquet"
+# Feather when pyarrow is installed, CSV only otherwise.
+TABLE_FORMAT_AUTO = "auto"
+
+
+@dataclass(frozen=True)
+class StorageConfig:
+    """Per-project storage options, read from ``settings["storage"]``.
+
+    Every option defaults to the legacy on-disk layout, so projects without a
+    ``storage`` section (all v0/v1 settings files) behave exactly as before.
+    Unknown keys are ignored so newer settings stay loadable.
+    """
+
+    # Rating JSON written in the compact format: per-rating values plus a
+    # hash into the module snapshot store (models.module_snapshot).
+    compact_ratings: bool = False
+    # Rating JSON written without indentation (FileUtils compact codec).
+    compact_json: bool = False
+    # "files": one JSON per rating (legacy). "journal": saves append to a
+    # per-rater journal that is compacted into files (core.rating_journal).
+    rating_backend: str = RATING_BACKEND_FILES
+    # Journal lines after which a save schedules a background compaction.
+    journal_compact_after: int = 200
+    # Where new rating files go: "flat" RatingFiles/<module>/<rater>/ or
+    # "sharded" RatingFiles/<module>/<rater>/<hh>/ (core.rating_layout).
+    # Readers accept both layouts regardless of this option.
+    rating_layout: str = RATING_LAYOUT_FLAT
+    # Name rating files <module>._.<ezqcid>._.<rater>.json (no score1/tag1),
+    # so a re-score replaces the same name; score1/tag1 for listings come
+    # from core.rating_summary_index.
+    stable_filenames: bool = False
+    # Columnar copy TableService keeps next to each Table/*.csv (the CSV is
+    # always written too, as the compatibility export). "csv" = CSV only.
+    table_format: str = TABLE_FORMAT_CSV
+    # Rating fields pivoted into ezqc_qctable (core.rating_projection spec,
+    # e.g. ["scores", "tags", "notes", "time"]). None pivots every field.
+    qctable_fields: tuple[str, ...] | None = None
+
+    def __post_init__(self) -> None:
+        fields = self.qctable_fields
+        if isinstance(fields, str):
+            object.__setattr__(self, "qctable_fields", (fields,))
+        elif fields is not None and not isinstance(fields, tuple):
+            object.__setattr__(self, "qctable_fields", tuple(fields))
+
+    @property
+    def uses_journal(self) -> bool:
+        return self.rating_backend == RATING_BACKEND_JOURNAL
+
+    def rating_filename(self, rating: Any) -> str:
+        return rating.stable_filename if self.stable_filenames else rating.filename
+
+    @classmethod
+    def from_settings(cls, settings: Mapping[str, Any] | None) -> "StorageConfig":
+        section = (settings or {}).get(STORAGE_SETTINGS_KEY) or {}
+        known = {field.name for field in fields(cls)}
+        return cls(**{key: value for key, value in section.items() if key in known})
+
+    @classmethod
+    def for_project(cls, project: Project) -> "StorageConfig":
+        """Read the options straight from ``settings_<project>.json``."""
+        if not project.settings_path.exists():
+            return cls()
+        return cls.from_settings(FileUtils.safe_json_load(project.settings_path))
+
+    def to_legacy_dict(self) -> dict[str, Any]:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+__all__ = [
+    "RATING_BACKEND_FILES",
+    "RATING_BACKEND_JOURNAL",
+    "RATING_LAYOUTS",
+    "RATING_LAYOUT_FLAT",
+    "RATING_LAYOUT_SHARDED",
+    "STORAGE_SETTINGS_KEY",
+    "TABLE_FORMAT_AUTO",
+    "TABLE_FORMAT_CSV",
+    "TABLE_FORMAT_FEATHER",
+    "TABLE_FORMAT_PARQUET",
+    "StorageConfig",
+]
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import os
 import shutil
 from pathlib import Path
+from typing import Callable
 
 import pytest
 
+from core.rating_service import RatingService
+from models.project import Project
+from models.storage import StorageConfig
+
 
 @pytest.fixture
 def easyqc_root() -> Path:
@@ -45,9 +51,43 @@ def sample_project_dir(tmp_path: Path, fixtures_dir: Path) -> Path:
     return project_dir
 
 
+@pytest.fixture
+def sample_rater_dir(sample_project_dir: Path) -> Path:
+    return sample_project_dir / "RatingFiles" / "example" / "rater1"
+
+
 @pytest.fixture
 def ccnppeki_compat_project_dir(tmp_path: Path, fixtures_dir: Path) -> Path:
     source_dir = fixtures_dir / "ccnppeki_compat" / "easyqc_CCNPPEKI_COMPAT"
     project_dir = tmp_path / "easyqc_CCNPPEKI_COMPAT"
     shutil.copytree(source_dir, project_dir)
     return project_dir
+
+
+@pytest.fixture
+def save_sample_rating() -> Callable[..., Path]:
+    """Save a copy of the project's first rating under ``example/rater1`` as
+    ``ezqcid`` with ``score1``; returns the path it was saved to."""
+
+    def save(project: Project, ezqcid: str, score1: str, storage: StorageConfig | None = None) -> Path:
+        rating = RatingService(project).load_all_ratings()[0]
+        rating.ezqcid = ezqcid
+        rating.scores["1"] = score1
+        legacy = rating.to_legacy_dict()
+        rating.legacy_payload = legacy
+        return RatingService.save_rating_to_rater_dir(
+            project.rating_dir / "example" / "rater1", rating, legacy, storage=storage or StorageConfig()
+        )
+
+    return save
+
+
+@pytest.fixture
+def bump_mtime() -> Callable[[Path], None]:
+    """Move a file's mtime one second forward (a stat-visible change)."""
+
+    def bump(path: Path) -> None:
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    return bump
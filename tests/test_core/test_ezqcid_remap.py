@@ -0,0 +1,108 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import core.ezqcid_remap as ezqcid_remap
+from core.cli_service import ProjectMaintenanceError, remap_ezqcids
+from core.ezqcid_remap import EzqcidRemapError, EzqcidRemapper
+from core.rating_service import RatingService
+from models.project import Project
+
+
+def _add_sub002(rater_dir: Path) -> None:
+    source = rater_dir / "example._.SUB001._.rater1._.Good._.True.json"
+    payload = json.loads(source.read_text(encoding="utf-8"))
+    payload["ezqcid"] = "SUB002"
+    (rater_dir / "example._.SUB002._.rater1._.Good._.True.json").write_text(
+        json.dumps(payload, indent=4), encoding="utf-8"
+    )
+
+
+def _ezqcids(project: Project) -> dict[str, str]:
+    return {rating.ezqcid: rating.scores["1"] for rating in RatingService(project).load_all_ratings()}
+
+
+def test_remap_swaps_tables_and_rating_files(sample_project_dir: Path, sample_rater_dir: Path) -> None:
+    project = Project("SAMPLE", sample_project_dir)
+    _add_sub002(sample_rater_dir)
+    table_path = project.table_dir / "ezqc_all.csv"
+    module_table = project.table_dir / "ezqc_example.csv"
+    pd.read_csv(table_path).to_csv(module_table, index=False)
+
+    report = EzqcidRemapper(project, workers=2).run({"SUB001": "SUB002", "SUB002": "SUB001"})
+
+    assert report.ratings == 2 and report.tables == {"ezqc_all": 2, "ezqc_example": 2}
+    assert pd.read_csv(table_path)["ezqcid"].tolist() == ["SUB002", "SUB001"]
+    assert pd.read_csv(table_path)["motion"].tolist() == [0.12, 0.30]
+    assert pd.read_csv(module_table)["ezqcid"].tolist() == ["SUB002", "SUB001"]
+    for ezqcid in ("SUB001", "SUB002"):
+        path = sample_rater_dir / f"example._.{ezqcid}._.rater1._.Good._.True.json"
+        assert json.loads(path.read_text(encoding="utf-8"))["ezqcid"] == ezqcid
+    assert set(_ezqcids(project)) == {"SUB001", "SUB002"}
+    assert not (project.cache_dir / ezqcid_remap.REMAP_DIRNAME).exists()
+    assert RatingService(project).validate_rating_file(next(sample_rater_dir.glob("*.json")))
+
+
+def test_remap_rejects_duplicate_identities_up_front(
+    sample_project_dir: Path,
+    tmp_path: Path,
+    sample_rater_dir: Path,
+) -> None:
+    project = Project("SAMPLE", sample_project_dir)
+    _add_sub002(sample_rater_dir)
+    before = sorted(path.name for path in sample_rater_dir.iterdir())
+    mapping_path = tmp_path / "mapping.csv"
+    mapping_path.write_text("old_ezqcid,new_ezqcid\nSUB001,SUB002\n", encoding="utf-8")
+    registry_path = tmp_path / "projects.json"
+    registry_path.write_text(
+        json.dumps({"projects": {"SAMPLE": str(sample_project_dir)}, "last_project": "SAMPLE"}),
+        encoding="utf-8",
+    )
+
+    with pytest.raises(ProjectMaintenanceError, match="SUB002"):
+        remap_ezqcids("SAMPLE", mapping_path, registry_path)
+
+    assert sorted(path.name for path in sample_rater_dir.iterdir()) == before
+    assert pd.read_csv(project.table_dir / "ezqc_all.csv")["ezqcid"].tolist() == ["SUB001", "SUB002"]
+    mapping_path.write_text("old_ezqcid,new_ezqcid\nSUB001,SUB009\nSUB001,SUB010\n", encoding="utf-8")
+    with pytest.raises(ProjectMaintenanceError, match="SUB001"):
+        remap_ezqcids("SAMPLE", mapping_path, registry_path)
+
+
+def test_failed_commit_rolls_back_everything(monkeypatch, sample_project_dir: Path, sample_rater_dir: Path) -> None:
+    project = Project("SAMPLE", sample_project_dir)
+    _add_sub002(sample_rater_dir)
+    table_path = project.table_dir / "ezqc_all.csv"
+    table_text = table_path.read_text(encoding="utf-8")
+    contents = {path.name: path.read_bytes() for path in sample_rater_dir.iterdir()}
+    real_replace = ezqcid_remap.os.replace
+    calls = []
+
+    def failing_replace(src, dst):
+        calls.append(src)
+        if len(calls) == 3:  # both old files moved, first temp renamed next
+            real_replace(src, dst)
+            raise OSError("disk full")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(ezqcid_remap.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        EzqcidRemapper(project, workers=1).run({"SUB001": "SUB003", "SUB002": "SUB004"})
+    monkeypatch.setattr(ezqcid_remap.os, "replace", real_replace)
+
+    assert {path.name: path.read_bytes() for path in sample_rater_dir.iterdir()} == contents
+    assert table_path.read_text(encoding="utf-8") == table_text
+    assert not (project.cache_dir / ezqcid_remap.REMAP_DIRNAME).exists()
+    assert EzqcidRemapper(project).rollback() is False
+
+    # a crash leaves the journal behind: the next remap refuses until rolled back
+    (project.cache_dir / ezqcid_remap.REMAP_DIRNAME).mkdir()
+    (project.cache_dir / ezqcid_remap.REMAP_DIRNAME / ezqcid_remap.REMAP_JOURNAL_FILENAME).write_text(
+        json.dumps({"state": "prepared", "tables": [], "ratings": []}), encoding="utf-8"
+    )
+    with pytest.raises(EzqcidRemapError):
+        EzqcidRemapper(project).run({"SUB001": "SUB003"})
+    assert EzqcidRemapper(project).rollback() is True
+    assert EzqcidRemapper(project).run({"SUB001": "SUB003"}).ratings == 1
@@ -0,0 +1,86 @@
+import json
+import os
+from pathlib import Path
+
+from core.cli_service import verify_integrity
+from core.integrity_manifest import IntegrityManifest
+from core.rating_service import RatingService
+from core.table_service import TableService
+from models.project import Project
+from models.rating import Rating
+from models.storage import RATING_BACKEND_JOURNAL, StorageConfig
+
+
+def test_verify_rehashes_only_stat_changed_files(ccnppeki_compat_project_dir: Path, bump_mtime) -> None:
+    service = RatingService(Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir), workers=4)
+    files = service.scan_rating_files()
+
+    baseline = service.verify_rating_files(accept=True)
+    assert (len(baseline.added), baseline.hashed) == (len(files), len(files))
+
+    bump_mtime(files[0])
+    files[1].write_text(files[1].read_text(encoding="utf-8")[:20], encoding="utf-8")
+    files[2].unlink()
+    report = service.verify_rating_files()
+
+    assert report.hashed == 2
+    assert report.touched == [files[0].relative_to(service.project.rating_dir).as_posix()]
+    relpath = files[1].relative_to(service.project.rating_dir).as_posix()
+    assert (report.modified, report.corrupt) == ([relpath], [relpath])
+    assert report.removed == [files[2].relative_to(service.project.rating_dir).as_posix()]
+    assert not report.ok
+    # the touched file's new stat was folded back into the manifest
+    assert service.verify_rating_files().hashed == 1
+
+
+def test_full_verify_catches_changes_that_kept_the_stat(tmp_path: Path) -> None:
+    root = tmp_path / "Table"
+    root.mkdir()
+    table = root / "ezqc_all.csv"
+    table.write_text("ezqcid\nSUB001\n", encoding="utf-8")
+    manifest = IntegrityManifest(root, tmp_path / "Cache" / "manifest.json", workers=1)
+    manifest.verify(accept=True)
+
+    stat = table.stat()
+    table.write_text("ezqcid\nSUB002\n", encoding="utf-8")
+    os.utime(table, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert manifest.verify().ok
+    assert manifest.verify(full=True).modified == ["ezqc_all.csv"]
+
+
+def test_saves_keep_sidecars_out_of_the_manifest(sample_project_dir: Path, tmp_path: Path) -> None:
+    project = Project("SAMPLE", sample_project_dir)
+    registry_path = tmp_path / "projects.json"
+    registry_path.write_text(
+        json.dumps({"projects": {"SAMPLE": str(sample_project_dir)}, "last_project": "SAMPLE"}),
+        encoding="utf-8",
+    )
+    verify_integrity("SAMPLE", registry_path, accept=True)
+    rater_dir = project.rating_dir / "example" / "rater1"
+    rating = Rating.from_json_file(next(rater_dir.glob("*.json")))
+    RatingService.save_rating_to_rater_dir(rater_dir, rating, storage=StorageConfig(stable_filenames=True))
+
+    reports = verify_integrity("SAMPLE", registry_path)
+
+    assert reports["RatingFiles"].added == ["example/rater1/example._.SUB001._.rater1.json"]
+    assert reports["Table"].ok
+    assert reports["Table"].hashed == 0
+    assert TableService().verify_tables(project).unchanged == reports["Table"].unchanged
+
+
+def test_journal_saves_are_checked_once_compacted(sample_project_dir: Path, sample_rater_dir: Path) -> None:
+    service = RatingService(Project("SAMPLE", sample_project_dir))
+    service.verify_rating_files(accept=True)
+    rating = Rating.from_json_file(next(sample_rater_dir.glob("*.json")))
+    rating.scores["1"] = "Bad"
+    storage = StorageConfig(rating_backend=RATING_BACKEND_JOURNAL)
+    RatingService.save_rating_to_rater_dir(sample_rater_dir, rating, storage=storage)
+
+    assert service.verify_rating_files().ok
+
+    service.compact_rating_journals()
+    report = service.verify_rating_files()
+
+    assert report.added == ["example/rater1/example._.SUB001._.rater1._.Bad._.True.json"]
+    assert not report.ok
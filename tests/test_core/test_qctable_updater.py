@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import pandas as pd
+
+from core.event_bus import Event, EventBus, EventType
+from core.qctable_updater import QCTableUpdater
+from core.rating_service import RatingService
+from core.session_state import SessionState
+from core.table_service import TABLE_QCTABLE, TableService
+from models.project import Project
+from models.storage import RATING_BACKEND_JOURNAL, StorageConfig
+
+
+def _session(project: Project) -> tuple[RatingService, SessionState, pd.DataFrame]:
+    service = RatingService(project)
+    subjects = pd.read_csv(project.table_dir / "ezqc_all.csv")
+    session = SessionState()
+    session.set_all_variable_table(subjects)
+    session.apply_loaded_ratings(service.load_legacy_state(subjects))
+    return service, session, subjects
+
+
+def _comparable(table: pd.DataFrame) -> pd.DataFrame:
+    return table.sort_index(axis=1).reset_index(drop=True).astype(str)
+
+
+def test_patches_match_a_full_extraction(sample_project_dir: Path, save_sample_rating) -> None:
+    project = Project("SAMPLE", sample_project_dir)
+    service, session, subjects = _session(project)
+    bus = EventBus()
+    updater = QCTableUpdater(service, session)
+    updater.attach(bus)
+    qctable = session.result_table(TABLE_QCTABLE)
+
+    save_sample_rating(project, "SUB001", "Bad")  # re-score of a rated subject
+    journal = StorageConfig(rating_backend=RATING_BACKEND_JOURNAL)
+    save_sample_rating(project, "SUB002", "Fair", journal)  # first rating, journal
+    for ezqcid in ("SUB001", "SUB002"):
+        data = {"module_name": "example", "ezqcid": ezqcid, "rater": "rater1"}
+        bus.emit(Event(type=EventType.RATING_SAVED, source="RatingWatcher", data=data))
+
+    fresh = service.load_legacy_state(subjects)
+    assert session.result_table(TABLE_QCTABLE) is qctable  # patched in place
+    pd.testing.assert_frame_equal(_comparable(qctable), _comparable(fresh.qctable))
+    assert session.rating_dict == fresh.rating_dict
+    updater.detach()
+
+
+def test_removed_rating_clears_cells_and_persist_is_debounced(sample_project_dir: Path) -> None:
+    project = Project("SAMPLE", sample_project_dir)
+    service, session, _subjects = _session(project)
+    saved = []
+    table_service = TableService()
+    table_service.save_table = lambda project, table_type, df: saved.append((table_type, df))
+    updater = QCTableUpdater(service, session, table_service, persist_delay=60)
+
+    for path in (project.rating_dir / "example" / "rater1").glob("*.json"):
+        path.unlink()
+    assert updater.apply("example", "SUB001", "rater1")
+    assert updater.apply("example", "SUB001", "rater1")
+
+    qctable = session.result_table(TABLE_QCTABLE)
+    assert qctable.filter(like="example.rater1.").isna().all().all()
+    assert "example-rater1" not in session.rating_dict["SUB001"]
+    assert saved == []  # still inside the debounce window
+    updater.flush()
+    assert [table_type for table_type, _ in saved] == [TABLE_QCTABLE]
+    assert not updater.apply("example", "SUB999", "rater1")
+
+
+class _FakeScheduler:
+    """Stands in for the Tk root: records after() jobs instead of running them."""
+
+    def __init__(self) -> None:
+        self.jobs: dict[int, object] = {}
+
+    def after(self, _ms: int, callback) -> int:
+        job = len(self.jobs) + 1
+        self.jobs[job] = callback
+        return job
+
+    def after_cancel(self, job: int) -> None:
+        del self.jobs[job]
+
+
+def test_persist_runs_on_the_scheduler_and_row_map_follows_the_table(
+    sample_project_dir: Path,
+    save_sample_rating,
+) -> None:
+    project = Project("SAMPLE", sample_project_dir)
+    service, session, subjects = _session(project)
+    saved = []
+    table_service = TableService()
+    table_service.save_table = lambda project, table_type, df: saved.append(table_type)
+    scheduler = _FakeScheduler()
+    updater = QCTableUpdater(service, session, table_service, persist_delay=5, scheduler=scheduler)
+
+    assert updater.apply("example", "SUB001", "rater1")
+    save_sample_rating(project, "SUB001", "Bad")
+    # A re-extraction swaps in a new table of the same length.
+    session.apply_loaded_ratings(service.load_legacy_state(subjects))
+    assert updater.apply("example", "SUB001", "rater1")
+
+    assert len(scheduler.jobs) == 1 and saved == []
+    next(iter(scheduler.jobs.values()))()
+    assert saved == [TABLE_QCTABLE] and not scheduler.jobs
+    qctable = session.result_table(TABLE_QCTABLE)
+    assert qctable.loc[qctable["ezqcid"].astype(str) == "SUB001", "example.rater1.score1"].tolist() == ["Bad"]
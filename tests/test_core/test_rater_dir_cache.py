@@ -0,0 +1,76 @@
+import os
+
+from core.rater_dir_cache import RaterDirListing, rating_identity_from_filename
+from core.rating_service import RatingService
+from models.rating import Rating
+
+
+def _rating(ezqcid: str, score: str) -> Rating:
+    return Rating.from_legacy_dict(
+        {
+            "name": "Anat",
+            "rater": "r1",
+            "ezqcid": ezqcid,
+            "scores": {"1": {"label": "overall", "value": score}},
+            "tags": {"1": {"label": "flag", "value": False}},
+        }
+    )
+
+
+def test_identity_from_filename_handles_legacy_and_short_names() -> None:
+    assert rating_identity_from_filename("Anat._.SUB001._.r1._.4._.True.json") == ("Anat", "SUB001", "r1")
+    assert rating_identity_from_filename("Anat._.SUB001._.r1.json") == ("Anat", "SUB001", "r1")
+    assert rating_identity_from_filename(".Anat._.SUB001._.r1._.4._.True.json.tmp.1") is None
+    assert rating_identity_from_filename("notes.txt") is None
+
+
+def test_listing_scans_once_and_serves_prefix_lookups(monkeypatch, tmp_path) -> None:
+    (tmp_path / "Anat._.SUB001._.r1._.4._.True.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "Anat._.SUB002._.r1._.3._.False.json").write_text("{}", encoding="utf-8")
+    listing = RaterDirListing(tmp_path)
+    scans = []
+    original_scandir = os.scandir
+    monkeypatch.setattr("core.rater_dir_cache.os.scandir", lambda path: scans.append(path) or original_scandir(path))
+
+    first = listing.files_for("Anat", "SUB001", "r1")
+    second = listing.files_for("Anat", "SUB002", "r1")
+
+    assert [path.name for path in first] == ["Anat._.SUB001._.r1._.4._.True.json"]
+    assert [path.name for path in second] == ["Anat._.SUB002._.r1._.3._.False.json"]
+    assert listing.files_for("Anat", "SUB003", "r1") == []
+    assert len(scans) == 1
+
+
+def test_listing_rescans_when_directory_mtime_changes(tmp_path) -> None:
+    listing = RaterDirListing(tmp_path)
+    assert listing.files_for("Anat", "SUB001", "r1") == []
+
+    foreign = tmp_path / "Anat._.SUB001._.r1._.4._.True.json"
+    foreign.write_text("{}", encoding="utf-8")
+    stat = tmp_path.stat()
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000))
+
+    assert listing.files_for("Anat", "SUB001", "r1") == [foreign]
+
+
+def test_missing_directory_lists_nothing(tmp_path) -> None:
+    listing = RaterDirListing(tmp_path / "missing")
+
+    assert listing.files_for("Anat", "SUB001", "r1") == []
+    assert listing.names() == []
+
+
+def test_save_updates_shared_listing_in_place(monkeypatch, tmp_path) -> None:
+    rater_dir = tmp_path / "Anat" / "r1"
+    RatingService.save_rating_to_rater_dir(rater_dir, _rating("SUB001", "3"))
+    RaterDirListing.for_directory(rater_dir).names()
+    scans = []
+    original_scandir = os.scandir
+    monkeypatch.setattr("core.rater_dir_cache.os.scandir", lambda path: scans.append(path) or original_scandir(path))
+
+    saved = RatingService.save_rating_to_rater_dir(rater_dir, _rating("SUB001", "5"))
+    found = RatingService.find_rating_files_in_rater_dir(rater_dir, "Anat", "SUB001", "r1")
+
+    assert found == [saved]
+    assert sorted(path.name for path in rater_dir.iterdir()) == [saved.name]
+    assert scans == []
@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from core.cli_service import ProjectMaintenanceError, archive_module
+from core.rating_archive import RatingArchive, archive_path
+from core.rating_service import RatingService
+from gui.qc_page import QCPageController
+from models.project import Project
+from models.rating import Rating
+from models.storage import StorageConfig
+
+
+def test_archived_module_aggregates_like_the_loose_files(ccnppeki_compat_project_dir: Path) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    service = RatingService(project)
+    module_name = service.scan_rating_files()[0].relative_to(project.rating_dir).parts[0]
+    module_files = service.scan_rating_tree(project.rating_dir / module_name)
+    before = service.load_legacy_state(subjects)
+
+    assert service.archive_module(module_name) == len(module_files)
+    assert not (project.rating_dir / module_name).exists()
+    assert archive_path(project.rating_dir, module_name).is_file()
+    pd.testing.assert_frame_equal(service.load_legacy_state(subjects).qctable, before.qctable)
+
+    assert service.restore_module(module_name) == len(module_files)
+    assert service.scan_rating_tree(project.rating_dir / module_name) == module_files
+    assert not archive_path(project.rating_dir, module_name).exists()
+
+
+def test_qc_page_reads_archived_rating_and_new_saves_win(sample_project_dir: Path) -> None:
+    project = Project("SAMPLE", sample_project_dir)
+    rater_dir = project.rating_dir / "example" / "rater1"
+    original = next(rater_dir.glob("*.json"))
+    rating = Rating.from_json_file(original)
+    RatingService(project).archive_module("example")
+
+    controller = QCPageController()
+    module = {"name": "example"}
+    files, payload = controller.load_first_legacy_module_rating(module, rater_dir, "SUB001", "rater1")
+    assert files == [original]
+    assert payload == rating.to_legacy_dict()
+    assert RatingService.list_rater_dir_ratings(rater_dir, "example", "rater1") == {
+        "SUB001": ("Good", "True", original)
+    }
+
+    rating.scores["1"] = "Bad"
+    saved = RatingService.save_rating_to_rater_dir(rater_dir, rating, storage=StorageConfig())
+    assert RatingService.list_rater_dir_ratings(rater_dir, "example", "rater1")["SUB001"] == ("Bad", "True", saved)
+    assert [record.scores["1"] for record in RatingService(project).load_all_ratings()] == ["Bad"]
+
+    # Re-archiving folds the late edit into the archive.
+    assert RatingService(project).archive_module("example") == 1
+    entry = RatingArchive.for_path(archive_path(project.rating_dir, "example")).entry_for("example", "SUB001", "rater1")
+    assert (entry.member, entry.score1) == (saved.relative_to(project.rating_dir).as_posix(), "Bad")
+
+
+def test_cli_archive_rejects_unknown_module(sample_project_dir: Path, tmp_path: Path) -> None:
+    registry_path = tmp_path / "projects.json"
+    registry_path.write_text(
+        json.dumps({"projects": {"SAMPLE": str(sample_project_dir)}, "last_project": "SAMPLE"}),
+        encoding="utf-8",
+    )
+
+    with pytest.raises(ProjectMaintenanceError):
+        archive_module("SAMPLE", "missing", registry_path)
+    assert archive_module("SAMPLE", "example", registry_path) == 1
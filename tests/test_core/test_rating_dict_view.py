@@ -0,0 +1,53 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+
+from core.rating_dict_view import LazyRatingDict, RatingRef
+from core.rating_service import RatingService
+from core.session_state import SessionState
+from gui.state_bridge import GUIStateBridge
+from models.project import Project
+
+
+def test_lazy_rating_dict_matches_the_eager_one_and_reads_on_demand(ccnppeki_compat_project_dir: Path) -> None:
+    service = RatingService(Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir))
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    state = service.load_legacy_state(subjects)
+    loaded = []
+    refs = [
+        RatingRef(rating.module_name, rating.ezqcid, rating.rater, path)
+        for rating, path in service.load_all_rating_records()
+    ]
+    lazy = LazyRatingDict(lambda ref: loaded.append(ref) or service.load_rating_ref(ref), refs, cache_size=2)
+
+    session = SessionState()
+    session.apply_loaded_ratings(state)
+    assert isinstance(session.rating_dict, LazyRatingDict)
+    assert session.rating_dict is not state.rating_dict
+    assert session.rating_dict == service.build_rating_dict(state.ratings)
+
+    ezqcid = state.ratings[0].ezqcid
+    bridge = SimpleNamespace(session_state=SimpleNamespace(rating_dict=lazy))
+    items = GUIStateBridge.rating_menu_items(bridge, ezqcid)
+    assert {(item["name"], item["rater"]) for item in items} == {
+        (rating.module_name, rating.rater) for rating in state.ratings if rating.ezqcid == ezqcid
+    }
+    assert loaded == []  # the menu needs identities only
+
+    key = next(iter(lazy[ezqcid]))
+    assert lazy[ezqcid][key] is lazy[ezqcid][key]  # served from the LRU
+    assert len(loaded) == 1
+    for other in list(lazy)[:3]:
+        dict(lazy[other])
+    assert len(lazy._cache) == 2
+
+
+def test_assigned_and_popped_entries_do_not_touch_files() -> None:
+    lazy = LazyRatingDict(lambda ref: None, [RatingRef("m", "S1", "r", Path("m/r/x.json"))])
+
+    lazy.setdefault("S2", {})["m-r"] = {"name": "m", "rater": "r"}
+    assert lazy["S2"]["m-r"] == {"name": "m", "rater": "r"}
+    assert lazy["S1"].pop("m-r") == RatingRef("m", "S1", "r", Path("m/r/x.json"))
+    assert lazy["S1"].pop("m-r", None) is None
+    assert lazy.identities("S2") == [("m-r", "m", "r")]
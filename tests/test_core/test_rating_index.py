@@ -0,0 +1,105 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from core.rating_filter import RatingFilter
+from core.rating_index import RatingIndex
+from core.rating_service import RatingService
+from models.project import Project
+
+
+def _project(project_dir: Path) -> Project:
+    return Project("SAMPLE", project_dir)
+
+
+def test_indexed_load_matches_direct_load(ccnppeki_compat_project_dir: Path) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+
+    direct = RatingService(project).load_legacy_state(subjects)
+    indexed_service = RatingService(project, use_index=True)
+    indexed = indexed_service.load_legacy_state(subjects)
+
+    assert (project.cache_dir / "rating_index.sqlite3").exists()
+    assert indexed_service.last_index_delta.parsed == len(direct.ratings)
+    pd.testing.assert_frame_equal(indexed.qctable, direct.qctable)
+    pd.testing.assert_frame_equal(indexed.original_table, direct.original_table)
+
+
+def test_index_reparses_only_added_changed_and_removed_files(sample_project_dir: Path, bump_mtime) -> None:
+    service = RatingService(_project(sample_project_dir), use_index=True)
+    rater_dir = sample_project_dir / "RatingFiles" / "example" / "rater1"
+    original = next(rater_dir.glob("*.json"))
+
+    service.load_all_rating_records()
+    service.load_all_rating_records()
+    assert service.last_index_delta.parsed == 0
+    assert service.last_index_delta.unchanged == 1
+
+    copy = rater_dir / original.name.replace("SUB001", "SUB002")
+    copy.write_text(original.read_text(encoding="utf-8").replace("SUB001", "SUB002"), encoding="utf-8")
+    bump_mtime(original)
+    records = service.load_all_rating_records()
+
+    delta = service.last_index_delta
+    assert [Path(rel).name for rel in delta.added] == [copy.name]
+    assert [Path(rel).name for rel in delta.changed] == [original.name]
+    assert delta.unchanged == 0
+    assert [rating.ezqcid for rating, _ in records] == ["SUB001", "SUB002"]
+
+    copy.unlink()
+    records = service.load_all_rating_records()
+
+    assert [Path(rel).name for rel in service.last_index_delta.removed] == [copy.name]
+    assert [rating.ezqcid for rating, _ in records] == ["SUB001"]
+
+
+def test_index_remembers_invalid_files_without_serving_them(sample_project_dir: Path) -> None:
+    service = RatingService(_project(sample_project_dir), use_index=True)
+    bad = sample_project_dir / "RatingFiles" / "example" / "rater1" / "example._.SUB009._.rater1._.x._.False.json"
+    bad.write_text("{not json", encoding="utf-8")
+
+    records = service.load_all_rating_records()
+    service.load_all_rating_records()
+
+    assert [rating.ezqcid for rating, _ in records] == ["SUB001"]
+    assert service.last_index_delta.parsed == 0
+    assert [(item.path, item.reason) for item in service.last_ingest_report.quarantined] == [(bad, "unreadable")]
+
+
+def test_index_rebuilds_from_corrupt_cache_file(sample_project_dir: Path) -> None:
+    project = _project(sample_project_dir)
+    index = RatingIndex(project)
+    index.path.parent.mkdir(parents=True)
+    index.path.write_bytes(b"this is not a sqlite database" * 10)
+
+    service = RatingService(project, use_index=True)
+    records = service.load_all_rating_records()
+
+    assert [rating.ezqcid for rating, _ in records] == ["SUB001"]
+    assert service.last_index_delta.parsed == 1
+
+
+def test_for_project_keeps_index_option(sample_project_dir: Path, tmp_path: Path) -> None:
+    other_dir = tmp_path / "easyqc_OTHER"
+    shutil.copytree(sample_project_dir, other_dir)
+
+    service = RatingService(_project(sample_project_dir), use_index=True).for_project(Project("OTHER", other_dir))
+
+    assert service.use_index
+    assert service.project.path == other_dir
+
+
+def test_filtered_index_reads_match_the_direct_selective_load(ccnppeki_compat_project_dir: Path) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    indexed_service = RatingService(project, use_index=True)
+    indexed_service.load_all_rating_records()  # index the whole tree
+    rating_filter = RatingFilter(modules={"AnatRestAll", "hcpall"}, raters={"lcj", "zhuyan"})
+
+    direct = RatingService(project).load_all_rating_records(rating_filter=rating_filter)
+    indexed = indexed_service.load_all_rating_records(rating_filter=rating_filter)
+
+    assert direct and [path for _, path in indexed] == [path for _, path in direct]
+    assert indexed_service.last_index_delta.parsed == 0
+    assert RatingIndex(project).records(rating_filter=RatingFilter(ezqcids={"no-such-subject"})) == []
@@ -0,0 +1,147 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from core.rating_journal import (
+    JOURNAL_COMPACTION_LOCK_FILENAME,
+    JOURNAL_FILENAME,
+    JOURNAL_LOCK_FILENAME,
+    RatingJournal,
+)
+from core.rating_service import RatingService
+from gui.qc_page import QCPageController
+from models.project import Project
+from models.rating import Rating
+from models.storage import RATING_BACKEND_JOURNAL, StorageConfig
+
+
+JOURNAL = StorageConfig(rating_backend=RATING_BACKEND_JOURNAL)
+
+
+def _existing_rating(rater_dir: Path) -> Rating:
+    return Rating.from_json_file(next(rater_dir.glob("*.json")))
+
+
+def test_journal_save_is_one_append_and_wins_over_the_file(sample_project_dir: Path, sample_rater_dir: Path) -> None:
+    before = sorted(path.name for path in sample_rater_dir.iterdir())
+    rating = _existing_rating(sample_rater_dir)
+    rating.scores["1"] = "Bad"
+
+    path = RatingService.save_rating_to_rater_dir(sample_rater_dir, rating, storage=JOURNAL)
+    records = RatingService(Project("SAMPLE", sample_project_dir)).load_all_rating_records()
+
+    assert path == sample_rater_dir / JOURNAL_FILENAME
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 1
+    assert sorted(path.name for path in sample_rater_dir.iterdir() if path.name != JOURNAL_LOCK_FILENAME) == sorted(
+        before + [JOURNAL_FILENAME]
+    )
+    assert [(record.scores["1"], path.name) for record, path in records] == [
+        ("Bad", "example._.SUB001._.rater1._.Bad._.True.json")
+    ]
+
+
+def test_qc_page_reads_pending_journal_saves(sample_rater_dir: Path) -> None:
+    rating = _existing_rating(sample_rater_dir)
+    rating.scores["1"] = "Bad"
+    RatingService.save_rating_to_rater_dir(sample_rater_dir, rating, storage=JOURNAL)
+    controller = QCPageController()
+    module = {"name": "example"}
+
+    files, payload = controller.load_first_legacy_module_rating(module, sample_rater_dir, "SUB001", "rater1")
+    summaries = controller.rater_dir_rating_summaries(module, sample_rater_dir, "rater1")
+
+    assert files == [sample_rater_dir / JOURNAL_FILENAME]
+    assert payload["scores"]["1"]["value"] == "Bad"
+    assert summaries["SUB001"][:2] == ("Bad", "True")
+
+
+def test_compaction_materialises_legacy_files_and_empties_the_journal(
+    sample_project_dir: Path,
+    sample_rater_dir: Path,
+) -> None:
+    rating = _existing_rating(sample_rater_dir)
+    for score in ("Fair", "Bad"):
+        rating.scores["1"] = score
+        RatingService.save_rating_to_rater_dir(sample_rater_dir, rating, storage=JOURNAL)
+
+    service = RatingService(Project("SAMPLE", sample_project_dir))
+    assert service.compact_rating_journals() == 1
+
+    assert (sample_rater_dir / JOURNAL_FILENAME).read_text(encoding="utf-8") == ""
+    assert [path.name for path in sample_rater_dir.glob("*.json")] == ["example._.SUB001._.rater1._.Bad._.True.json"]
+    assert [record.scores["1"] for record, _ in service.load_all_rating_records()] == ["Bad"]
+
+
+def test_appends_after_the_compaction_snapshot_are_kept(sample_rater_dir: Path) -> None:
+    journal = RatingJournal.for_directory(sample_rater_dir)
+    payload = _existing_rating(sample_rater_dir).to_legacy_dict()
+    journal.append(payload)
+    snapshot = journal.snapshot()
+
+    journal.append({**payload, "ezqcid": "SUB002"})
+    journal.discard_through(snapshot)
+
+    assert list(journal.pending()) == ["SUB002"]
+
+
+def test_journal_locks_are_held_against_other_processes(sample_rater_dir: Path) -> None:
+    fcntl = pytest.importorskip("fcntl")
+    journal = RatingJournal.for_directory(sample_rater_dir)
+
+    def held(name: str) -> bool:
+        # A separate open file description contends like another process.
+        with open(sample_rater_dir / name, "a") as other:
+            try:
+                fcntl.flock(other.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(other.fileno(), fcntl.LOCK_UN)
+            return False
+
+    with journal.locked():
+        with journal.locked():  # re-entrant
+            assert held(JOURNAL_LOCK_FILENAME)
+        assert held(JOURNAL_LOCK_FILENAME)
+    assert not held(JOURNAL_LOCK_FILENAME)
+
+    with journal.compaction() as acquired:
+        assert acquired and journal.compacting and held(JOURNAL_COMPACTION_LOCK_FILENAME)
+        with journal.compaction(wait=False) as again:
+            assert not again
+    assert not journal.compacting and not held(JOURNAL_COMPACTION_LOCK_FILENAME)
+
+
+def test_torn_last_line_is_ignored(sample_rater_dir: Path) -> None:
+    payload = _existing_rating(sample_rater_dir).to_legacy_dict()
+    (sample_rater_dir / JOURNAL_FILENAME).write_text(json.dumps(payload) + "\n" + '{"ezqcid": "SUB0', encoding="utf-8")
+
+    assert list(RatingJournal.for_directory(sample_rater_dir).pending()) == ["SUB001"]
+
+
+def test_append_after_a_torn_last_line_is_kept(sample_rater_dir: Path) -> None:
+    payload = _existing_rating(sample_rater_dir).to_legacy_dict()
+    journal_path = sample_rater_dir / JOURNAL_FILENAME
+    journal_path.write_text(json.dumps(payload) + "\n" + '{"ezqcid": "SUB0', encoding="utf-8")
+
+    RatingJournal.for_directory(sample_rater_dir).append({**payload, "ezqcid": "SUB002"})
+
+    assert list(RatingJournal.for_directory(sample_rater_dir).pending()) == ["SUB001", "SUB002"]
+    assert len(journal_path.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_save_schedules_background_compaction_past_threshold(sample_rater_dir: Path) -> None:
+    rating = _existing_rating(sample_rater_dir)
+    storage = StorageConfig(rating_backend=RATING_BACKEND_JOURNAL, journal_compact_after=2)
+    for ezqcid in ("SUB002", "SUB003"):
+        rating.ezqcid = ezqcid
+        RatingService.save_rating_to_rater_dir(sample_rater_dir, rating, storage=storage)
+
+    deadline = time.monotonic() + 5
+    while RatingJournal.for_directory(sample_rater_dir).pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not RatingJournal.for_directory(sample_rater_dir).pending()
+    ezqcids = sorted(path.name.split("._.")[1] for path in sample_rater_dir.glob("*.json"))
+    assert ezqcids == ["SUB001", "SUB002", "SUB003"]
@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from core.cli_service import migrate_rating_layout
+from core.rating_layout import rater_dir_of, shard_name
+from core.rating_service import RatingService
+from models.project import Project
+from models.rating import Rating
+from models.storage import RATING_LAYOUT_SHARDED, StorageConfig
+
+
+SHARDED = StorageConfig(rating_layout=RATING_LAYOUT_SHARDED)
+
+
+def test_sharded_save_moves_identity_into_its_shard(sample_project_dir: Path) -> None:
+    rater_dir = sample_project_dir / "RatingFiles" / "example" / "rater1"
+    flat_file = next(rater_dir.glob("*.json"))
+    rating = Rating.from_json_file(flat_file)
+    rating.scores["1"] = "Bad"
+
+    path = RatingService.save_rating_to_rater_dir(rater_dir, rating, storage=SHARDED)
+    service = RatingService(Project("SAMPLE", sample_project_dir))
+
+    assert path.parent == rater_dir / shard_name("SUB001")
+    assert not flat_file.exists()
+    assert rater_dir_of(path) == rater_dir
+    assert service.validate_rating_file(path)
+    assert RatingService.find_rating_files_in_rater_dir(rater_dir, "example", "SUB001", "rater1") == [path]
+    assert RatingService.list_rater_dir_ratings(rater_dir, "example", "rater1") == {"SUB001": ("Bad", "True", path)}
+    assert [record_path for _, record_path in service.load_all_rating_records()] == [path]
+
+
+def test_layout_migration_round_trips_and_keeps_aggregation(ccnppeki_compat_project_dir: Path) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    service = RatingService(project)
+    flat_files = service.scan_rating_files()
+    before = service.load_legacy_state(subjects)
+
+    assert service.migrate_rating_layout("sharded") == len(flat_files)
+    assert service.migrate_rating_layout("sharded") == 0
+    sharded = service.load_legacy_state(subjects)
+    # only the filepath columns may differ
+    pd.testing.assert_frame_equal(
+        sharded.qctable.filter(regex=r"^(?!.*\.filepath$)"),
+        before.qctable.filter(regex=r"^(?!.*\.filepath$)"),
+    )
+
+    assert service.migrate_rating_layout("flat") == len(flat_files)
+    assert service.scan_rating_files() == flat_files
+    assert all(path.is_file() for path in (project.rating_dir).glob("*/*/*"))
+
+
+def test_cli_migration_switches_project_layout(sample_project_dir: Path, tmp_path: Path) -> None:
+    registry_path = tmp_path / "projects.json"
+    registry_path.write_text(
+        json.dumps({"projects": {"SAMPLE": str(sample_project_dir)}, "last_project": "SAMPLE"}),
+        encoding="utf-8",
+    )
+
+    moved = migrate_rating_layout("SAMPLE", "sharded", registry_path)
+
+    project = Project("SAMPLE", sample_project_dir)
+    assert moved == 1
+    assert StorageConfig.for_project(project).rating_layout == "sharded"
+    assert RatingService(project).storage_config.rating_layout == "sharded"
@@ -1,8 +1,15 @@
 import json
+import os
+import re
+from datetime import datetime
 from pathlib import Path
+from types import SimpleNamespace
 
 import pandas as pd
 
+import utils.file_utils as file_utils
+from core.rating_filter import RatingFilter
+from core.rating_ingest import REASON_IDENTITY_MISMATCH, REASON_LOCATION_MISMATCH, REASON_UNREADABLE
 from core.rating_service import RatingService
 from models.project import Project
 from models.qcmodule import QCModule
@@ -286,3 +293,240 @@ def test_long_table_to_wide_allows_distinct_raters_same_subject() -> None:
 
     assert "Anat.r1.score1" in wide.columns
     assert "Anat.r2.score1" in wide.columns
+
+
+def test_parallel_ingestion_matches_sequential_order(ccnppeki_compat_project_dir: Path) -> None:
+    service = RatingService(Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir))
+    bad = ccnppeki_compat_project_dir / "RatingFiles" / "hcpall" / "lcj" / "hcpall._.BROKEN._.lcj._.1._.False.json"
+    bad.write_text("{", encoding="utf-8")
+
+    sequential = service.load_all_rating_records()
+    parallel = service.load_all_rating_records(workers=4)
+
+    assert [path for _, path in parallel] == [path for _, path in sequential]
+    assert [rating.ezqcid for rating, _ in parallel] == [rating.ezqcid for rating, _ in sequential]
+    assert bad not in [path for _, path in parallel]
+
+
+def test_workers_knob_is_exposed_through_aggregation_entry_points(ccnppeki_compat_project_dir: Path) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    sequential = RatingService(project)
+    pooled = RatingService(project, workers=4)
+
+    expected = sequential.load_legacy_state(subjects).qctable
+
+    pd.testing.assert_frame_equal(pooled.load_legacy_state(subjects).qctable, expected)
+    pd.testing.assert_frame_equal(sequential.load_legacy_state(subjects, workers=3).qctable, expected)
+    pd.testing.assert_frame_equal(
+        sequential.aggregate_to_wide(None, subjects, workers=3),
+        sequential.aggregate_to_wide(sequential.load_all_ratings(), subjects),
+    )
+    assert pooled.for_project(project).workers == 4
+
+
+def _pivot_table_wide(long_df: pd.DataFrame) -> pd.DataFrame:
+    """The pre-unstack long_table_to_wide: pivot_table(aggfunc="first")."""
+    wide = long_df.pivot_table(index="ezqcid", columns=["module_name", "rater"], aggfunc="first").reset_index()
+    wide.columns = ["ezqcid" if col[0] == "ezqcid" else f"{col[1]}.{col[2]}.{col[0]}" for col in wide.columns]
+    wide["ezqcid"] = wide["ezqcid"].astype(str)
+    return wide
+
+
+def test_columnar_long_table_matches_per_rating_concat(ccnppeki_compat_project_dir: Path) -> None:
+    """The single-pass columnar builder must reproduce what concatenating one
+    row-DataFrame per rating produced: same columns, dtypes and values, and the
+    same CSV bytes after the pivot."""
+    service = RatingService(Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir))
+    records = service.load_all_rating_records()
+
+    columnar = service.rating_records_to_long_dataframe(records)
+    concatenated = pd.concat(
+        [service.rating_to_flat_dataframe(rating, path) for rating, path in records]
+    ).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(columnar, concatenated)
+    assert columnar.to_csv(index=False) == concatenated.to_csv(index=False)
+    wide = service.long_table_to_wide(columnar)
+    assert wide.to_csv(index=False) == _pivot_table_wide(concatenated).to_csv(index=False)
+
+
+def test_unstack_pivot_matches_pivot_table(ccnppeki_compat_project_dir: Path) -> None:
+    service = RatingService(Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir))
+    long_df = service.rating_records_to_long_dataframe(service.load_all_rating_records())
+
+    wide = service.long_table_to_wide(long_df)
+    reference = _pivot_table_wide(long_df)
+
+    pd.testing.assert_frame_equal(wide, reference)
+    assert wide.to_csv(index=False) == reference.to_csv(index=False)
+
+
+def test_columnar_long_table_keeps_concat_dtype_rules() -> None:
+    """ints next to an explicit None stay object (written as "3"), while ints
+    next to a rating that lacks the field become float64 — exactly what the
+    per-rating pd.concat did."""
+    service = RatingService(_project(Path("/tmp/nonexistent")))
+    with_none = _synthetic_legacy_rating("Anat", "r1", "SUB001", "Good", "1", True)
+    with_none.scores["3"] = 3
+    explicit_none = _synthetic_legacy_rating("Anat", "r2", "SUB001", "Good", "1", True)
+    explicit_none.scores["3"] = None
+    lacking = _synthetic_legacy_rating("Anat", "r3", "SUB001", "Good", "1", True)
+
+    long_df = service.rating_records_to_long_dataframe([(with_none, None), (explicit_none, None)])
+    assert long_df["score3"].dtype == object
+
+    long_df = service.rating_records_to_long_dataframe([(with_none, None), (lacking, None)])
+    assert long_df["score3"].dtype == "float64"
+    assert long_df["score3"].isna().tolist() == [False, True]
+
+
+def test_long_table_to_wide_drops_all_null_columns_like_pivot_table() -> None:
+    service = RatingService(_project(Path("/tmp/nonexistent")))
+    long_df = pd.DataFrame({
+        "ezqcid": ["SUB002", "SUB001"],
+        "module_name": ["Anat", "Anat"],
+        "rater": ["r1", "r1"],
+        "score1": ["Poor", "Good"],
+        "notes": [None, None],
+    })
+
+    wide = service.long_table_to_wide(long_df)
+
+    assert list(wide.columns) == ["ezqcid", "Anat.r1.score1"]
+    assert wide["ezqcid"].tolist() == ["SUB001", "SUB002"]
+
+
+def test_list_rater_dir_ratings_parses_filenames_in_one_listing(tmp_path) -> None:
+    rater_dir = tmp_path / "Anat" / "r1"
+    rater_dir.mkdir(parents=True)
+    for name in [
+        "Anat._.SUB001._.r1._.4._.True.json",
+        "Anat._.SUB002._.r1._.None._.False.json",
+        "Anat._.SUB002._.r1._.5._.False.json",
+        "Anat._.SUB003._.r2._.1._.False.json",
+        "Other._.SUB004._.r1._.1._.False.json",
+        "Anat._.SUB005._.r1.json",
+        "notes.txt",
+    ]:
+        (rater_dir / name).write_text("{}", encoding="utf-8")
+
+    summaries = RatingService.list_rater_dir_ratings(rater_dir, "Anat", "r1")
+
+    assert summaries == {
+        "SUB001": ("4", "True", rater_dir / "Anat._.SUB001._.r1._.4._.True.json"),
+        "SUB002": ("5", "False", rater_dir / "Anat._.SUB002._.r1._.5._.False.json"),
+    }
+    assert summaries["SUB002"][2] == RatingService.find_rating_files_in_rater_dir(
+        rater_dir, "Anat", "SUB002", "r1"
+    )[0]
+    assert RatingService.list_rater_dir_ratings(tmp_path / "missing", "Anat", "r1") == {}
+
+
+def test_ingest_parses_each_file_once_and_reports_quarantined_files(monkeypatch, sample_project_dir: Path) -> None:
+    rating_dir = sample_project_dir / "RatingFiles"
+    good = next((rating_dir / "example" / "rater1").glob("*.json"))
+    payload = json.loads(good.read_text(encoding="utf-8"))
+    misplaced = rating_dir / "other" / "rater1" / good.name
+    misplaced.parent.mkdir(parents=True)
+    misplaced.write_text(json.dumps(payload), encoding="utf-8")
+    renamed = good.with_name("example._.SUB002._.rater1._.Good._.True.json")
+    renamed.write_text(json.dumps(payload), encoding="utf-8")
+    torn = good.with_name("example._.SUB003._.rater1._.Good._.True.json")
+    torn.write_text('{"name": "exa', encoding="utf-8")
+
+    loads = []
+    original_load = file_utils.FileUtils.safe_json_load
+    monkeypatch.setattr(
+        file_utils.FileUtils, "safe_json_load", staticmethod(lambda path: loads.append(path) or original_load(path))
+    )
+    state = RatingService(_project(sample_project_dir)).load_legacy_state(
+        pd.DataFrame({"ezqcid": ["SUB001", "SUB002"]})
+    )
+
+    report = state.ingest_report
+    assert [rating.ezqcid for rating in state.ratings] == ["SUB001"]
+    assert sorted(loads) == sorted([good, renamed, torn])
+    assert (report.scanned, report.parsed, report.loaded) == (4, 4, 1)
+    assert {item.path: item.reason for item in report.quarantined} == {
+        misplaced: REASON_LOCATION_MISMATCH,
+        renamed: REASON_IDENTITY_MISMATCH,
+        torn: REASON_UNREADABLE,
+    }
+    assert {"scan", "parse", "aggregate"} <= set(report.timings)
+    assert json.loads(json.dumps(report.to_dict()))["reason_counts"][REASON_UNREADABLE] == 1
+
+
+def test_selective_load_prunes_to_selected_modules_raters_and_subjects(
+    monkeypatch, ccnppeki_compat_project_dir: Path
+) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    service = RatingService(project)
+    every = service.load_all_ratings()
+    walked = []
+    original_walk = os.walk
+
+    def walk(top):
+        for root, dirnames, filenames in original_walk(top):
+            walked.append(Path(root))
+            yield root, dirnames, filenames
+
+    monkeypatch.setattr(os, "walk", walk)
+    selection = RatingFilter(modules=["AnatRestAll"], raters="rf")
+    state = service.load_legacy_state(subjects, rating_filter=selection)
+    monkeypatch.undo()
+
+    expected = [rating for rating in every if (rating.module_name, rating.rater) == ("AnatRestAll", "rf")]
+    assert [rating.ezqcid for rating in state.ratings] == [rating.ezqcid for rating in expected]
+    assert state.ingest_report.scanned == len(expected)
+    rating_dir = project.rating_dir
+    assert set(walked) == {rating_dir, rating_dir / "AnatRestAll", rating_dir / "AnatRestAll" / "rf"}
+    assert not [column for column in state.qctable.columns if column.startswith(("hcpall.", "AnatRestAll.zhuyan."))]
+    pd.testing.assert_frame_equal(
+        service.aggregate_to_wide(None, subjects, rating_filter=selection),
+        service.aggregate_to_wide(every, subjects, rating_filter=selection),
+    )
+
+    one = expected[0].ezqcid
+    assert [r.ezqcid for r in service.load_all_ratings(rating_filter=RatingFilter(ezqcids={one}))] == [
+        r.ezqcid for r in every if r.ezqcid == one
+    ]
+
+
+def test_modified_since_filter_keeps_the_index_for_the_rest(ccnppeki_compat_project_dir: Path) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    service = RatingService(project, use_index=True)
+    total = len(service.load_all_ratings())
+    for path in service.scan_rating_files():
+        os.utime(path, (1_000_000_000, 1_000_000_000))
+    touched = service.scan_rating_files()[0]
+    os.utime(touched, (2_000_000_000, 2_000_000_000))
+
+    recent = service.load_all_rating_records(rating_filter=RatingFilter(modified_since=datetime(2020, 1, 1)))
+
+    assert [path for _, path in recent] == [touched]
+    assert service.last_index_delta.removed == []
+    assert len(service.load_all_ratings()) == total
+
+
+def test_projection_pivots_only_the_listed_fields(ccnppeki_compat_project_dir: Path) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    full = RatingService(project).load_legacy_state(subjects).qctable
+
+    spec = ["scores", "tags", "notes", "time"]
+    projected = RatingService(project).load_legacy_state(subjects, projection=spec)
+    assert set(projected.original_table.columns) <= {"ezqcid", "module_name", "rater", "notes", "time"} | {
+        f"{kind}{number}" for kind in ("score", "tag") for number in range(1, 10)
+    }
+    rating_columns = [column for column in projected.qctable.columns if column not in subjects.columns]
+    assert rating_columns and all(
+        re.search(r"\.(score\d+|tag\d+|notes|time)$", column) for column in rating_columns
+    )
+    pd.testing.assert_frame_equal(projected.qctable, full[list(projected.qctable.columns)])
+
+    settings = {"storage": {"qctable_fields": spec}}
+    service = RatingService(SimpleNamespace(current_project=project, settings=settings))
+    pd.testing.assert_frame_equal(service.load_legacy_state(subjects).qctable, projected.qctable)
+    pd.testing.assert_frame_equal(service.load_legacy_state(subjects, projection=["*"]).qctable, full)
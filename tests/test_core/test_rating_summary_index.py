@@ -0,0 +1,82 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import models.rating as rating_model
+from core.rating_service import RatingService
+from core.rating_summary_index import SUMMARY_INDEX_FILENAME
+from models.project import Project
+from models.rating import Rating
+from models.storage import StorageConfig
+
+
+STABLE = StorageConfig(stable_filenames=True)
+
+
+def _no_json(path):
+    pytest.fail(f"parsed {path}")
+
+
+def test_stable_filename_is_overwritten_in_place_and_listed_from_index(
+    monkeypatch,
+    sample_project_dir: Path,
+    sample_rater_dir: Path,
+) -> None:
+    legacy_file = next(sample_rater_dir.glob("*.json"))
+    rating = Rating.from_json_file(legacy_file)
+
+    first = RatingService.save_rating_to_rater_dir(sample_rater_dir, rating, storage=STABLE)
+    rating.scores["1"] = "Bad"
+    second = RatingService.save_rating_to_rater_dir(sample_rater_dir, rating, storage=STABLE)
+
+    assert first == second == sample_rater_dir / "example._.SUB001._.rater1.json"
+    assert not legacy_file.exists()
+    assert (sample_rater_dir / SUMMARY_INDEX_FILENAME).exists()
+    assert RatingService(Project("SAMPLE", sample_project_dir)).validate_rating_file(second)
+
+    monkeypatch.setattr(rating_model.Rating, "from_json_file", _no_json)
+    summaries = RatingService.list_rater_dir_ratings(sample_rater_dir, "example", "rater1")
+
+    assert summaries == {"SUB001": ("Bad", "True", second)}
+
+
+def test_summary_index_reparses_externally_changed_files(sample_rater_dir: Path) -> None:
+    rating = Rating.from_json_file(next(sample_rater_dir.glob("*.json")))
+    path = RatingService.save_rating_to_rater_dir(sample_rater_dir, rating, storage=STABLE)
+
+    rating.tags["1"] = False
+    rating.to_json_file(path)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    summaries = RatingService.list_rater_dir_ratings(sample_rater_dir, "example", "rater1")
+    assert summaries["SUB001"][:2] == ("Good", "False")
+
+
+def test_corrupt_summary_index_is_rebuilt(sample_rater_dir: Path) -> None:
+    rating = Rating.from_json_file(next(sample_rater_dir.glob("*.json")))
+    RatingService.save_rating_to_rater_dir(sample_rater_dir, rating, storage=STABLE)
+    (sample_rater_dir / SUMMARY_INDEX_FILENAME).write_text('{"version": 1, "entr', encoding="utf-8")
+
+    assert RatingService.list_rater_dir_ratings(sample_rater_dir, "example", "rater1")["SUB001"][:2] == ("Good", "True")
+
+
+def test_bulk_filename_conversion_round_trips(ccnppeki_compat_project_dir: Path) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    service = RatingService(project)
+    legacy_files = service.scan_rating_files()
+    before = service.load_legacy_state(subjects)
+
+    assert service.convert_rating_filenames(stable=True) == len(legacy_files)
+    assert all(len(path.name.split("._.")) == 3 for path in service.scan_rating_files())
+    stable = service.load_legacy_state(subjects)
+    pd.testing.assert_frame_equal(
+        stable.qctable.filter(regex=r"^(?!.*\.file(path|name)$)"),
+        before.qctable.filter(regex=r"^(?!.*\.file(path|name)$)"),
+    )
+
+    assert service.convert_rating_filenames(stable=False) == len(legacy_files)
+    assert service.scan_rating_files() == legacy_files
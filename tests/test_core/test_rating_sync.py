@@ -0,0 +1,85 @@
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from core.cli_service import sync_ratings
+from core.rating_service import RatingService
+from models.project import Project
+from models.rating import Rating
+from models.storage import StorageConfig
+
+
+def _copies(sample_project_dir: Path, tmp_path: Path) -> tuple[Project, Project]:
+    laptop_dir = tmp_path / "laptop" / sample_project_dir.name
+    shutil.copytree(sample_project_dir, laptop_dir)
+    return Project("SAMPLE", sample_project_dir), Project("SAMPLE", laptop_dir)
+
+
+def _save(project: Project, rating: Rating, score1: str, time: str, ezqcid: str | None = None) -> Path:
+    rating.scores["1"] = score1
+    rating.time = datetime.fromisoformat(time)
+    if ezqcid is not None:
+        rating.ezqcid = ezqcid
+    legacy = rating.to_legacy_dict()
+    rating.legacy_payload = legacy
+    rater_dir = project.rating_dir / rating.module_name / rating.rater
+    return RatingService.save_rating_to_rater_dir(rater_dir, rating, legacy, storage=StorageConfig())
+
+
+def _scores(project: Project) -> dict[str, str]:
+    return {rating.ezqcid: rating.scores["1"] for rating in RatingService(project).load_all_ratings()}
+
+
+def test_sync_transfers_new_and_newer_ratings_only(sample_project_dir: Path, tmp_path: Path) -> None:
+    lab, laptop = _copies(sample_project_dir, tmp_path)
+    rating = RatingService(laptop).load_all_ratings()[0]
+    _save(laptop, rating, "Bad", "2030-01-02 10:00:00")
+    _save(laptop, rating, "Fair", "2030-01-02 10:00:00", ezqcid="SUB002")
+
+    dry = RatingService(lab).sync_ratings_from(laptop, dry_run=True)
+    assert (dry.copied, dry.updated) == (["example/SUB002/rater1"], ["example/SUB001/rater1"])
+    assert _scores(lab) == {"SUB001": "Good"}
+
+    report = RatingService(lab).sync_ratings_from(laptop)
+    assert report.transferred == 2
+    assert _scores(lab) == {"SUB001": "Bad", "SUB002": "Fair"}
+    # one file per identity: the lab's older SUB001 file was replaced
+    assert len(list((lab.rating_dir / "example" / "rater1").glob("example._.SUB001._.*.json"))) == 1
+
+    again = RatingService(lab).sync_ratings_from(laptop)
+    assert (again.transferred, again.unchanged) == (0, 2)
+
+
+def test_sync_keeps_newer_destination_and_reports_conflicts(sample_project_dir: Path, tmp_path: Path) -> None:
+    lab, laptop = _copies(sample_project_dir, tmp_path)
+    lab_rating = RatingService(lab).load_all_ratings()[0]
+    laptop_rating = RatingService(laptop).load_all_ratings()[0]
+    _save(lab, lab_rating, "Bad", "2030-01-03 09:00:00")
+    _save(laptop, laptop_rating, "Fair", "2030-01-02 09:00:00")
+    _save(lab, lab_rating, "Bad", "2030-01-04 09:00:00", ezqcid="SUB002")
+    _save(laptop, laptop_rating, "Fair", "2030-01-04 09:00:00", ezqcid="SUB002")
+
+    report = RatingService(lab).sync_ratings_from(laptop)
+
+    assert report.kept_newer == ["example/SUB001/rater1"]
+    assert report.conflicts == ["example/SUB002/rater1"]
+    assert report.transferred == 0
+    assert _scores(lab) == {"SUB001": "Bad", "SUB002": "Bad"}
+
+
+def test_cli_sync_pushes_and_pulls(sample_project_dir: Path, tmp_path: Path) -> None:
+    lab, laptop = _copies(sample_project_dir, tmp_path)
+    registry_path = tmp_path / "projects.json"
+    registry_path.write_text(
+        json.dumps({"projects": {"SAMPLE": str(sample_project_dir)}, "last_project": "SAMPLE"}),
+        encoding="utf-8",
+    )
+    _save(lab, RatingService(lab).load_all_ratings()[0], "Bad", "2030-01-02 10:00:00", ezqcid="SUB002")
+    _save(laptop, RatingService(laptop).load_all_ratings()[0], "Fair", "2030-01-02 10:00:00", ezqcid="SUB003")
+
+    reports = sync_ratings("SAMPLE", laptop.path, "both", registry_path)
+
+    assert reports["pull"].copied == ["example/SUB003/rater1"]
+    assert reports["push"].copied == ["example/SUB002/rater1"]
+    assert _scores(lab) == _scores(laptop) == {"SUB001": "Good", "SUB002": "Bad", "SUB003": "Fair"}
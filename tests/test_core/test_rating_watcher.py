@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from core.event_bus import EventBus, EventType
+from core.rating_watcher import RatingWatcher
+from models.project import Project
+from models.storage import RATING_BACKEND_JOURNAL, RATING_LAYOUT_SHARDED, StorageConfig
+
+BACKENDS = [
+    "polling",
+    pytest.param("inotify", marks=pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")),
+]
+
+
+def _watch(sample_project_dir: Path, backend: str) -> tuple[Project, RatingWatcher, list]:
+    project = Project("SAMPLE", sample_project_dir)
+    bus = EventBus()
+    events = []
+    bus.subscribe(EventType.RATING_SAVED, lambda event: events.append(event.data))
+    watcher = RatingWatcher(project, bus, backend=backend)
+    watcher.start()
+    return project, watcher, events
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_watcher_emits_one_event_per_changed_identity(
+    sample_project_dir: Path,
+    save_sample_rating,
+    backend: str,
+) -> None:
+    project, watcher, events = _watch(sample_project_dir, backend)
+    assert watcher.backend_name == backend
+    assert watcher.poll() == [] and events == []
+
+    save_sample_rating(project, "SUB001", "Bad")  # re-score: rename to a new filename
+    save_sample_rating(project, "SUB002", "Fair", StorageConfig(rating_layout=RATING_LAYOUT_SHARDED))  # new shard dir
+    watcher.poll()
+
+    assert sorted((event["ezqcid"], event["removed"]) for event in events) == [("SUB001", False), ("SUB002", False)]
+    saved = {event["ezqcid"]: Path(event["path"]) for event in events}
+    assert saved["SUB001"].name == "example._.SUB001._.rater1._.Bad._.True.json"
+    assert saved["SUB002"].exists() and saved["SUB002"].parent.parent.name == "rater1"
+
+    events.clear()
+    saved["SUB002"].unlink()
+    watcher.poll()
+    assert [(event["ezqcid"], event["removed"]) for event in events] == [("SUB002", True)]
+    watcher.stop()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_watcher_reports_journal_appends_by_identity(
+    sample_project_dir: Path,
+    save_sample_rating,
+    backend: str,
+) -> None:
+    storage = StorageConfig(rating_backend=RATING_BACKEND_JOURNAL, journal_compact_after=1000)
+    project = Project("SAMPLE", sample_project_dir)
+    save_sample_rating(project, "SUB002", "Fair", storage)
+    project, watcher, events = _watch(sample_project_dir, backend)
+
+    save_sample_rating(project, "SUB003", "Good", storage)
+    watcher.poll()
+
+    assert [(event["module_name"], event["ezqcid"], event["rater"]) for event in events] == [
+        ("example", "SUB003", "rater1")
+    ]
+    watcher.stop()
@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import core.schema_migration as schema_migration
+from core.rating_service import RatingService
+from core.schema_migration import SchemaMigrator, upgrade_payload
+from models.project import Project
+from models.schema import CURRENT_SCHEMA_VERSION
+
+
+def _versions(paths: list[Path]) -> set:
+    return {json.loads(path.read_text(encoding="utf-8")).get("schema_version") for path in paths}
+
+
+def test_bulk_migration_stamps_every_file_and_keeps_ratings(ccnppeki_compat_project_dir: Path) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    service = RatingService(project)
+    files = service.scan_rating_files()
+    before = service.load_legacy_state(subjects)
+    contents = [path.read_bytes() for path in files]
+    progress = []
+
+    dry = SchemaMigrator(project, workers=4).run(dry_run=True)
+    assert len(dry.migrated) == dry.total == len(files)
+    assert [path.read_bytes() for path in files] == contents
+
+    report = SchemaMigrator(project, workers=4, progress=lambda done, total: progress.append((done, total))).run()
+
+    assert report.migrated == dry.migrated and not report.failed
+    assert progress[-1] == (report.total, report.total)
+    assert _versions(files) == {CURRENT_SCHEMA_VERSION}
+    assert not (project.cache_dir / schema_migration.CHECKPOINT_FILENAME).exists()
+    after = service.load_legacy_state(subjects)
+    pd.testing.assert_frame_equal(
+        after.qctable.filter(regex=r"^(?!.*\.schema_version$)"),
+        before.qctable,
+    )
+    assert SchemaMigrator(project).run().current == report.total
+
+
+def test_migration_resumes_from_checkpoint_and_reports_failures(monkeypatch, sample_project_dir: Path) -> None:
+    monkeypatch.setattr(schema_migration, "MIGRATION_CHUNK_SIZE", 1)
+    project = Project("SAMPLE", sample_project_dir)
+    rater_dir = project.rating_dir / "example" / "rater1"
+    broken = rater_dir / "example._.SUB002._.rater1._.Good._.True.json"
+    broken.write_text('{"name": "exa', encoding="utf-8")
+
+    first = SchemaMigrator(project, workers=1).run()
+    assert first.failed and first.failed[0][0] == broken.relative_to(sample_project_dir).as_posix()
+    assert len(first.migrated) == 2
+
+    broken.unlink()
+    settings_mtime = project.settings_path.stat().st_mtime_ns
+    second = SchemaMigrator(project, workers=1).run()
+    assert (second.resumed, second.migrated, second.failed) == (2, [], [])
+    assert project.settings_path.stat().st_mtime_ns == settings_mtime
+
+
+def _rename_old(payload: dict) -> dict:
+    payload["renamed"] = payload.pop("old")
+    return payload
+
+
+def test_upgrade_runs_each_step_and_never_downgrades() -> None:
+    steps = {0: lambda payload: payload, 1: _rename_old, 2: lambda payload: payload}
+
+    assert upgrade_payload({"old": 1}, steps, target=3) == {"renamed": 1, "schema_version": 3}
+    assert upgrade_payload({"schema_version": 5}, steps, target=3) is None
+    with pytest.raises(ValueError):
+        upgrade_payload({"schema_version": 3}, steps, target=4)
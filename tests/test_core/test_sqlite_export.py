@@ -0,0 +1,89 @@
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from core import sqlite_export
+from core.rating_service import RatingService
+from core.sqlite_export import SQLITE_EXPORT_FILENAME
+from core.table_service import TableService
+from models.project import Project
+
+
+def _ratings_for(path: Path, ezqcid: str) -> list[tuple]:
+    with sqlite3.connect(path) as conn:
+        return conn.execute(
+            "SELECT module_name, rater, score1 FROM ratings_long WHERE ezqcid = ? ORDER BY module_name, rater",
+            (ezqcid,),
+        ).fetchall()
+
+
+def _indexed_columns(conn: sqlite3.Connection, table: str) -> set[tuple[str, ...]]:
+    return {
+        tuple(row[2] for row in conn.execute("SELECT * FROM pragma_index_info(?)", (index[1],)))
+        for index in conn.execute("SELECT * FROM pragma_index_list(?)", (table,))
+    }
+
+
+def test_export_writes_indexed_tables_and_refreshes_incrementally(ccnppeki_compat_project_dir: Path) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    service = RatingService(project)
+    state = service.load_legacy_state(subjects)
+
+    report = service.export_sqlite(subjects)
+    path = project.table_dir / SQLITE_EXPORT_FILENAME
+    assert report.path == path
+    assert {name: export.rows for name, export in report.tables.items()} == {
+        "subjects": len(subjects),
+        "ratings_long": len(state.ratings),
+        "qctable": len(state.qctable),
+    }
+    rating = state.ratings[0]
+    assert (rating.module_name, rating.rater, rating.scores["1"]) in _ratings_for(path, rating.ezqcid)
+    with sqlite3.connect(path) as conn:
+        long_indexes = _indexed_columns(conn, "ratings_long")
+        wide_indexes = _indexed_columns(conn, "qctable")
+    assert {("ezqcid", "module_name", "rater"), ("ezqcid",), ("module_name", "rater"), ("score1",)} <= long_indexes
+    assert wide_indexes == {("ezqcid",)}  # score queries go to the long table
+
+    again = service.export_sqlite(subjects)
+    assert all(not export.rebuilt and export.inserted == export.deleted == 0 for export in again.tables.values())
+
+    old_path = next(
+        path
+        for record, path in service.load_all_rating_records()
+        if (record.module_name, record.ezqcid, record.rater) == (rating.module_name, rating.ezqcid, rating.rater)
+    )
+    old_path.unlink()
+    rating.scores["1"] = "Changed"
+    rating.legacy_payload = legacy = rating.to_legacy_dict()
+    RatingService.save_rating_to_rater_dir(project.rating_dir / rating.module_name / rating.rater, rating, legacy)
+
+    refreshed = service.export_sqlite(subjects)
+    assert (refreshed.tables["ratings_long"].inserted, refreshed.tables["ratings_long"].deleted) == (1, 1)
+    assert (rating.module_name, rating.rater, "Changed") in _ratings_for(path, rating.ezqcid)
+
+    rebuilt = TableService().export_sqlite(project, full=True)
+    assert set(rebuilt.tables) == {"subjects", "qctable"}  # the long table is kept as exported
+    assert rebuilt.tables["subjects"].rebuilt
+    assert (rating.module_name, rating.rater, "Changed") in _ratings_for(path, rating.ezqcid)
+
+
+def test_wide_table_past_the_column_limit_is_skipped(ccnppeki_compat_project_dir: Path, monkeypatch) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    service = RatingService(project)
+    service.export_sqlite(subjects)
+    state = service.load_legacy_state(subjects)
+    limit = max(len(subjects.columns), len(state.original_table.columns)) + 1
+    assert len(state.qctable.columns) + 1 > limit
+    monkeypatch.setattr(sqlite_export, "_column_limit", lambda conn: limit)
+
+    report = service.export_sqlite(subjects)
+
+    assert "qctable" in report.tables["qctable"].skipped
+    assert report.tables["ratings_long"].skipped is None
+    with sqlite3.connect(report.path) as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"subjects", "ratings_long"} <= tables and "qctable" not in tables
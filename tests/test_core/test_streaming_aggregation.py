@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import pandas as pd
+
+from core.rating_filter import RatingFilter
+from core.rating_service import RatingService
+from core.streaming_aggregation import StreamingAggregator
+from models.project import Project
+
+
+def test_streaming_qctable_equals_the_one_shot_aggregation(ccnppeki_compat_project_dir: Path) -> None:
+    service = RatingService(Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir))
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    expected = service.load_legacy_state(subjects)
+
+    qctable, report = service.aggregate_streaming(subjects, workers=2, trace_memory=True)
+
+    pd.testing.assert_frame_equal(qctable, expected.qctable)
+    assert qctable.to_csv(index=False) == expected.qctable.to_csv(index=False)
+    assert [(module, rater) for module, rater, _count, _columns in report.blocks] == [
+        ("AnatRestAll", "rf"),
+        ("AnatRestAll", "zhuyan"),
+        ("Skullstrip", "lcj"),
+        ("hcpall", "lcj"),
+        ("openHCP_DIR", "lcj"),
+    ]
+    assert report.ratings == report.ingest.loaded == len(expected.ratings)
+    assert report.peak_traced_bytes and report.peak_traced_bytes > 0
+
+
+def test_streaming_honours_the_rating_filter(ccnppeki_compat_project_dir: Path) -> None:
+    service = RatingService(Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir))
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    selected = RatingFilter(modules={"AnatRestAll"}, raters={"zhuyan"})
+    aggregator = StreamingAggregator(service)
+
+    assert aggregator.subtrees(selected) == [("AnatRestAll", "zhuyan")]
+    qctable, report = aggregator.aggregate(subjects, rating_filter=selected)
+
+    expected = service.load_legacy_state(subjects, rating_filter=selected).qctable
+    pd.testing.assert_frame_equal(qctable, expected)
+    assert report.peak_traced_bytes is None  # tracing was not requested
@@ -1,7 +1,13 @@
+import json
+import os
+
 import pandas as pd
+import pytest
 
-from core.table_service import TABLE_ALL, TABLE_QCTABLE, TableService
+from core.table_service import TABLE_ALL, TABLE_QCTABLE, TableService, resolve_table_format
 from models.project import Project
+from models.storage import StorageConfig
+from utils.file_utils import FileUtils
 
 
 def test_table_service_loads_missing_table_as_none(tmp_path) -> None:
@@ -83,3 +89,127 @@ def test_table_service_loads_tables_for_legacy_state_shape(tmp_path) -> None:
 def test_table_service_normalizes_legacy_module_table_names() -> None:
     assert TableService.module_name_from_table_type("ezqc_AnatRestAll") == "AnatRestAll"
     assert TableService.module_name_from_table_type("AnatRestAll") == "AnatRestAll"
+
+
+def _columnar_project(tmp_path, table_format: str = "auto") -> Project:
+    project = Project("SAMPLE", tmp_path / "easyqc_SAMPLE")
+    project.path.mkdir(parents=True)
+    project.settings_path.write_text(json.dumps({"storage": {"table_format": table_format}}), encoding="utf-8")
+    return project
+
+
+def test_table_service_columnar_copy_keeps_dtypes_and_skips_csv_parsing(monkeypatch, tmp_path) -> None:
+    pytest.importorskip("pyarrow")
+    service = TableService()
+    project = _columnar_project(tmp_path)
+    df = pd.DataFrame({"ezqcid": ["001", "002"], "score": [None, 3]})
+    service.save_table(project, TABLE_QCTABLE, df)
+
+    monkeypatch.setattr("core.table_service.pd.read_csv", lambda *args, **kwargs: pytest.fail("read CSV"))
+    tables = service.load_legacy_state_tables(project)
+
+    assert (project.table_dir / "ezqc_qctable.csv").exists()
+    assert service.fresh_columnar_path(project, TABLE_QCTABLE)[1] == resolve_table_format("auto")
+    pd.testing.assert_frame_equal(tables.results[TABLE_QCTABLE], df)
+
+
+def test_table_service_ignores_columnar_copy_older_than_csv(tmp_path) -> None:
+    pytest.importorskip("pyarrow")
+    service = TableService()
+    project = _columnar_project(tmp_path)
+    service.save_table(project, TABLE_ALL, pd.DataFrame({"ezqcid": ["SUB001"]}))
+    csv_path = service.table_path(project, TABLE_ALL)
+    csv_path.write_text("ezqcid\nSUB009\n", encoding="utf-8")
+    stat = csv_path.stat()
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert service.load_table(project, TABLE_ALL)["ezqcid"].tolist() == ["SUB009"]
+
+
+def test_table_service_ignores_columnar_copy_when_csv_changed_within_the_same_mtime(tmp_path) -> None:
+    pytest.importorskip("pyarrow")
+    service = TableService()
+    project = _columnar_project(tmp_path)
+    service.save_table(project, TABLE_ALL, pd.DataFrame({"ezqcid": ["SUB001"]}))
+    csv_path = service.table_path(project, TABLE_ALL)
+    stat = csv_path.stat()
+    csv_path.write_text("ezqcid\nSUB0099\n", encoding="utf-8")
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert service.fresh_columnar_path(project, TABLE_ALL) is None
+    assert service.load_table(project, TABLE_ALL)["ezqcid"].tolist() == ["SUB0099"]
+
+
+def test_table_service_reads_the_table_format_once_per_settings_change(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr("core.table_service.pyarrow_available", lambda: True)
+    service = TableService()
+    project = _columnar_project(tmp_path, "feather")
+    reads = []
+    for_project = StorageConfig.for_project
+    monkeypatch.setattr(
+        "core.table_service.StorageConfig.for_project",
+        lambda project: reads.append(project) or for_project(project),
+    )
+    assert service.table_format(project) == service.table_format(project) == "feather"
+    assert len(reads) == 1
+
+    project.settings_path.write_text(json.dumps({"storage": {"table_format": "csv", "x": 1}}), encoding="utf-8")
+    assert service.table_format(project) == "csv" and len(reads) == 2
+
+
+def test_table_service_csv_format_and_delete_remove_columnar_copies(tmp_path) -> None:
+    pytest.importorskip("pyarrow")
+    project = _columnar_project(tmp_path)
+    TableService().save_table(project, TABLE_ALL, pd.DataFrame({"ezqcid": ["SUB001"]}))
+    feather_path = project.table_dir / "ezqc_all.feather"
+    assert feather_path.exists()
+
+    TableService(table_format="csv").save_table(project, TABLE_ALL, pd.DataFrame({"ezqcid": ["SUB002"]}))
+    assert not feather_path.exists()
+
+    TableService().save_table(project, TABLE_ALL, pd.DataFrame({"ezqcid": ["SUB003"]}))
+    TableService().save_table(project, TABLE_ALL, None, delete=True)
+    assert list(project.table_dir.iterdir()) == []
+
+
+def test_table_service_columnar_formats_fall_back_to_csv_without_pyarrow(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr("core.table_service.pyarrow_available", lambda: False)
+
+    assert resolve_table_format("auto") == "csv"
+    assert resolve_table_format("parquet") == "csv"
+    assert resolve_table_format("csv") == "csv"
+    for table_format in ("xlsx", "pickle"):
+        with pytest.raises(ValueError):
+            resolve_table_format(table_format)
+
+    project = _columnar_project(tmp_path)
+    TableService().save_table(project, TABLE_ALL, pd.DataFrame({"ezqcid": ["SUB001"]}))
+    assert [path.name for path in project.table_dir.iterdir()] == ["ezqc_all.csv"]
+
+
+def test_table_service_never_loads_a_pickle_from_the_table_directory(monkeypatch, tmp_path) -> None:
+    service = TableService()
+    project = _columnar_project(tmp_path)
+    service.save_table(project, TABLE_ALL, pd.DataFrame({"ezqcid": ["SUB001"]}))
+    stat = service.table_path(project, TABLE_ALL).stat()
+    pd.DataFrame({"ezqcid": ["SUB666"]}).to_pickle(project.table_dir / "ezqc_all.pkl")
+    FileUtils.safe_json_save(
+        service.columnar_source_path(project, TABLE_ALL),
+        {"format": "pickle", "csv_size": stat.st_size, "csv_mtime_ns": stat.st_mtime_ns},
+    )
+    monkeypatch.setattr("core.table_service.pd.read_pickle", lambda *args, **kwargs: pytest.fail("read pickle"))
+
+    assert service.fresh_columnar_path(project, TABLE_ALL) is None
+    assert service.load_table(project, TABLE_ALL)["ezqcid"].tolist() == ["SUB001"]
+
+
+def test_table_service_save_tables_writes_all_tables_in_one_window(tmp_path) -> None:
+    service = TableService()
+    project = Project("SAMPLE", tmp_path / "easyqc_SAMPLE")
+
+    service.save_tables(
+        project,
+        {TABLE_ALL: pd.DataFrame({"ezqcid": ["SUB001"]}), TABLE_QCTABLE: pd.DataFrame({"ezqcid": ["SUB001"]})},
+    )
+
+    assert set(service.load_all_tables(project)) == {TABLE_ALL, TABLE_QCTABLE}
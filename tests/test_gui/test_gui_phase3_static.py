@@ -737,7 +737,8 @@ def test_legacy_qcpage_load_rating_delegates_file_io_to_controller() -> None:
 def test_legacy_qcpage_list_preview_delegates_rating_file_io_to_controller() -> None:
     source = inspect.getsource(gui_qcpage.gui_qcpage.populate_listbox)
     assert "controller = self._ensure_controller()" in source
-    assert "controller.load_first_legacy_module_rating(" in source
+    assert "controller.rater_dir_rating_summaries(" in source
+    assert "controller.load_first_legacy_module_rating(" not in source
     assert "self._ensure_controller().module_subject_rows(" in source
     assert "glob.glob" not in source
     assert "json.load" not in source
@@ -268,3 +268,40 @@ def test_gen_code_respects_passed_settings_for_current_module(tmp_path) -> None:
 
     assert code == "echo /custom/path.nii.gz"
     assert code_exe == {0: "echo /custom/path.nii.gz"}
+
+
+class _Listbox:
+    def __init__(self) -> None:
+        self.rows = []
+
+    def get_children(self):
+        return list(range(len(self.rows)))
+
+    def delete(self, item) -> None:
+        pass
+
+    def insert(self, _parent, _index, values) -> None:
+        self.rows.append(values)
+
+
+def test_populate_listbox_reads_score_and_tag_from_filenames_only(monkeypatch, tmp_path) -> None:
+    page = _page(tmp_path)
+    page.listbox = _Listbox()
+    page.ezqcid = "SUB002"
+    page.dt.tab = {"example": pd.DataFrame({"ezqcid": ["SUB002", "SUB001", "SUB003"]})}
+    (tmp_path / "example._.SUB001._.rater1._.Good._.True.json").write_text("not json", encoding="utf-8")
+    (tmp_path / "example._.SUB002._.rater1._.None._.False.json").write_text("not json", encoding="utf-8")
+
+    def no_json(*args, **kwargs):
+        raise AssertionError("listing must not parse rating JSON")
+
+    monkeypatch.setattr(rating_model.FileUtils, "safe_json_load", no_json)
+
+    page.populate_listbox()
+
+    assert page.listbox.rows == [
+        (1, "SUB001", "Good", "True"),
+        (2, "SUB002", "None", "False"),
+        (3, "SUB003", "", ""),
+    ]
+    assert page.ezqcid_index == 2
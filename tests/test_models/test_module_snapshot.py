@@ -0,0 +1,93 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from core.rating_service import RatingService
+from models.module_snapshot import (
+    SNAPSHOT_DIRNAME,
+    ModuleSnapshotStore,
+    is_compact_payload,
+    merge_payload,
+    split_payload,
+)
+from models.project import Project
+from models.rating import Rating
+from models.storage import StorageConfig
+
+
+def _resave_ratings(project_dir: Path, compact: bool) -> None:
+    """Rewrite every rating file of ``project_dir`` through the save path."""
+    for path in sorted((project_dir / "RatingFiles").rglob("*._.*.json")):
+        rating = Rating.from_json_file(path)
+        path.unlink()
+        RatingService.save_rating_to_rater_dir(path.parent, rating, storage=StorageConfig(compact_ratings=compact))
+
+
+def test_compact_rating_round_trips_to_the_legacy_payload(sample_project_dir: Path) -> None:
+    rater_dir = sample_project_dir / "RatingFiles" / "example" / "rater1"
+    original_path = next(rater_dir.glob("*.json"))
+    legacy = Rating.from_json_file(original_path)
+
+    path = RatingService.save_rating_to_rater_dir(rater_dir, legacy, storage=StorageConfig(compact_ratings=True))
+    stored = json.loads(path.read_text(encoding="utf-8"))
+    loaded = RatingService.load_legacy_rating_file(path)
+
+    assert is_compact_payload(stored)
+    assert "code" not in stored
+    assert loaded == legacy.to_legacy_dict() | {"schema_version": 1}
+    assert list(loaded) == list(legacy.to_legacy_dict()) + ["schema_version"]
+
+
+def test_merge_payload_only_restores_keys_the_payload_was_split_with() -> None:
+    payload = {
+        "name": "example",
+        "ezqcid": "SUB001",
+        "scores": {"1": {"label": "Overall"}, "2": {"label": "Motion", "value": "Bad"}, "3": "Good"},
+    }
+
+    merged = merge_payload(*split_payload(payload))
+
+    assert merged == payload
+    assert "value" not in merged["scores"]["1"]
+    assert "tags" not in merged
+
+
+def test_identical_module_config_is_stored_once(sample_project_dir: Path) -> None:
+    rater_dir = sample_project_dir / "RatingFiles" / "example" / "rater1"
+    rating = Rating.from_json_file(next(rater_dir.glob("*.json")))
+    for ezqcid in ("SUB002", "SUB003"):
+        rating.ezqcid = ezqcid
+        rating.scores["1"] = ezqcid
+        RatingService.save_rating_to_rater_dir(rater_dir, rating, storage=StorageConfig(compact_ratings=True))
+
+    snapshots = list((sample_project_dir / "RatingFiles" / "example" / SNAPSHOT_DIRNAME).glob("*.json"))
+
+    assert len(snapshots) == 1
+    assert ModuleSnapshotStore(rater_dir.parent).get(snapshots[0].stem)["scores"]["1"]["value"] is None
+
+
+def test_compact_and_legacy_ratings_aggregate_identically(ccnppeki_compat_project_dir: Path) -> None:
+    project = Project("CCNPPEKI_COMPAT", ccnppeki_compat_project_dir)
+    subjects = pd.read_csv(ccnppeki_compat_project_dir / "Table" / "ezqc_all.csv")
+    _resave_ratings(ccnppeki_compat_project_dir, compact=False)
+    legacy = RatingService(project).load_legacy_state(subjects)
+
+    _resave_ratings(ccnppeki_compat_project_dir, compact=True)
+    service = RatingService(project)
+    compact = service.load_legacy_state(subjects)
+
+    assert not any(SNAPSHOT_DIRNAME in path.parts for path in service.scan_rating_files())
+    pd.testing.assert_frame_equal(compact.qctable, legacy.qctable)
+    pd.testing.assert_frame_equal(compact.original_table, legacy.original_table)
+
+
+def test_storage_config_reads_project_settings(sample_project_dir: Path) -> None:
+    project = Project("SAMPLE", sample_project_dir)
+    assert StorageConfig.for_project(project) == StorageConfig()
+
+    settings = json.loads(project.settings_path.read_text(encoding="utf-8"))
+    settings["storage"] = {"compact_ratings": True, "from_a_newer_version": 1}
+    project.settings_path.write_text(json.dumps(settings), encoding="utf-8")
+
+    assert RatingService(project).storage_config.compact_ratings
@@ -1,4 +1,5 @@
 import json
+import math
 
 from utils.file_utils import FileUtils
 
@@ -120,3 +121,111 @@ def test_atomic_write_to_missing_parent_creates_dirs(tmp_path) -> None:
     FileUtils.atomic_write(path, '{"ok": true}')
 
     assert json.loads(path.read_text(encoding="utf-8")) == {"ok": True}
+
+
+def test_json_codec_backends_round_trip_rating_payloads(fixtures_dir) -> None:
+    from models.rating import Rating
+    from utils.file_utils import JsonCodec
+
+    path = fixtures_dir / "sample_ratings" / "example" / "rater1" / "example._.SUB001._.rater1._.Good._.True.json"
+    payload = json.loads(path.read_text(encoding="utf-8"))
+
+    for backend in JsonCodec.available_backends():
+        codec = JsonCodec(backend)
+        compact = codec.dumps(payload, indent=None)
+        assert "\n" not in compact
+        assert Rating.from_legacy_dict(codec.loads(compact)) == Rating.from_legacy_dict(payload)
+        # settings stay stdlib pretty-printed, whatever the backend
+        assert codec.dumps(payload) == json.dumps(payload, indent=4, ensure_ascii=False)
+
+
+def test_json_codec_falls_back_to_stdlib_for_values_fast_backends_refuse() -> None:
+    from utils.file_utils import JsonCodec
+
+    codec = JsonCodec()
+    data = {"big": 2**70, "1": "一"}
+
+    decoded = codec.loads(codec.dumps(data, indent=None))
+
+    assert decoded["big"] == 2**70
+    assert decoded["1"] == "一"
+
+
+def test_json_codec_keeps_non_finite_floats_with_every_backend() -> None:
+    from utils.file_utils import JsonCodec
+
+    for backend in JsonCodec.available_backends():
+        codec = JsonCodec(backend)
+        decoded = codec.loads(codec.dumps({"nan": float("nan")}, indent=None))
+        assert math.isnan(decoded["nan"])
+        nested = codec.loads(codec.dumps({"scores": [{"value": float("inf")}]}, indent=None))
+        assert nested["scores"][0]["value"] == float("inf")
+
+
+def test_safe_json_save_indent_none_writes_compact_json(tmp_path) -> None:
+    path = tmp_path / "index.json"
+
+    FileUtils.safe_json_save(path, {"a": [1, 2]}, indent=None)
+
+    assert path.read_text(encoding="utf-8") == '{"a":[1,2]}'
+    assert FileUtils.safe_json_load(path) == {"a": [1, 2]}
+
+
+def _count_fsyncs(monkeypatch) -> list[int]:
+    import utils.file_utils as fu
+
+    calls: list[int] = []
+    real_fsync = fu.os.fsync
+
+    def counting_fsync(fd):
+        calls.append(fd)
+        real_fsync(fd)
+
+    monkeypatch.setattr(fu.os, "fsync", counting_fsync)
+    return calls
+
+
+def test_atomic_write_durability_modes_control_fsyncs(monkeypatch, tmp_path) -> None:
+    calls = _count_fsyncs(monkeypatch)
+
+    FileUtils.atomic_write(tmp_path / "strict.json", "{}")
+    assert len(calls) == 1
+
+    with FileUtils.durability("relaxed"):
+        FileUtils.atomic_write(tmp_path / "cache.json", "{}")
+    assert len(calls) == 1
+
+    with FileUtils.durability("batched") as window:
+        for index in range(3):
+            FileUtils.atomic_write(tmp_path / f"rating{index}.json", "{}")
+        assert len(calls) == 1
+        assert (tmp_path / "rating2.json").read_text(encoding="utf-8") == "{}"
+    # three file fsyncs plus ONE directory fsync at commit
+    assert len(calls) == 1 + 3 + 1
+    assert window.mode == "batched"
+
+
+def test_durability_window_can_be_joined_from_worker_threads(monkeypatch, tmp_path) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls = _count_fsyncs(monkeypatch)
+
+    def write(window, index):
+        with FileUtils.durability(window):
+            FileUtils.atomic_write(tmp_path / f"{index}.json", "{}")
+
+    with FileUtils.durability("batched") as window:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda index: write(window, index), range(8)))
+        assert calls == []
+
+    assert len(calls) == 8 + 1
+    assert FileUtils.active_durability().mode == "strict"
+
+
+def test_unknown_durability_mode_is_rejected() -> None:
+    import pytest
+
+    with pytest.raises(ValueError):
+        with FileUtils.durability("eventually"):
+            pass
@@ -6,13 +6,173 @@
 """
 
 import json
+import math
 import os
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 from utils.logger import log_error, log_info
 
+try:  # optional fast JSON backends, fastest first
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _has_non_finite(data: Any) -> bool:
+    """Whether ``data`` holds a NaN or infinite float anywhere."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class JsonCodec:
+    """JSON 编解码器
+
+    Pretty output (human-edited files such as ``settings_<project>.json``) is
+    always stdlib ``json`` with ``indent=4``, byte-identical to earlier
+    releases. Compact output (machine-only files: ratings, indexes, journals)
+    and all parsing use the fastest importable backend. Data holding NaN or
+    Infinity is written with stdlib (orjson would silently write ``null``), and
+    anything a fast backend refuses (>64-bit ints, ``NaN`` literals in old
+    files ...) is retried with stdlib, so every backend reads and writes the
+    same data.
+    """
+
+    def __init__(self, backend: str | None = None):
+        if backend is None:
+            backend = "orjson" if orjson is not None else "ujson" if ujson is not None else "json"
+        if backend not in self.available_backends():
+            raise ValueError(f"JSON 后端不可用: {backend}")
+        self.backend = backend
+
+    @staticmethod
+    def available_backends() -> list[str]:
+        backends = ["json"]
+        if ujson is not None:
+            backends.insert(0, "ujson")
+        if orjson is not None:
+            backends.insert(0, "orjson")
+        return backends
+
+    def dumps(self, data: Any, indent: Optional[int] = 4) -> str:
+        if indent is None and not _has_non_finite(data):
+            try:
+                if self.backend == "orjson":
+                    return orjson.dumps(data).decode("utf-8")
+                if self.backend == "ujson":
+                    return ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False)
+            except (TypeError, ValueError, OverflowError):
+                pass
+        if indent is None:
+            return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        return json.dumps(data, indent=indent, ensure_ascii=False)
+
+    def loads(self, text: str | bytes) -> Any:
+        try:
+            if self.backend == "orjson":
+                return orjson.loads(text)
+            if self.backend == "ujson":
+                return ujson.loads(text)
+        except (TypeError, ValueError, OverflowError):
+            pass
+        return json.loads(text)
+
+
+DURABILITY_STRICT = "strict"
+DURABILITY_BATCHED = "batched"
+DURABILITY_RELAXED = "relaxed"
+DURABILITY_MODES = (DURABILITY_STRICT, DURABILITY_BATCHED, DURABILITY_RELAXED)
+
+
+class DurabilityWindow:
+    """atomic_write 的持久化窗口
+
+    - ``strict``: fsync every temp file before its rename (default, AC-6).
+    - ``batched``: write + rename immediately (files are visible at once) but
+      defer durability to ``commit``: all written files are fsynced together
+      and every touched directory gets ONE fsync. A crash inside the window
+      may lose or truncate files written in it, so only resumable bulk work
+      (imports, migrations, mass re-saves) should use it.
+    - ``relaxed``: never fsync; for regenerable artefacts (caches, copies).
+    """
+
+    _COMMIT_WORKERS = 8
+
+    def __init__(self, mode: str = DURABILITY_STRICT):
+        if mode not in DURABILITY_MODES:
+            raise ValueError(f"未知的持久化模式: {mode}")
+        self.mode = mode
+        self._pending: set[Path] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def syncs_each_write(self) -> bool:
+        return self.mode == DURABILITY_STRICT
+
+    def track(self, path: Path) -> None:
+        if self.mode == DURABILITY_BATCHED:
+            with self._lock:
+                self._pending.add(path)
+
+    def commit(self) -> None:
+        """Make every write of the window durable (batched mode)."""
+        with self._lock:
+            pending, self._pending = sorted(self._pending), set()
+        if not pending:
+            return
+        # fsyncs are latency bound (network filesystems); overlap them
+        with ThreadPoolExecutor(max_workers=min(self._COMMIT_WORKERS, len(pending))) as pool:
+            list(pool.map(_fsync_path, pending))
+        for directory in sorted({path.parent for path in pending}):
+            _fsync_directory(directory)
+
+
+def _fsync_path(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return  # replaced/removed later in the window
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Persist renames in ``directory`` (not supported on Windows)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+_STRICT_WINDOW = DurabilityWindow(DURABILITY_STRICT)
+_durability_state = threading.local()
+
+
 class FileUtils:
     """文件操作工具类"""
     
@@ -56,28 +216,69 @@ class FileUtils:
 
         return copied_files
 
+    @staticmethod
+    @contextmanager
+    def durability(mode: str | DurabilityWindow) -> Iterator[DurabilityWindow]:
+        """Run the enclosed writes of this thread in a durability mode.
+
+        ``mode`` is a mode name (a new window, committed on exit) or an
+        existing window to join, e.g. from worker threads of a bulk path;
+        the window's owner commits it.
+        """
+        owner = not isinstance(mode, DurabilityWindow)
+        window = DurabilityWindow(mode) if owner else mode
+        stack = _durability_state.__dict__.setdefault("stack", [])
+        stack.append(window)
+        try:
+            yield window
+        finally:
+            stack.pop()
+            if owner:
+                window.commit()
+
+    @staticmethod
+    def active_durability() -> DurabilityWindow:
+        stack = getattr(_durability_state, "stack", None)
+        return stack[-1] if stack else _STRICT_WINDOW
+
+    @staticmethod
+    def replace_written_file(temp_path: Path, path: Path) -> None:
+        """Rename a fully written ``temp_path`` over ``path`` per the active
+        durability window (for writers that cannot use ``atomic_write``)."""
+        window = FileUtils.active_durability()
+        if window.syncs_each_write:
+            _fsync_path(temp_path)
+        os.replace(temp_path, path)
+        window.track(path)
+
     @staticmethod
     def atomic_write(file_path: str | os.PathLike[str], content: str, encoding: str = 'utf-8') -> None:
         path = Path(file_path)
         path.parent.mkdir(parents=True, exist_ok=True)
         temp_path = path.with_name(f".{path.name}.tmp.{os.getpid()}")
+        window = FileUtils.active_durability()
 
         try:
             with open(temp_path, 'w', encoding=encoding) as f:
                 f.write(content)
-                f.flush()
-                os.fsync(f.fileno())
+                if window.syncs_each_write:
+                    f.flush()
+                    os.fsync(f.fileno())
             os.replace(temp_path, path)
+            window.track(path)
         finally:
             if temp_path.exists():
                 temp_path.unlink()
 
+    json_codec = JsonCodec()
+
     @staticmethod
     def safe_json_load(file_path: str | os.PathLike[str]) -> Any:
         with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            return FileUtils.json_codec.loads(f.read())
 
     @staticmethod
-    def safe_json_save(file_path: str | os.PathLike[str], data: Any, indent: int = 4) -> None:
-        content = json.dumps(data, indent=indent, ensure_ascii=False)
+    def safe_json_save(file_path: str | os.PathLike[str], data: Any, indent: Optional[int] = 4) -> None:
+        """``indent=None`` writes compact JSON (machine-only files)."""
+        content = FileUtils.json_codec.dumps(data, indent=indent)
         FileUtils.atomic_write(file_path, content)